@@ -0,0 +1,80 @@
+"""
+Seconds per stage of maps_clean on a synthetic merged dataset: mixed phone,
+rating and review formats and a share of near-duplicate rows, against the old
+drop_duplicates(subset=["name", "address"]) pass.
+
+    python -m benchmarks.bench_clean --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import maps_clean
+
+
+PHONE_FORMATS = ["0{}", "+91 {}", "+91-{}", "{}", "0091 {}"]
+NAME_WORDS = ["shree", "ram", "krishna", "gold", "diamond", "jewellers", "bullion", "silver", "art", "gems",
+              "mahavir", "laxmi", "ornaments", "traders", "& sons", "pvt ltd"]
+STREETS = ["zaveri bazaar rd", "kalbadevi road", "sheikh memon st", "mirza street", "dhanji st", "marine lines"]
+
+
+def synthetic_records(rows, duplicate_share=0.2, seed=7):
+    """A merged multi-area export; duplicate_share of rows re-list another place with noisier text."""
+    rng = np.random.default_rng(seed)
+    places = int(rows * (1 - duplicate_share))
+    words = np.array(NAME_WORDS, dtype=object)
+    name = (words[rng.integers(0, len(words), places)] + " " + words[rng.integers(0, len(words), places)]
+            + " " + words[rng.integers(0, len(words), places)] + " " + rng.integers(1, 5000, places).astype(str))
+    number = rng.integers(7_000_000_000, 9_999_999_999, places).astype(str)
+    pincode = rng.integers(400001, 400105, places).astype(str)
+    street = np.array(STREETS, dtype=object)[rng.integers(0, len(STREETS), places)]
+    address = ("Shop " + rng.integers(1, 300, places).astype(str) + ", " + street + ", Mumbai, Maharashtra " + pincode)
+    base = pd.DataFrame({
+        "name": name,
+        "phone": number,
+        "address": address,
+        "rating": np.round(rng.uniform(1, 5, places), 1).astype(str),
+        "reviews": rng.integers(0, 20_000, places).astype(str),
+        "website": "https://www." + pd.Series(name).str.split().str[1].to_numpy(dtype=object) + ".in/",
+        "category": "Jewelry  store",
+        "latitude": rng.uniform(18.90, 19.00, places),
+        "longitude": rng.uniform(72.80, 72.90, places),
+    })
+    dupes = base.sample(rows - places, replace=True, random_state=seed).reset_index(drop=True)
+    dupes["name"] = dupes["name"].str.upper().str.replace("JEWELLERS", "JEWELERS")
+    dupes["address"] = dupes["address"].str.replace(", ", " ").str.replace("road", "Rd")
+    dupes["rating"] = dupes["rating"].str.replace(".", ",")
+    dupes["reviews"] = "(" + dupes["reviews"] + ")"
+    formats = np.array(PHONE_FORMATS, dtype=object)[rng.integers(0, len(PHONE_FORMATS), len(base))]
+    base["phone"] = [fmt.format(num) for fmt, num in zip(formats, base["phone"])]
+    return pd.concat([base, dupes], ignore_index=True).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--window", type=int, default=maps_clean.DEDUP_WINDOW)
+    args = parser.parse_args()
+
+    df = synthetic_records(args.rows)
+    places = int(args.rows * 0.8)
+    print(f"{len(df)} rows, {places} distinct places")
+
+    start = time.perf_counter()
+    legacy = df.drop_duplicates(subset=["name", "address"])
+    print(f"   legacy drop_duplicates: {time.perf_counter() - start:6.2f}s, {len(legacy)} rows left")
+
+    start = time.perf_counter()
+    normalized = maps_clean.normalize_records(df)
+    print(f"   normalize:              {time.perf_counter() - start:6.2f}s")
+
+    start = time.perf_counter()
+    deduped, stats = maps_clean.dedupe_records(normalized, args.window)
+    print(f"   cluster + dedupe:       {time.perf_counter() - start:6.2f}s, {len(deduped)} rows left "
+          f"({stats['phone_pairs']} phone pairs, {stats['pincode_pairs']} pincode pairs scored)")
+
+
+if __name__ == "__main__":
+    main()
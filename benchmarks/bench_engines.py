@@ -0,0 +1,127 @@
+"""
+Listings/sec, CPU and RAM for the HTTP engine vs Selenium on recorded place pages.
+
+    python -m benchmarks.bench_engines --listings 200 --browsers 4
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from maps_extract import extract_fields
+from maps_http import scrape_cards_http, HTTP_CONCURRENCY
+from maps_pool import BrowserPool
+from maps_scroll import card_row
+from benchmarks.fixture_server import serve_fixtures
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+
+# ======================================
+# RESOURCE SAMPLING
+# ======================================
+class ResourceSampler:
+    """Peak RSS and CPU seconds of this process and everything it spawned (Chrome included)."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.root = psutil.Process()
+        self.peak_rss = 0
+        self.cpu = {}  # pid -> last seen user+system seconds
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def sample(self):
+        rss = 0
+        for proc in [self.root] + self.root.children(recursive=True):
+            try:
+                rss += proc.memory_info().rss
+                times = proc.cpu_times()
+                self.cpu[proc.pid] = times.user + times.system
+            except psutil.Error:
+                pass
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self.cpu_start = sum(self.cpu.values())
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.sample()
+        self.cpu_used = sum(self.cpu.values()) - self.cpu_start
+
+
+# ======================================
+# ENGINES
+# ======================================
+def run_http(cards, concurrency):
+    rows, fallback = scrape_cards_http(cards, concurrency=concurrency)
+    return len(rows), len(fallback)
+
+
+def run_selenium(cards, pool, threads):
+    def scrape(card):
+        with pool.driver() as driver:
+            driver.get(card["href"])
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.XPATH, "//h1[contains(@class, 'DUwDvf')]"))
+            )
+            return card_row(card) | extract_fields(driver)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        rows = list(executor.map(scrape, cards))
+    return len(rows), 0
+
+
+def report(label, listings, elapsed, sampler, parsed, fallback):
+    print(f"{label:>9}: {listings / elapsed:7.1f} listings/s, "
+          f"CPU {sampler.cpu_used:6.1f} s, peak RSS {sampler.peak_rss / (1024 * 1024):7.0f} MB, "
+          f"{parsed} parsed, {fallback} handed to Selenium")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--listings", type=int, default=200)
+    parser.add_argument("--browsers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=HTTP_CONCURRENCY)
+    args = parser.parse_args()
+
+    server, base_url = serve_fixtures()
+    cards = [{"href": f"{base_url}/maps/place/Fixture+{i}/data=!4m6!3m5!1s0x3be7ce2f:0x{i:x}"}
+             for i in range(args.listings)]
+
+    try:
+        with ResourceSampler() as sampler:
+            start = time.perf_counter()
+            parsed, fallback = run_http(cards, args.concurrency)
+            elapsed = time.perf_counter() - start
+        report("http", len(cards), elapsed, sampler, parsed, fallback)
+
+        pool = BrowserPool(size=args.browsers, profile="lean")
+        pool.wait_ready()  # Launch time is bench_startup's business
+        try:
+            with ResourceSampler() as sampler:
+                start = time.perf_counter()
+                parsed, fallback = run_selenium(cards, pool, args.browsers)
+                elapsed = time.perf_counter() - start
+            report("selenium", len(cards), elapsed, sampler, parsed, fallback)
+        finally:
+            pool.close_all()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Round trips and wall time per listing: per-field safe() lookups vs one extractor script.
+
+    python -m benchmarks.bench_extract --runs 20
+"""
+import argparse
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from maps_pool import get_options, resolve_driver_path
+from maps_extract import extract_fields
+from benchmarks.fixture_server import serve_fixtures
+
+
+FIXTURES = ["place_full.html", "place_sparse.html"]
+COORDS_SUFFIX = "?data=!4m6!3m5!1s0x3be7ce2f1000:0x1000a1b2c3d4!8m2!3d18.9526!4d72.8311"
+
+
+# ======================================
+# PREVIOUS EXTRACTION (kept verbatim for comparison)
+# ======================================
+def legacy_extract(driver):
+    time.sleep(1)
+
+    def safe(xpath):
+        try:
+            return driver.find_element(By.XPATH, xpath).text
+        except:
+            return None
+
+    return {
+        "name": safe("//h1[contains(@class, 'DUwDvf')]"),
+        "category": safe("//button[contains(@aria-label,'category')]/div/div[2]"),
+        "address": safe("//button[contains(@data-item-id,'address')]/div/div[2]"),
+        "phone": safe("//button[contains(@data-item-id,'phone:tel')]/div/div[2]"),
+        "website": safe("//a[contains(@data-item-id,'authority')]/div/div[2]")
+    }
+
+
+# ======================================
+# ROUND TRIP COUNTING
+# ======================================
+class RoundTripCounter:
+    """Counts WebDriver commands by wrapping driver.execute (elements route through it too)."""
+
+    def __init__(self, driver):
+        self.count = 0
+        original = driver.execute
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return original(*args, **kwargs)
+
+        driver.execute = counted
+
+
+def scrape_once(driver, url, extract, counter):
+    driver.get(url)
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.XPATH, "//h1[contains(@class, 'DUwDvf')]"))
+    )
+    before = counter.count
+    start = time.perf_counter()
+    fields = extract(driver)
+    return time.perf_counter() - start, counter.count - before, fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="listings per fixture and method")
+    args = parser.parse_args()
+
+    server, base_url = serve_fixtures()
+    driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=get_options())
+    counter = RoundTripCounter(driver)
+
+    try:
+        for fixture in FIXTURES:
+            url = f"{base_url}/{fixture}{COORDS_SUFFIX}"
+            print(f"\n{fixture}")
+            for label, extract in (("safe() per field", legacy_extract), ("single script", extract_fields)):
+                timings, trips = [], []
+                for _ in range(args.runs):
+                    elapsed, round_trips, fields = scrape_once(driver, url, extract, counter)
+                    timings.append(elapsed)
+                    trips.append(round_trips)
+                found = sum(v is not None for v in fields.values())
+                print(f"  {label:>16}: {1000 * sum(timings) / len(timings):8.1f} ms/listing, "
+                      f"{sum(trips) / len(trips):4.1f} round trips, {found}/{len(fields)} fields")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
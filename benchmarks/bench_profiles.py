@@ -0,0 +1,68 @@
+"""
+Pages/min and MB transferred per page for the full and lean browser profiles.
+
+    python -m benchmarks.bench_profiles --pages 30
+"""
+import argparse
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from maps_extract import extract_fields
+from maps_pool import PROFILES, resolve_driver_path
+from benchmarks.fixture_server import serve_fixtures, FixtureHandler
+
+
+COORDS_SUFFIX = "?data=!4m6!3m5!1s0x3be7ce2f1000:0x1000a1b2c3d4!8m2!3d18.9526!4d72.8311"
+
+
+def run_profile(driver_path, profile, url, pages):
+    options_factory, setup = PROFILES[profile]
+    driver = webdriver.Chrome(service=Service(driver_path), options=options_factory())
+    if setup:
+        setup(driver)
+
+    try:
+        FixtureHandler.reset_counters()
+        start = time.perf_counter()
+        for i in range(pages):
+            driver.get(f"{url}&n={i}")
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.XPATH, "//h1[contains(@class, 'DUwDvf')]"))
+            )
+            fields = extract_fields(driver)
+        elapsed = time.perf_counter() - start
+        # Eager loads return before subresources finish; let stragglers land in the count
+        time.sleep(1)
+        return elapsed, FixtureHandler.bytes_sent, FixtureHandler.requests, fields
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--fixture", default="place_heavy.html")
+    args = parser.parse_args()
+
+    server, base_url = serve_fixtures()
+    url = f"{base_url}/{args.fixture}{COORDS_SUFFIX}"
+    driver_path = resolve_driver_path()
+
+    try:
+        for profile in ("full", "lean"):
+            elapsed, sent, requests, fields = run_profile(driver_path, profile, url, args.pages)
+            found = sum(v is not None for v in fields.values())
+            print(f"{profile:>5}: {60 * args.pages / elapsed:7.1f} pages/min, "
+                  f"{sent / args.pages / (1024 * 1024):6.2f} MB/page, "
+                  f"{requests / args.pages:5.1f} requests/page, {found}/{len(fields)} fields")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
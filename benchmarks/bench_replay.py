@@ -0,0 +1,243 @@
+"""
+End-to-end replay of the Selenium and CDP engines against a local fake Google Maps: listings/sec,
+per-stage latency, browser memory and scaling over pool size x threads.
+
+    python -m benchmarks.bench_replay --queries 4 --pool-sizes 1,2,4 --threads 4,8
+    python -m benchmarks.bench_replay --scripts selenium,cdp --threads 8,32
+    python -m benchmarks.bench_replay --scripts selenium --pool-sizes 8 --tabs-per-browser 1,4,8
+    python -m benchmarks.bench_replay --save benchmarks/results/base.json
+    python -m benchmarks.bench_replay --compare benchmarks/results/base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import maps_cdp
+import maps_job
+import maps_tiles
+from maps_ids import unique_places
+from maps_limits import AdaptiveLimiter
+from maps_metrics import METRICS
+from maps_pool import BrowserPool
+from benchmarks.bench_engines import ResourceSampler
+from benchmarks.fake_maps import serve_fake_maps, DEFAULT_CONFIG
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+STAGES = [
+    "pool_acquire_seconds", "page_load_seconds", "feed_container_wait_seconds", "feed_scroll_seconds",
+    "detail_h1_wait_seconds", "detail_extract_seconds", "listing_seconds",
+]
+REGRESSION_TOLERANCE = 0.10  # Relative slowdown tolerated before a run counts as a regression
+
+
+# ======================================
+# SCRIPT ADAPTERS
+# ======================================
+# Both scraper scripts run maps_job's stages, so Selenium is measured there
+def collect(script, query, pool, limiter):
+    try:
+        return script.get_links_for_query(query, query, pool, limiter)[1]
+    except Exception:
+        return []  # Already counted in errors_total
+
+
+def scrape(script, card, pool, limiter, stats_counter, stats_lock):
+    return script.scrape_listing(card["href"], card["categories"][0], pool, limiter,
+                                 stats_counter, stats_lock, card)
+
+
+SCRIPTS = {"selenium": maps_job, "cdp": maps_cdp}
+
+
+# ======================================
+# ONE RUN
+# ======================================
+def run_once(script, queries, pool_size, threads, tabs_per_browser=1):
+    METRICS.reset()
+    pool = BrowserPool(size=pool_size, profile="lean", tabs_per_browser=tabs_per_browser)
+    pool.wait_ready()  # Launch time is bench_startup's business
+    # Pacing is not under test here: start and stay at full speed
+    limiter = AdaptiveLimiter(rate=1000, max_rate=1000, concurrency=threads, max_concurrency=threads)
+    stats_counter = {'completed': 0, 'total': 0, 'successful': 0, 'failed': 0}
+    stats_lock = threading.Lock()
+
+    try:
+        with ResourceSampler() as sampler:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                feeds = executor.map(lambda q: collect(script, q, pool, limiter), queries)
+                places = unique_places(dict(zip(queries, feeds)))
+            collected = time.perf_counter()
+
+            stats_counter['total'] = len(places)
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                rows = list(executor.map(
+                    lambda card: scrape(script, card, pool, limiter, stats_counter, stats_lock),
+                    places.values()
+                ))
+            elapsed = time.perf_counter() - start
+    finally:
+        pool.close_all()
+
+    failed = sum(1 for row in rows if row.get("error"))
+    return run_result(len(rows), failed, elapsed, collected - start, sampler)
+
+
+def run_once_cdp(queries, tabs):
+    """One Chrome with `tabs` tabs; collection and details overlap, so there is no separate collect time."""
+    METRICS.reset()
+    rows = []
+    with ResourceSampler() as sampler:
+        start = time.perf_counter()
+        _, failures = asyncio.run(maps_cdp.run_pipeline(
+            queries, "fake", rows.append, tabs=tabs, feed_tabs=max(1, tabs // 4)
+        ))
+        elapsed = time.perf_counter() - start
+    detail_failures = sum(1 for failure in failures if failure["stage"] == "detail")
+    return run_result(len(rows) + detail_failures, detail_failures, elapsed, None, sampler)
+
+
+def run_result(listings, failed, elapsed, collect_seconds, sampler):
+    stages = {}
+    for series, hist in METRICS.summary()["histograms"].items():
+        name = series[len("maps_"):]
+        if name.split("{")[0] in STAGES:
+            stages[name] = {"p50": hist["p50"], "p95": hist["p95"], "p99": hist["p99"], "count": hist["count"]}
+
+    return {
+        "listings": listings,
+        "failed": failed,
+        "seconds": round(elapsed, 2),
+        "collect_seconds": round(collect_seconds, 2) if collect_seconds is not None else None,
+        "listings_per_sec": round((listings - failed) / elapsed, 3),
+        "listings_per_sec_per_gb": round((listings - failed) / elapsed / (sampler.peak_rss / 1024 ** 3), 3),
+        "peak_rss_mb": round(sampler.peak_rss / (1024 * 1024)),
+        "cpu_seconds": round(sampler.cpu_used, 1),
+        "stages": stages,
+    }
+
+
+# ======================================
+# COMPARISON
+# ======================================
+def run_key(run):
+    key = f"{run['script']} pool={run['pool_size']} threads={run['threads']}"
+    if run.get("tabs_per_browser", 1) > 1:
+        key += f" tabs={run['tabs_per_browser']}"
+    return key
+
+
+def compare(baseline, current, tolerance=REGRESSION_TOLERANCE):
+    """
+    Lines describing every throughput drop or p95 stage slowdown past tolerance.
+    Returns list of str - empty when nothing regressed.
+    """
+    if baseline["config"] != current["config"]:
+        print("⚠️ Baseline was recorded with different fake-server settings; numbers may not be comparable")
+    before = {run_key(run): run for run in baseline["runs"]}
+    problems = []
+    for run in current["runs"]:
+        old = before.get(run_key(run))
+        if old is None:
+            continue
+        if run["listings_per_sec"] < old["listings_per_sec"] * (1 - tolerance):
+            problems.append(f"{run_key(run)}: {old['listings_per_sec']} → {run['listings_per_sec']} listings/s")
+        old_per_gb = old.get("listings_per_sec_per_gb")
+        if old_per_gb and run["listings_per_sec_per_gb"] < old_per_gb * (1 - tolerance):
+            problems.append(f"{run_key(run)}: {old_per_gb} → {run['listings_per_sec_per_gb']} listings/s per GB")
+        for stage, stats in run["stages"].items():
+            old_p95 = old["stages"].get(stage, {}).get("p95")
+            if old_p95 and stats["p95"] and stats["p95"] > old_p95 * (1 + tolerance):
+                problems.append(f"{run_key(run)}: {stage} p95 {old_p95:.3f}s → {stats['p95']:.3f}s")
+    return problems
+
+
+def print_table(runs):
+    print(f"\n{'run':<40}{'listings/s':>11}{'per GB':>9}{'failed':>8}{'seconds':>9}{'peak MB':>9}")
+    for run in runs:
+        print(f"{run_key(run):<40}{run['listings_per_sec']:>11}{run['listings_per_sec_per_gb']:>9}"
+              f"{run['failed']:>8}{run['seconds']:>9}{run['peak_rss_mb']:>9}")
+
+
+def int_list(value):
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scripts", default="selenium", help="comma list of: " + ", ".join(SCRIPTS))
+    parser.add_argument("--queries", type=int, default=3)
+    parser.add_argument("--pool-sizes", type=int_list, default=[1, 2, 4])
+    parser.add_argument("--threads", type=int_list, default=[4])
+    parser.add_argument("--tabs-per-browser", type=int_list, default=[1],
+                        help="pool entries per Chrome; above 1 the pool size counts tabs")
+    parser.add_argument("--feed-total", type=int, default=DEFAULT_CONFIG["feed_total"])
+    parser.add_argument("--feed-batch", type=int, default=DEFAULT_CONFIG["feed_batch"])
+    parser.add_argument("--feed-delay-ms", type=int, default=DEFAULT_CONFIG["feed_delay_ms"])
+    parser.add_argument("--latency-ms", type=int, default=DEFAULT_CONFIG["latency_ms"])
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_CONFIG["error_rate"])
+    parser.add_argument("--block-rate", type=float, default=DEFAULT_CONFIG["block_rate"])
+    parser.add_argument("--missing-rate", type=float, default=DEFAULT_CONFIG["missing_rate"])
+    parser.add_argument("--save", help="results file (default: benchmarks/results/replay-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file; exits 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+
+    config = {
+        "feed_total": args.feed_total, "feed_batch": args.feed_batch, "feed_delay_ms": args.feed_delay_ms,
+        "latency_ms": args.latency_ms, "error_rate": args.error_rate, "block_rate": args.block_rate,
+        "missing_rate": args.missing_rate,
+    }
+    server, base_url = serve_fake_maps(**config)
+    maps_tiles.MAPS_BASE_URL = base_url
+    queries = [f"fixture query {i}" for i in range(args.queries)]
+
+    runs = []
+    try:
+        for name in args.scripts.split(","):
+            if name == "cdp":
+                # One browser; the thread count stands in for the number of tabs
+                for tabs in args.threads:
+                    print(f"\n▶️ cdp: tabs={tabs}")
+                    runs.append(dict(run_once_cdp(queries, tabs), script=name, pool_size=1, threads=tabs))
+                continue
+            for pool_size in args.pool_sizes:
+                for threads in args.threads:
+                    for tabs in args.tabs_per_browser:
+                        print(f"\n▶️ {name}: pool={pool_size} threads={threads} tabs/browser={tabs}")
+                        run = run_once(SCRIPTS[name], queries, pool_size, threads, tabs)
+                        runs.append(dict(run, script=name, pool_size=pool_size, threads=threads,
+                                         tabs_per_browser=tabs))
+    finally:
+        server.shutdown()
+
+    results = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": config,
+               "queries": args.queries, "runs": runs}
+    print_table(runs)
+
+    save_path = args.save or os.path.join(RESULTS_DIR, f"replay-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+    with open(save_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {save_path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(baseline, results, args.tolerance)
+        if problems:
+            print(f"\n❌ {len(problems)} regressions against {args.compare}:")
+            for line in problems:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Seconds per query for the old fixed-sleep scroll loop vs the adaptive one.
+The old loop also pays one get_attribute round trip per listing at the end.
+
+    python -m benchmarks.bench_scroll --total 120 --batch 20 --delay 500
+"""
+import argparse
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from maps_pool import get_options, resolve_driver_path
+from maps_scroll import scroll_feed, PLACE_LINK_XPATH, END_OF_LIST_XPATH
+from benchmarks.fixture_server import serve_fixtures
+
+
+# ======================================
+# PREVIOUS LOOP (kept verbatim for comparison)
+# ======================================
+LEGACY_SCROLL_PAUSE_TIME = 2.0
+LEGACY_MAX_NO_CHANGE = 3
+LEGACY_MIN_SCROLL_ITERATIONS = 15
+
+
+def legacy_scroll_feed(driver, scroll_box):
+    time.sleep(5)
+    previous_count = 0
+    no_change_counter = 0
+    scroll_iteration = 0
+
+    while True:
+        driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", scroll_box)
+        time.sleep(LEGACY_SCROLL_PAUSE_TIME)
+        scroll_iteration += 1
+
+        current_count = len(driver.find_elements(By.XPATH, PLACE_LINK_XPATH))
+        if driver.find_elements(By.XPATH, END_OF_LIST_XPATH):
+            break
+
+        if current_count == previous_count:
+            no_change_counter += 1
+            if no_change_counter >= LEGACY_MAX_NO_CHANGE and scroll_iteration >= LEGACY_MIN_SCROLL_ITERATIONS:
+                break
+        else:
+            no_change_counter = 0
+            previous_count = current_count
+
+        if scroll_iteration > 100:
+            break
+
+    links = []
+    seen = set()
+    for l in driver.find_elements(By.XPATH, PLACE_LINK_XPATH):
+        href = l.get_attribute("href")
+        if href and href not in seen:
+            links.append(href)
+            seen.add(href)
+
+    return links, scroll_iteration
+
+
+# ======================================
+# BENCHMARK
+# ======================================
+def run_query(driver, url, scroll):
+    start = time.perf_counter()
+    driver.get(url)
+    feed = WebDriverWait(driver, 15).until(
+        EC.presence_of_element_located((By.XPATH, "//div[contains(@aria-label, 'Results for')]"))
+    )
+    listings, iterations = scroll(driver, feed)
+    return time.perf_counter() - start, len(listings), iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--total", type=int, default=120, help="listings in the fixture feed")
+    parser.add_argument("--batch", type=int, default=20, help="listings added per lazy load")
+    parser.add_argument("--delay", type=int, default=500, help="ms before each lazy load lands")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    server, base_url = serve_fixtures()
+    url = f"{base_url}/feed.html?total={args.total}&batch={args.batch}&delay={args.delay}"
+    driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=get_options())
+
+    try:
+        for label, scroll in (("fixed sleeps", legacy_scroll_feed), ("adaptive", scroll_feed)):
+            timings = []
+            for _ in range(args.runs):
+                elapsed, count, iterations = run_query(driver, url, scroll)
+                timings.append(elapsed)
+            print(f"{label:>13}: {sum(timings) / len(timings):6.2f} s/query "
+                  f"({count} listings, {iterations} scrolls, {args.runs} runs)")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Cold start cost: chromedriver resolution online vs offline, and time until the
+first and the last pooled browser is ready, with and without the warm daemon
+(start one with `python maps_warm.py` to get the warm row).
+
+    python -m benchmarks.bench_startup --browsers 4
+"""
+import argparse
+import time
+
+import maps_pool
+from maps_pool import BrowserPool, warm_hosts
+
+
+def time_resolution(offline):
+    maps_pool._driver_path = None  # Forget the per-process answer so each run does the lookup
+    start = time.perf_counter()
+    maps_pool.resolve_driver_path(offline)
+    return time.perf_counter() - start
+
+
+def time_pool(browsers, use_warm):
+    start = time.perf_counter()
+    pool = BrowserPool(size=browsers, profile="lean", use_warm=use_warm)
+    try:
+        with pool.driver():
+            first = time.perf_counter() - start
+        pool.wait_ready()
+        return first, time.perf_counter() - start
+    finally:
+        pool.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--browsers", type=int, default=4)
+    args = parser.parse_args()
+
+    online = time_resolution(offline=False)
+    offline = time_resolution(offline=True)
+    print(f"chromedriver lookup: online {online:.2f}s, offline {offline:.3f}s")
+
+    runs = [("cold", False)]
+    if warm_hosts("lean"):
+        runs.append(("warm", True))
+    for label, use_warm in runs:
+        first, ready = time_pool(args.browsers, use_warm)
+        print(f"{label:>5} pool of {args.browsers}: first browser {first:.2f}s, all {ready:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import threading
+import time
+import zlib
+from functools import partial
+from http.server import ThreadingHTTPServer
+from urllib.parse import urlsplit, urlencode
+
+from benchmarks.fixture_server import FixtureHandler, FIXTURES_DIR
+
+
+# ======================================
+# FAKE GOOGLE MAPS
+# ======================================
+DEFAULT_CONFIG = {
+    "feed_total": 120,  # Listings behind every search
+    "feed_batch": 20,  # Listings per lazy load
+    "feed_delay_ms": 300,  # Before a lazy load lands
+    "feed_overlap": 0.5,  # Share of a feed also returned by the neighbouring query
+    "latency_ms": 0,  # Added to every search and place response
+    "error_rate": 0.0,  # Place pages answered with a 500
+    "block_rate": 0.0,  # Place pages redirected to a captcha
+    "missing_rate": 0.0,  # Place pages without a place panel
+}
+
+CAPTCHA_PAGE = (b'<!DOCTYPE html><html><body><form id="captcha-form">'
+                b'<div class="g-recaptcha"></div></form></body></html>')
+MISSING_PAGE = (b'<!DOCTYPE html><html><body><div role="main">'
+                b"Google Maps can't find this place</div></body></html>")
+
+
+class FakeMapsHandler(FixtureHandler):
+    """
+    Answers the URLs the scrapers open: /maps/search/<query>/ redirects to the
+    lazy-loading fixture feed, /maps/place/... serves recorded place pages.
+    Latency and failures come from the class-level config; which requests fail
+    is decided by a hash of the path and how often it was asked for, so every
+    run sees the same failures and a retry can succeed.
+    """
+    config = dict(DEFAULT_CONFIG)
+    hits = {}
+
+    def roll(self, path):
+        """Deterministic number in [0, 1) for this request."""
+        with self.counter_lock:
+            hit = self.hits.get(path, 0)
+            self.hits[path] = hit + 1
+        return (zlib.crc32(f"{path}#{hit}".encode()) % 10000) / 10000
+
+    def send_page(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.count(len(body))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        cfg = self.config
+        if url.path.startswith(("/maps/search/", "/maps/place/")) and cfg["latency_ms"]:
+            time.sleep(cfg["latency_ms"] / 1000)
+
+        if url.path.startswith("/maps/search/"):
+            query = url.path.split("/")[3]
+            step = max(1, int(cfg["feed_total"] * (1 - cfg["feed_overlap"])))
+            params = {
+                "total": cfg["feed_total"],
+                "batch": cfg["feed_batch"],
+                "delay": cfg["feed_delay_ms"],
+                "offset": (zlib.crc32(query.encode()) % 8) * step,
+            }
+            self.send_response(302)
+            self.send_header("Location", "/feed.html?" + urlencode(params))
+            self.end_headers()
+            return
+
+        if url.path.startswith("/sorry/"):
+            self.send_page(200, CAPTCHA_PAGE)
+            return
+
+        if url.path.startswith("/maps/place/"):
+            roll = self.roll(url.path)
+            if roll < cfg["error_rate"]:
+                self.send_page(500, b"")
+                return
+            roll -= cfg["error_rate"]
+            if roll < cfg["block_rate"]:
+                self.send_response(302)
+                self.send_header("Location", "/sorry/index")
+                self.end_headers()
+                return
+            roll -= cfg["block_rate"]
+            if roll < cfg["missing_rate"]:
+                self.send_page(200, MISSING_PAGE)
+                return
+
+        super().do_GET()
+
+
+def serve_fake_maps(**config):
+    """
+    Starts a fake Google Maps on an ephemeral localhost port; config keys
+    override DEFAULT_CONFIG.
+    Returns tuple: (server, base_url) - call server.shutdown() when done.
+    """
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"unknown fake maps settings: {sorted(unknown)}")
+    handler_class = type("ConfiguredFakeMaps", (FakeMapsHandler,), {
+        "config": dict(DEFAULT_CONFIG, **config),
+        "hits": {},
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler_class, directory=FIXTURES_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
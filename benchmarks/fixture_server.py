@@ -0,0 +1,74 @@
+import mimetypes
+import os
+import threading
+import zlib
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """
+    Static fixture files, plus synthetic /assets/<name>.<ext>?kb=N bodies that
+    stand in for tiles, photos and fonts, and /maps/place/... URLs answered
+    from fixtures/recorded/. Counts every body byte it sends.
+    """
+    counter_lock = threading.Lock()
+    bytes_sent = 0
+    requests = 0
+
+    @classmethod
+    def reset_counters(cls):
+        with cls.counter_lock:
+            cls.bytes_sent = 0
+            cls.requests = 0
+
+    def count(self, size):
+        with self.counter_lock:
+            FixtureHandler.bytes_sent += size
+            FixtureHandler.requests += 1
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith("/assets/"):
+            self.send_asset(url)
+            return
+        if url.path.startswith("/maps/place/"):
+            # Same place URL always maps to the same recording
+            recorded = sorted(os.listdir(os.path.join(self.directory, "recorded")))
+            self.path = "/recorded/" + recorded[zlib.crc32(url.path.encode()) % len(recorded)]
+        super().do_GET()
+
+    def send_asset(self, url):
+        kb = int(parse_qs(url.query).get("kb", ["20"])[0])
+        body = b"\0" * (kb * 1024)
+        self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(url.path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")  # Every place page brings its own tiles and photos
+        self.end_headers()
+        self.wfile.write(body)
+        self.count(len(body))
+
+    def copyfile(self, source, outputfile):
+        data = source.read()
+        outputfile.write(data)
+        self.count(len(data))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(directory=FIXTURES_DIR, handler_class=FixtureHandler):
+    """
+    Serves the fixture directory on an ephemeral localhost port.
+    Returns tuple: (server, base_url) - call server.shutdown() when done.
+    """
+    handler = partial(handler_class, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
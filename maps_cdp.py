@@ -0,0 +1,522 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import re
+import shutil
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+from maps_extract import EXTRACT_FIELDS_JS, merge_fields
+from maps_ids import place_id
+from maps_limits import PageBlocked
+from maps_metrics import METRICS, log_progress
+from maps_pool import PROFILES, LEAN_BLOCKED_URLS, find_chrome
+from maps_retry import MISSING_MARKERS, NoSuchPlace, RETRY_BASE_DELAY, MAX_ATTEMPTS
+from maps_scroll import WAIT_FOR_FEED_CHANGE_JS, SCROLL_IDLE_TIMEOUT, SCROLL_MAX_IDLE_TIMEOUT, MAX_NO_CHANGE, MAX_SCROLL_ITERATIONS, KNOWN_PAGES_TO_STOP, FeedStop, card_row
+from maps_known import load_known_places
+from maps_sinks import ResultSink
+from maps_tiles import search_url
+
+try:
+    import aiohttp
+except ImportError:  # The CDP engine talks to Chrome over aiohttp's websocket client
+    aiohttp = None
+
+
+# ======================================
+# CDP ENGINE DEFAULTS
+# ======================================
+CDP_TABS = 20  # Tabs open at once in the one Chrome
+CDP_FEED_TABS = 3  # Of those, how many may be scrolling a results feed
+# Per-tab request blocking of each profile; Chrome's launch flags can't change per tab
+BLOCKED_URLS = {"full": [], "lean": LEAN_BLOCKED_URLS}
+CDP_TAB_MAX_PAGES = 50  # Close a tab (and its context) after this many pages to hand memory back
+CDP_NAV_TIMEOUT = 20.0
+CDP_COMMAND_TIMEOUT = 30.0
+
+FEED_SELECTOR = "div[aria-label*='Results for']"
+PLACE_SELECTOR = "h1.DUwDvf"
+
+
+class CdpError(Exception):
+    pass
+
+
+# ======================================
+# PAGE SCRIPTS
+# ======================================
+# Runtime.evaluate takes an expression, not a function body, so the Selenium
+# scripts are wrapped: plain ones in a function call, async ones in a Promise
+# that hands them `resolve` as their last argument, like execute_async_script.
+def as_expression(script):
+    return "(function () {\n" + script + "\n})()"
+
+
+def as_promise(script, args_js):
+    return ("new Promise(function (resolve) { (function () {\n" + script +
+            "\n}).apply(null, " + args_js + ".concat([resolve])); })")
+
+
+def wait_for_selector_js(selector, timeout_ms):
+    """Resolves true as soon as selector matches, false after timeout_ms; no polling."""
+    return """new Promise(function (resolve) {
+    var sel = %s;
+    if (document.querySelector(sel)) { resolve(true); return; }
+    var observer = new MutationObserver(function () {
+        if (document.querySelector(sel)) { observer.disconnect(); clearTimeout(timer); resolve(true); }
+    });
+    var timer = setTimeout(function () { observer.disconnect(); resolve(false); }, %d);
+    observer.observe(document.documentElement, {childList: true, subtree: true});
+})""" % (json.dumps(selector), timeout_ms)
+
+
+EXTRACT_FIELDS_EXPR = as_expression(EXTRACT_FIELDS_JS)
+
+
+# ======================================
+# DEVTOOLS CONNECTION
+# ======================================
+class CdpConnection:
+    """One browser-level websocket; tabs talk over it through flattened sessions."""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.pending = {}  # message id -> future
+        self.waiters = []  # (method, session id, future) for expected events
+
+    async def connect(self, ws_url):
+        self.http = aiohttp.ClientSession()
+        self.ws = await self.http.ws_connect(ws_url, max_msg_size=0)
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        try:
+            async for msg in self.ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json.loads(msg.data)
+                if "id" in data:
+                    future = self.pending.pop(data["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in data:
+                        future.set_exception(CdpError(data["error"].get("message", "CDP error")))
+                    else:
+                        future.set_result(data.get("result", {}))
+                    continue
+                key = (data.get("method"), data.get("sessionId"))
+                for waiter in [w for w in self.waiters if (w[0], w[1]) == key]:
+                    self.waiters.remove(waiter)
+                    if not waiter[2].done():
+                        waiter[2].set_result(data.get("params", {}))
+        finally:
+            for future in list(self.pending.values()) + [w[2] for w in self.waiters]:
+                if not future.done():
+                    future.set_exception(CdpError("browser connection closed"))
+
+    async def send(self, method, params=None, session_id=None, timeout=CDP_COMMAND_TIMEOUT):
+        msg_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[msg_id] = future
+        message = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        try:
+            await self.ws.send_str(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(msg_id, None)
+
+    def expect(self, method, session_id=None):
+        """Future for the next `method` event; register it before triggering the event."""
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((method, session_id, future))
+        return future
+
+    async def wait(self, future, timeout):
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.forget(future)
+
+    def forget(self, future):
+        """Drops an expected event that will never be awaited."""
+        self.waiters = [w for w in self.waiters if w[2] is not future]
+        future.cancel()
+
+    async def close(self):
+        await self.ws.close()
+        await self.http.close()
+        await asyncio.gather(self.reader, return_exceptions=True)
+
+
+# ======================================
+# TABS
+# ======================================
+class CdpTab:
+    """A page in its own browser context, so cookies and storage never leak between tabs."""
+
+    def __init__(self, conn, target_id, session_id, context_id):
+        self.conn = conn
+        self.target_id = target_id
+        self.session_id = session_id
+        self.context_id = context_id
+        self.pages = 0
+        self.blocked = []  # URL globs Chrome refuses to load in this tab
+        self.network_enabled = False
+
+    async def send(self, method, params=None, timeout=CDP_COMMAND_TIMEOUT):
+        return await self.conn.send(method, params, self.session_id, timeout)
+
+    async def block_urls(self, urls):
+        """Switches the tab's blocked requests, e.g. a lean detail tab lent to a full-profile feed."""
+        if urls == self.blocked:
+            return
+        if not self.network_enabled:
+            await self.send("Network.enable")
+            self.network_enabled = True
+        await self.send("Network.setBlockedURLs", {"urls": urls})
+        self.blocked = urls
+
+    async def goto(self, url, timeout=CDP_NAV_TIMEOUT):
+        loaded = self.conn.expect("Page.domContentEventFired", self.session_id)
+        try:
+            result = await self.send("Page.navigate", {"url": url}, timeout)
+        except BaseException:
+            self.conn.forget(loaded)
+            raise
+        if result.get("errorText"):
+            self.conn.forget(loaded)  # No load event follows a failed navigation
+            raise CdpError(f"navigation failed: {result['errorText']}")
+        await self.conn.wait(loaded, timeout)
+        self.pages += 1
+
+    async def evaluate(self, expression, timeout=CDP_COMMAND_TIMEOUT):
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression, "awaitPromise": True, "returnByValue": True,
+        }, timeout)
+        if result.get("exceptionDetails"):
+            details = result["exceptionDetails"]
+            raise CdpError(details.get("exception", {}).get("description") or details.get("text", "script error"))
+        return result.get("result", {}).get("value")
+
+    async def wait_for_selector(self, selector, timeout):
+        return await self.evaluate(wait_for_selector_js(selector, int(timeout * 1000)), timeout + 5)
+
+    async def check_blocked(self):
+        url = await self.evaluate("location.href")
+        if "consent.google." in url:
+            raise PageBlocked("blocked by consent page")
+        if "/sorry/" in url:
+            raise PageBlocked("blocked by captcha page")
+
+    async def close(self):
+        try:
+            await self.conn.send("Target.closeTarget", {"targetId": self.target_id})
+            await self.conn.send("Target.disposeBrowserContext", {"browserContextId": self.context_id})
+        except (CdpError, asyncio.TimeoutError):
+            pass
+
+
+# ======================================
+# BROWSER
+# ======================================
+class CdpBrowser:
+    """One Chrome process driven over the DevTools protocol, handing out isolated tabs."""
+
+    def __init__(self, profile="lean"):
+        self.profile = profile
+        self.proc = None
+        self.conn = CdpConnection()
+        self.user_data_dir = tempfile.mkdtemp(prefix="maps-cdp-")
+
+    async def launch(self, binary=None):
+        if aiohttp is None:
+            raise RuntimeError("the cdp engine needs aiohttp (pip install aiohttp)")
+        # Same flags as the Selenium profile, minus what only chromedriver understands
+        flags = PROFILES[self.profile][0]().arguments
+        with METRICS.timer("browser_launch_seconds", profile=f"cdp-{self.profile}"):
+            self.proc = await asyncio.create_subprocess_exec(
+                find_chrome(binary), *flags,
+                "--remote-debugging-port=0", f"--user-data-dir={self.user_data_dir}",
+                "--no-first-run", "--no-default-browser-check", "about:blank",
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+            )
+            ws_url = await asyncio.wait_for(self._devtools_url(), 30)
+            await self.conn.connect(ws_url)
+        return self
+
+    async def _devtools_url(self):
+        while True:
+            line = await self.proc.stderr.readline()
+            if not line:
+                raise CdpError("Chrome exited before DevTools came up")
+            match = re.search(rb"DevTools listening on (ws://\S+)", line)
+            if match:
+                # Keep draining stderr so Chrome never blocks on a full pipe
+                asyncio.create_task(self._drain())
+                return match.group(1).decode()
+
+    async def _drain(self):
+        while await self.proc.stderr.readline():
+            pass
+
+    async def new_tab(self):
+        context_id = (await self.conn.send("Target.createBrowserContext"))["browserContextId"]
+        target_id = (await self.conn.send("Target.createTarget", {
+            "url": "about:blank", "browserContextId": context_id,
+        }))["targetId"]
+        session_id = (await self.conn.send("Target.attachToTarget", {
+            "targetId": target_id, "flatten": True,
+        }))["sessionId"]
+        tab = CdpTab(self.conn, target_id, session_id, context_id)
+        await tab.send("Page.enable")
+        await tab.block_urls(BLOCKED_URLS[self.profile])
+        return tab
+
+    async def close(self):
+        try:
+            await self.conn.send("Browser.close", timeout=5)
+        except (CdpError, asyncio.TimeoutError, AttributeError):
+            pass
+        if getattr(self.conn, "ws", None) is not None:
+            await self.conn.close()
+        if self.proc and self.proc.returncode is None:
+            self.proc.kill()
+            await self.proc.wait()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class TabPool:
+    """Fixed set of tabs over one browser; a tab that failed or served max_pages is swapped for a new one."""
+
+    def __init__(self, browser, size=CDP_TABS, max_pages=CDP_TAB_MAX_PAGES):
+        self.browser = browser
+        self.size = size
+        self.max_pages = max_pages
+        self.idle = asyncio.Queue()
+
+    async def start(self):
+        for tab in await asyncio.gather(*(self.browser.new_tab() for _ in range(self.size))):
+            self.idle.put_nowait(tab)
+        return self
+
+    @asynccontextmanager
+    async def tab(self):
+        with METRICS.timer("pool_acquire_seconds", profile="cdp"):
+            tab = await self.idle.get()
+            if tab is None:  # A slot whose tab couldn't be reopened last time
+                try:
+                    tab = await self.browser.new_tab()
+                except BaseException:
+                    self.idle.put_nowait(None)
+                    raise
+        failed = False
+        try:
+            yield tab
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            if failed or tab.pages >= self.max_pages:
+                await tab.close()
+                try:
+                    tab = await self.browser.new_tab()
+                except Exception as e:
+                    # Keep the slot and let the next borrower reopen it, without hiding the tab's own error
+                    METRICS.inc("errors_total", stage="cdp_tab", type=type(e).__name__)
+                    tab = None
+            self.idle.put_nowait(tab)
+
+    async def close(self):
+        while not self.idle.empty():
+            tab = self.idle.get_nowait()
+            if tab is not None:
+                await tab.close()
+
+
+# ======================================
+# PIPELINE STAGES
+# ======================================
+async def collect_feed(tab, query, idle_timeout=SCROLL_IDLE_TIMEOUT, max_idle_timeout=SCROLL_MAX_IDLE_TIMEOUT,
+                       max_no_change=MAX_NO_CHANGE, max_iterations=MAX_SCROLL_ITERATIONS, stop=None):
+    """Same adaptive loop as scroll_feed, awaiting the in-page MutationObserver instead of blocking a thread."""
+    with METRICS.timer("page_load_seconds", kind="cdp_feed"):
+        await tab.goto(search_url(query))
+    await tab.check_blocked()
+    with METRICS.timer("feed_container_wait_seconds"):
+        if not await tab.wait_for_selector(FEED_SELECTOR, 15):
+            raise asyncio.TimeoutError(f"no results feed for {query!r}")
+
+    cards, count, height = [], 0, 0
+    timeout, no_change = idle_timeout, 0
+    with METRICS.timer("feed_scroll_seconds"):
+        for _ in range(max_iterations):
+            args = "[document.querySelector(%s), %d, %d, %d]" % (
+                json.dumps(FEED_SELECTOR), int(timeout * 1000), count, height)
+            snap = await tab.evaluate(as_promise(WAIT_FOR_FEED_CHANGE_JS, args), max_idle_timeout + 10)
+            cards.extend(snap["cards"])
+            if snap["end"] or (stop and stop.update(snap["cards"], len(cards))):
+                break
+            if snap["changed"]:
+                count, height, timeout, no_change = snap["count"], snap["height"], idle_timeout, 0
+                continue
+            no_change += 1
+            if no_change >= max_no_change:
+                break
+            timeout = min(timeout * 2, max_idle_timeout)
+    METRICS.inc("pages_total", kind="cdp_feed")
+    if stop and stop.reason:
+        METRICS.inc("feeds_stopped_early_total")
+    return stop.truncate(cards) if stop else cards
+
+
+async def scrape_place(tab, card):
+    result = card_row(card)
+    with METRICS.timer("page_load_seconds", kind="cdp_detail"):
+        await tab.goto(card["href"])
+    await tab.check_blocked()
+    with METRICS.timer("detail_h1_wait_seconds"):
+        found = await tab.wait_for_selector(PLACE_SELECTOR, 10)
+    if not found:
+        body = (await tab.evaluate("document.body ? document.body.innerText : ''") or "").lower()
+        if any(marker in body for marker in MISSING_MARKERS):
+            raise NoSuchPlace(f"no such place: {card['href']}")
+        raise asyncio.TimeoutError(f"place panel never rendered: {card['href']}")
+    with METRICS.timer("detail_extract_seconds"):
+        merge_fields(result, await tab.evaluate(EXTRACT_FIELDS_EXPR))
+    METRICS.inc("pages_total", kind="cdp_detail")
+    return result
+
+
+async def with_retries(attempt_fn, stage):
+    """
+    Retries transient failures with exponential backoff. The tab goes back to
+    the pool before the backoff, so a retry waiting never holds one.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return await attempt_fn()
+        except (CdpError, asyncio.TimeoutError, PageBlocked) as e:
+            METRICS.inc("errors_total", stage=stage, type=type(e).__name__)
+            if attempt == MAX_ATTEMPTS:
+                raise
+            METRICS.inc("retries_total", stage=stage, kind=type(e).__name__)
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1))
+
+
+async def run_pipeline(categories, area, on_row, tabs=CDP_TABS, feed_tabs=CDP_FEED_TABS, profile="lean",
+                       binary=None, browser=None, known_ids=None, known_pages=KNOWN_PAGES_TO_STOP, top_n=None,
+                       collection_profile=None, scrape_details=True, cached_rows=None, on_collected=None):
+    """
+    Collects every category and scrapes every new place as coroutines on one
+    event loop and one Chrome. on_row(row) gets each scraped listing as it lands.
+    Pass a launched browser to reuse it across calls; it is left running.
+    known_ids (place ids from earlier runs) and top_n cut feed scrolling short, see FeedStop.
+    Feeds block requests per collection_profile (default: profile), details per profile.
+    scrape_details=False emits feed-card rows only. cached_rows(cards) -> {href: row}
+    supplies rows that need no detail page; on_collected(category, cards) sees every feed.
+    Returns tuple: (place id -> categories it was found under, failures)
+    """
+    feed_blocked = BLOCKED_URLS[collection_profile or profile]
+    detail_blocked = BLOCKED_URLS[profile]
+    owned = browser is None
+    if owned:
+        browser = await CdpBrowser(profile).launch(binary)
+    known_places = {}
+    detail_tasks = []
+    failures = []
+    pool = None
+    try:
+        pool = await TabPool(browser, size=tabs).start()
+        feed_slots = asyncio.Semaphore(min(feed_tabs, tabs))  # Leaves tabs free for details
+
+        async def scrape_one(category, card):
+            async def attempt():
+                async with pool.tab() as tab:
+                    await tab.block_urls(detail_blocked)
+                    return await scrape_place(tab, card)
+            try:
+                row = await with_retries(attempt, "detail")
+            except Exception as e:
+                failures.append({"stage": "detail", "item": card["href"], "error": str(e)[:300]})
+                return
+            row["search_query"] = category
+            on_row(row)
+
+        async def collect_one(category):
+            async def attempt():
+                stop = FeedStop(known_ids, known_pages, top_n) if known_ids is not None or top_n else None
+                async with feed_slots, pool.tab() as tab:
+                    await tab.block_urls(feed_blocked)
+                    return await collect_feed(tab, f"{category} in {area}", stop=stop)
+            try:
+                cards = await with_retries(attempt, "feed")
+            except Exception as e:
+                failures.append({"stage": "feed", "item": category, "error": str(e)[:300]})
+                log_progress("❌ %s: %s", category, e, level=logging.WARNING)
+                return
+            if on_collected:
+                on_collected(category, cards)
+            new_cards = []
+            for card in cards:
+                pid = place_id(card["href"])
+                if pid in known_places:
+                    if category not in known_places[pid]:
+                        known_places[pid].append(category)
+                    continue
+                known_places[pid] = [category]
+                new_cards.append(dict(card, place_id=pid, categories=known_places[pid]))
+            cached = cached_rows(new_cards) if cached_rows and scrape_details else {}
+            for card in new_cards:
+                if not scrape_details or card["href"] in cached:
+                    row = cached.get(card["href"]) or card_row(card)
+                    row.update(search_query=category, place_id=card["place_id"])
+                    on_row(row)
+                else:
+                    detail_tasks.append(asyncio.create_task(scrape_one(category, card)))
+            log_progress("✅ %s: %d found, %d new, %d from cache", category, len(cards), len(new_cards),
+                         len(cached))
+
+        # Details start while other feeds are still scrolling
+        await asyncio.gather(*(collect_one(category) for category in categories))
+        await asyncio.gather(*detail_tasks)
+    finally:
+        if pool is not None:
+            await pool.close()
+        if owned:
+            await browser.close()
+    return known_places, failures
+
+
+if __name__ == "__main__":
+    from maps_scraper_faster import CATEGORIES, AREA
+
+    parser = argparse.ArgumentParser(description="Google Maps scraper on one Chrome over DevTools")
+    parser.add_argument("--area", default=AREA)
+    parser.add_argument("--category", action="append", help=f"repeat for several (default: the {len(CATEGORIES)} in maps_scraper_faster)")
+    parser.add_argument("--tabs", type=int, default=CDP_TABS)
+    parser.add_argument("--feed-tabs", type=int, default=CDP_FEED_TABS)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="lean")
+    parser.add_argument("--chrome", help="Chrome/Chromium binary (default: first one on PATH)")
+    parser.add_argument("--output", default="cdp_places.csv")
+    parser.add_argument("--known", action="append",
+                        help="previous output whose places count as known, so feeds stop once only those show up")
+    parser.add_argument("--top-n", type=int, help="stop each feed after this many listings")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    known_ids = load_known_places(args.known) if args.known else None
+    sink = ResultSink(args.output)
+    known, failures = asyncio.run(run_pipeline(
+        args.category or CATEGORIES, args.area, sink.put,
+        tabs=args.tabs, feed_tabs=args.feed_tabs, profile=args.profile, binary=args.chrome,
+        known_ids=known_ids, top_n=args.top_n
+    ))
+    stats = sink.close()
+    elapsed = time.time() - start_time
+    print(f"✅ {stats['written']} unique listings ({len(known)} places, {len(failures)} given up) "
+          f"in {elapsed:.1f}s → {args.output}")
@@ -0,0 +1,418 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# ======================================
+# NORMALIZATION DEFAULTS
+# ======================================
+COUNTRY_CODE = "91"  # Prefixed to national numbers without one
+NATIONAL_DIGITS = 10  # Length of a national number without its trunk 0
+E164_DIGITS = (8, 15)  # Shortest and longest number accepted once a country code is on it
+
+ADDRESS_ABBREVIATIONS = {
+    "rd": "road", "st": "street", "ln": "lane", "nr": "near", "opp": "opposite", "bldg": "building",
+    "mkt": "market", "flr": "floor", "fl": "floor", "apt": "apartment", "stn": "station",
+    "w": "west", "e": "east", "bombay": "mumbai",
+}
+NAME_STOPWORDS = {"the", "m", "s", "ms", "pvt", "private", "ltd", "limited", "llp", "co", "and"}
+NAME_SPELLINGS = [(r"jewell", "jewel"), (r"\b(?:shree|sri|shri)\b", "shri")]
+
+# Duplicate clustering: rows are only compared inside a block (same phone or
+# same pincode), and inside a block only with their neighbours in name order,
+# so the pair count grows with rows x window instead of rows squared
+DEDUP_WINDOW = 8  # Neighbours each row is compared with per block
+PHONE_NAME_MIN = 0.5  # Same phone: names this similar (token Jaccard) are one place
+NAME_MIN = 0.8  # Same pincode: names this similar...
+ADDRESS_MIN = 0.5  # ...with addresses this similar...
+DUP_DISTANCE_M = 150  # ...or pins this close are one place
+
+READERS = {".csv": lambda path: pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""]),
+           ".jsonl": lambda path: pd.read_json(path, lines=True, dtype=False),
+           ".parquet": pd.read_parquet}
+
+
+# ======================================
+# VECTOR HELPERS
+# ======================================
+def by_unique(values, transform):
+    """
+    Runs transform(Series of distinct strings) once per distinct value and
+    spreads the results back over every row; missing values stay None.
+    Merged runs repeat the same phone, address or rating thousands of times;
+    with pyarrow installed, pandas also runs the string passes natively.
+    """
+    codes, uniques = pd.factorize(values)
+    done = np.asarray(transform(pd.Series(uniques, dtype=str)), dtype=object)
+    return pd.Series(np.append(done, None)[codes], index=values.index)  # Code -1 picks the trailing None
+
+
+def sorted_unique(values):
+    """np.unique for integer arrays by sort and compare, which beats its hashing path here."""
+    values = np.sort(values)
+    return values[np.r_[True, values[1:] != values[:-1]]] if len(values) else values
+
+
+def split_tokens(texts):
+    """
+    Returns tuple: (text index per token, token codes) for single-spaced texts,
+    as the normalizers leave them.
+    """
+    tokens = np.array(" \n ".join(texts).split(" "), dtype=object)  # "\n" marks where the next text starts
+    rows = np.cumsum(tokens == "\n")
+    present = (tokens != "") & (tokens != "\n")
+    return rows[present], pd.factorize(tokens[present])[0]
+
+
+def token_signatures(texts):
+    """
+    Returns array: (len(texts) + 1, 2) uint64, each text's tokens hashed into
+    a 128-bit set; the last row is the empty set, for missing texts (code -1).
+    """
+    texts = texts.fillna("").to_numpy(dtype=object)
+    rows, codes = split_tokens(texts)
+    bits = (codes.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(64 - 7)  # Fibonacci hashing
+    signatures = np.zeros((len(texts) + 1, 2), dtype=np.uint64)
+    for word in (0, 1):
+        in_word = (bits // 64) == word
+        np.bitwise_or.at(signatures[:, word], rows[in_word], np.left_shift(np.uint64(1), bits[in_word] % np.uint64(64)))
+    return signatures
+
+
+def jaccard(signatures, a, b):
+    """Token-set Jaccard similarity of signatures a[i] and b[i]; hash collisions can only raise it."""
+    left, right = signatures[a], signatures[b]
+    shared = np.bitwise_count(left & right).sum(axis=1, dtype=np.int64)
+    union = np.bitwise_count(left | right).sum(axis=1, dtype=np.int64)
+    return np.where(union > 0, shared / np.maximum(union, 1), 0.0)
+
+
+def exact_jaccard(texts, a, b):
+    """Token-set Jaccard of texts[a[i]] and texts[b[i]] (code -1 = missing), from padded token-code rows."""
+    involved = sorted_unique(np.concatenate([a, b]))
+    involved = involved[involved >= 0]
+    rows, codes = split_tokens(texts[involved])
+    span = codes.max(initial=0) + 1
+    keys = sorted_unique(rows.astype(np.int64) * span + codes)  # Distinct tokens per text, sorted by text
+    rows, codes = keys // span, keys % span
+    starts = np.searchsorted(rows, np.arange(len(involved) + 1))
+    pos = np.arange(len(rows)) - starts[rows]
+    matrix = np.full((len(involved) + 1, max(int(pos.max(initial=0)) + 1, 1)), -1, dtype=np.int64)
+    matrix[rows, pos] = codes
+    left = matrix[np.where(a >= 0, np.searchsorted(involved, a), len(involved))]
+    right = matrix[np.where(b >= 0, np.searchsorted(involved, b), len(involved))]
+    shared = ((left[:, :, None] == right[:, None, :]) & (left[:, :, None] >= 0)).sum(axis=(1, 2))
+    union = (left >= 0).sum(axis=1) + (right >= 0).sum(axis=1) - shared
+    return np.where(union > 0, shared / np.maximum(union, 1), 0.0)
+
+
+def similar_pairs(texts, signatures, a, b, threshold):
+    """
+    Mask of pairs (codes into texts) at least threshold alike: signatures
+    screen every pair, exact token sets confirm the few that pass.
+    """
+    alike = jaccard(signatures, a, b) >= threshold
+    idx = np.flatnonzero(alike)
+    alike[idx] = exact_jaccard(texts, a[idx], b[idx]) >= threshold
+    return alike
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Haversine distance in metres; NaN wherever a coordinate is missing."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371000 * np.arcsin(np.sqrt(h))
+
+
+# ======================================
+# FIELD NORMALIZERS
+# ======================================
+def normalize_phones(phones, country_code=COUNTRY_CODE):
+    """E.164 (+<country><number>), None for anything that can't be one."""
+    def transform(raw):
+        plus = raw.str.strip().str.startswith("+")
+        digits = raw.str.replace(r"\D", "", regex=True)
+        n = digits.str.len()
+        shortest, longest = E164_DIGITS
+        intl = ~plus & digits.str.startswith("00")
+        trunk = ~plus & ~intl & digits.str.startswith("0") & (n == NATIONAL_DIGITS + 1)
+        national = ~plus & ~digits.str.startswith("0") & (n == NATIONAL_DIGITS)
+        prefixed = ~plus & digits.str.startswith(country_code) & (n == len(country_code) + NATIONAL_DIGITS)
+        body = digits.where(~intl, digits.str[2:]).where(~trunk, digits.str[1:])
+        e164 = ("+" + country_code + body).where(national | trunk, "+" + body)
+        valid = ((plus | intl) & body.str.len().between(shortest, longest)) | national | trunk | prefixed
+        return e164.where(valid.to_numpy(dtype=bool), None)
+
+    return by_unique(phones, transform)
+
+
+def normalize_addresses(addresses):
+    """Lower case, punctuation to spaces, common abbreviations spelled out, single spaces."""
+    abbreviations = r"\b(" + "|".join(ADDRESS_ABBREVIATIONS) + r")\b"
+
+    def transform(raw):
+        text = raw.str.lower().str.replace(r"[^\w\s]", " ", regex=True)
+        text = text.str.replace(abbreviations, lambda m: ADDRESS_ABBREVIATIONS[m.group(1)], regex=True)
+        return text.str.replace(r"\s+", " ", regex=True).str.strip()
+
+    return by_unique(addresses, transform)
+
+
+def extract_pincodes(addresses):
+    """The last six-digit PIN in each address ("400 002" counts), as a string."""
+    def transform(raw):
+        # A substitution rather than str.extract: it stays inside pyarrow's regex engine when pandas uses it
+        pin = raw.str.replace(r"^(?:.*\D)?([1-9]\d{2}) ?(\d{3})(?:\D.*)?$", r"\1\2", regex=True)
+        return pin.where((pin.str.len() == 6) & pin.str.isdigit(), None)
+
+    return by_unique(addresses, transform)
+
+
+def parse_ratings(ratings):
+    if pd.api.types.is_numeric_dtype(ratings):
+        return ratings.where((ratings >= 0) & (ratings <= 5))
+
+    def transform(raw):
+        value = pd.to_numeric(raw.str.strip().str.replace(",", ".", regex=False), errors="coerce")
+        return value.where((value >= 0) & (value <= 5))
+
+    return pd.to_numeric(by_unique(ratings, transform), errors="coerce")
+
+
+def parse_review_counts(reviews):
+    """Review counts as integers: "1,234", "(1,234)", "1.2K" and 1234 all work."""
+    if pd.api.types.is_numeric_dtype(reviews):
+        return reviews.round().astype("Int64")
+
+    def transform(raw):
+        parts = raw.str.extract(r"(\d[\d,. ]*)\s*([kKmM]?)")
+        suffix = parts[1].str.lower().fillna("")
+        plain = pd.to_numeric(parts[0].str.replace(r"[,. ]", "", regex=True), errors="coerce")
+        scaled = pd.to_numeric(parts[0].str.replace(r"[, ]", "", regex=True), errors="coerce")
+        scaled = scaled * suffix.map({"k": 1e3, "m": 1e6}).fillna(1)
+        return plain.where(suffix == "", scaled).round()
+
+    return pd.to_numeric(by_unique(reviews, transform), errors="coerce").astype("Int64")
+
+
+def website_domains(websites):
+    """Bare host name: no scheme, www., port, path or trailing dot."""
+    def transform(raw):
+        host = raw.str.strip().str.lower().str.extract(r"^(?:[a-z][a-z0-9+.-]*://)?(?:www\d*\.)?([^/:?#\s]+)")[0]
+        host = host.str.rstrip(".")
+        return host.where(host.str.contains(".", regex=False).fillna(False).to_numpy(dtype=bool), None)
+
+    return by_unique(websites, transform)
+
+
+def normalize_names(names):
+    """Matching form of a business name: legal suffixes and spelling variants folded away."""
+    noise = r"[^\w\s]|\b(?:" + "|".join(sorted(NAME_STOPWORDS)) + r")\b"  # "&" goes too, like "and"
+
+    def transform(raw):
+        text = raw.str.lower()
+        for pattern, replacement in NAME_SPELLINGS:
+            text = text.str.replace(pattern, replacement, regex=True)
+        return text.str.replace(noise, " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+
+    return by_unique(names, transform)
+
+
+def normalize_records(df, country_code=COUNTRY_CODE):
+    """
+    Adds name_norm, phone_e164, address_norm, pincode, website_domain and category_norm,
+    and turns rating, reviews and coordinates into numbers. Works on whole
+    columns, and on each distinct value once, so row count barely matters.
+    """
+    df = df.reset_index(drop=True)
+    for col in ("name", "category", "rating", "reviews", "address", "phone", "website", "latitude", "longitude"):
+        if col not in df:
+            df[col] = None
+    df["name_norm"] = normalize_names(df["name"])
+    df["phone_e164"] = normalize_phones(df["phone"], country_code)
+    df["address_norm"] = normalize_addresses(df["address"])
+    df["pincode"] = extract_pincodes(df["address"])
+    df["rating"] = parse_ratings(df["rating"])
+    df["reviews"] = parse_review_counts(df["reviews"])
+    df["website_domain"] = website_domains(df["website"])
+    df["category_norm"] = by_unique(df["category"], lambda raw: raw.str.lower().str.split().str.join(" "))
+    df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce")
+    df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
+    return df
+
+
+# ======================================
+# DUPLICATE CLUSTERING
+# ======================================
+def adjacent_pairs(key):
+    """Pairs of rows sharing an exact key (-1 = no key), chained: enough to join them all."""
+    idx = np.flatnonzero(key >= 0)
+    idx = idx[np.argsort(key[idx], kind="stable")]
+    same = key[idx[1:]] == key[idx[:-1]]
+    return idx[:-1][same], idx[1:][same]
+
+
+def window_pairs(block, order, window=DEDUP_WINDOW):
+    """Each row paired with the next `window` rows of its block, rows sorted by `order` inside blocks."""
+    idx = np.flatnonzero(block >= 0)
+    idx = idx[np.lexsort((order[idx], block[idx]))]
+    firsts, seconds = [idx[:0]], [idx[:0]]
+    for k in range(1, window + 1):
+        a, b = idx[:-k], idx[k:]
+        same = block[a] == block[b]
+        firsts.append(a[same])
+        seconds.append(b[same])
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+
+def connected_labels(n, a, b):
+    """Connected components of n rows joined by pairs (a[i], b[i]): each row labelled by its cluster's lowest row."""
+    labels = np.arange(n)
+    while len(a):
+        low = np.minimum(labels[a], labels[b])
+        np.minimum.at(labels, labels[a], low)  # Hook each root onto the lower one
+        np.minimum.at(labels, labels[b], low)
+        while True:  # Pointer jumping until every row points at its root
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels[a], labels[b]):
+            break
+    return labels
+
+
+def cluster_duplicates(df, window=DEDUP_WINDOW):
+    """
+    Labels rows of a normalize_records frame that are the same place:
+    same place id or same normalized (name, address); same phone with similar
+    names; same pincode with similar names and similar addresses or pins.
+    Returns tuple: (cluster label per row, stats)
+    """
+    name_codes, name_uniques = pd.factorize(df["name_norm"], sort=True)  # Codes follow name order
+    address_codes, address_uniques = pd.factorize(df["address_norm"])
+    name_texts = np.asarray(name_uniques, dtype=object)
+    address_texts = np.asarray(address_uniques, dtype=object)
+    names = token_signatures(pd.Series(name_texts, dtype=str))
+    addresses = token_signatures(pd.Series(address_texts, dtype=str))
+    lat = df["latitude"].to_numpy(dtype=float)
+    lng = df["longitude"].to_numpy(dtype=float)
+    firsts, seconds = [], []
+
+    # Exact: same place, or what the streaming sink already counted as a duplicate
+    if "place_id" in df:
+        a, b = adjacent_pairs(pd.factorize(df["place_id"])[0])
+        firsts.append(a)
+        seconds.append(b)
+    both = (name_codes >= 0) & (address_codes >= 0)
+    a, b = adjacent_pairs(np.where(both, name_codes.astype(np.int64) * (len(address_uniques) + 1) + address_codes, -1))
+    firsts.append(a)
+    seconds.append(b)
+
+    a, b = window_pairs(pd.factorize(df["phone_e164"])[0], name_codes, window)
+    ok = similar_pairs(name_texts, names, name_codes[a], name_codes[b], PHONE_NAME_MIN)
+    stats = {"phone_pairs": len(a)}
+    firsts.append(a[ok])
+    seconds.append(b[ok])
+
+    a, b = window_pairs(pd.factorize(df["pincode"])[0], name_codes, window)
+    stats["pincode_pairs"] = len(a)
+    similar = similar_pairs(name_texts, names, name_codes[a], name_codes[b], NAME_MIN)
+    a, b = a[similar], b[similar]
+    with np.errstate(invalid="ignore"):
+        close = distance_m(lat[a], lng[a], lat[b], lng[b]) <= DUP_DISTANCE_M
+    ok = close | similar_pairs(address_texts, addresses, address_codes[a], address_codes[b], ADDRESS_MIN)
+    firsts.append(a[ok])
+    seconds.append(b[ok])
+
+    labels = connected_labels(len(df), np.concatenate(firsts), np.concatenate(seconds))
+    stats["clusters"] = int((labels == np.arange(len(labels))).sum())  # One root per cluster
+    return labels, stats
+
+
+def dedupe_records(df, window=DEDUP_WINDOW):
+    """
+    Drops nameless rows, clusters duplicates and keeps the most complete row
+    of each cluster (more filled fields, then more reviews), with cluster_size.
+    Returns tuple: (deduplicated frame, stats)
+    """
+    named = (df["name"].fillna("").astype(str).str.strip() != "").to_numpy()
+    df = df[named].reset_index(drop=True)
+    labels, stats = cluster_duplicates(df, window)
+    filled = df.notna().sum(axis=1).to_numpy()
+    reviews = df["reviews"].fillna(0).to_numpy(dtype=np.int64)
+    order = np.lexsort((-reviews, -filled, labels))
+    first = np.ones(len(order), dtype=bool)  # Also right for an empty frame, where np.r_[True, ...] isn't
+    first[1:] = labels[order][1:] != labels[order][:-1]
+    keep = order[first]
+    out = df.iloc[keep].copy()
+    out["cluster_size"] = np.bincount(labels)[labels[keep]]
+    stats.update(nameless=int((~named).sum()), merged=len(df) - len(out))
+    return out.reset_index(drop=True), stats
+
+
+# ======================================
+# FILES
+# ======================================
+def read_records(paths):
+    frames = []
+    for path in paths:
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in READERS:
+            raise ValueError(f"unsupported input format {ext!r}, use one of {sorted(READERS)}")
+        frames.append(READERS[ext](path))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_records(df, path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        df.to_parquet(path, index=False)
+    elif ext == ".jsonl":
+        df.to_json(path, orient="records", lines=True, force_ascii=False)
+    else:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def clean_files(paths, output_path, country_code=COUNTRY_CODE, window=DEDUP_WINDOW):
+    """
+    Merges scraped outputs (any mix of .csv, .jsonl and .parquet), normalizes
+    and deduplicates them and writes output_path in the format its extension names.
+    Returns dict: row counts, pairs compared and seconds per stage.
+    """
+    seconds = {}
+    started = time.perf_counter()
+    df = read_records(paths)
+    rows_in = len(df)
+    seconds["read"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    df = normalize_records(df, country_code)
+    seconds["normalize"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    df, stats = dedupe_records(df, window)
+    seconds["dedupe"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    write_records(df, output_path)
+    seconds["write"] = time.perf_counter() - started
+
+    stats.update(rows_in=rows_in, rows_out=len(df), seconds={k: round(v, 2) for k, v in seconds.items()})
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge, normalize and deduplicate scraped Google Maps outputs")
+    parser.add_argument("output", help="cleaned file to write (.csv, .jsonl or .parquet)")
+    parser.add_argument("inputs", nargs="+", help="scraper outputs, e.g. every area of a job")
+    parser.add_argument("--country-code", default=COUNTRY_CODE, help="for phone numbers without one")
+    parser.add_argument("--window", type=int, default=DEDUP_WINDOW, help="neighbours compared per blocking key")
+    args = parser.parse_args()
+
+    stats = clean_files(args.inputs, args.output, args.country_code, args.window)
+    print(f"🧽 {stats['rows_in']} rows in, {stats['nameless']} without a name, {stats['merged']} merged as duplicates")
+    print(f"💾 {stats['rows_out']} places → {args.output} {stats['seconds']}")
@@ -0,0 +1,78 @@
+import json
+
+
+# ======================================
+# PLACE PAGE FIELD SPECS
+# ======================================
+# field name -> XPath (None reads the page URL) -> post-processing step.
+# Post-processing runs in the page, see TRANSFORMS_JS below.
+FIELD_SPECS = [
+    ("name", "//h1[contains(@class, 'DUwDvf')]", "text"),
+    ("category", "//button[contains(@aria-label,'category')]/div/div[2]", "text"),
+    ("rating", "//span[contains(@aria-label,'stars')]", "aria_float"),
+    ("reviews", "//span[contains(@aria-label,'review')]", "aria_int"),
+    ("address", "//button[contains(@data-item-id,'address')]/div/div[2]", "text"),
+    ("phone", "//button[contains(@data-item-id,'phone:tel')]/div/div[2]", "text"),
+    ("website", "//a[contains(@data-item-id,'authority')]/div/div[2]", "text"),
+    ("plus_code", "//button[contains(@data-item-id,'oloc')]/div/div[2]", "text"),
+    ("hours", "//div[contains(@aria-label,'open hours') or contains(@class,'t39EBf')]", "hours"),
+    ("latitude", None, "url_lat"),
+    ("longitude", None, "url_lng"),
+]
+
+TRANSFORMS_JS = r"""
+var COORDS = /!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)/.exec(location.href) ||
+             /@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)/.exec(location.href);
+var TRANSFORMS = {
+    text: function (el) { var t = el.innerText || el.textContent; return t ? t.trim() : null; },
+    aria_float: function (el) {
+        var m = /\d+(?:[.,]\d+)?/.exec(el.getAttribute("aria-label") || "");
+        return m ? parseFloat(m[0].replace(",", ".")) : null;
+    },
+    aria_int: function (el) {
+        var m = /\d[\d,.\s]*/.exec(el.getAttribute("aria-label") || "");
+        return m ? parseInt(m[0].replace(/\D/g, ""), 10) : null;
+    },
+    hours: function (el) {
+        var label = el.getAttribute("aria-label") || "";
+        return label.replace(/\.?\s*Hide open hours for the week\.?\s*$/i, "").trim() || null;
+    },
+    url_lat: function () { return COORDS ? parseFloat(COORDS[1]) : null; },
+    url_lng: function () { return COORDS ? parseFloat(COORDS[2]) : null; }
+};
+"""
+
+
+# ======================================
+# EXTRACTOR COMPILATION
+# ======================================
+def compile_extractor(specs=FIELD_SPECS):
+    """Builds one script that returns every field in specs as a dict."""
+    return TRANSFORMS_JS + """
+var specs = %s;
+var out = {};
+for (var i = 0; i < specs.length; i++) {
+    var field = specs[i][0], xpath = specs[i][1], transform = TRANSFORMS[specs[i][2]];
+    var el = null;
+    if (xpath) {
+        el = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (!el) { out[field] = null; continue; }
+    }
+    try { out[field] = transform(el); } catch (e) { out[field] = null; }
+}
+return out;
+""" % json.dumps([list(spec) for spec in specs])
+
+
+EXTRACT_FIELDS_JS = compile_extractor()
+
+
+def extract_fields(driver, script=EXTRACT_FIELDS_JS):
+    """All place fields in a single WebDriver round trip; missing ones are None."""
+    return driver.execute_script(script)
+
+
+def merge_fields(result, fields):
+    """Detail values win, but a miss never wipes what the feed card already gave us."""
+    result.update({k: v for k, v in fields.items() if v is not None})
+    return result
@@ -0,0 +1,183 @@
+import asyncio
+import html
+import re
+import threading
+
+from maps_extract import merge_fields
+from maps_metrics import METRICS
+from maps_scroll import card_row
+
+try:
+    import aiohttp
+except ImportError:  # The HTTP engine is optional; Selenium covers everything without it
+    aiohttp = None
+
+
+# ======================================
+# HTTP ENGINE DEFAULTS
+# ======================================
+HTTP_CONCURRENCY = 20
+HTTP_TIMEOUT = 15.0
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+COOKIES = {"CONSENT": "YES+"}  # Skips the EU consent interstitial
+
+
+# ======================================
+# PAYLOAD PARSING
+# ======================================
+# The server-rendered place page carries "Name · Address" in og:title and
+# "<stars> · Category" in og:description. Phone and website only show up in
+# the APP_INITIALIZATION_STATE payload, as escaped JSON strings.
+META_RE = re.compile(r'<meta\s+content="([^"]*)"\s+(?:property|itemprop)="(og:title|og:description)"')
+PHONE_RE = re.compile(r'tel:(\+?\d[\d\s-]{5,}\d)')
+WEBSITE_RE = re.compile(r'\[\\*"(https?://[^"\\\s]+)\\*",\\*"([^"\\]+)\\*"')
+
+
+def parse_place_html(page):
+    """
+    Pulls place fields out of a server-rendered /maps/place/ page.
+    Returns dict, or None when the page doesn't carry enough to skip the browser.
+    """
+    if "APP_INITIALIZATION_STATE" not in page:
+        return None
+
+    meta = {key: html.unescape(value) for value, key in META_RE.findall(page)}
+    title = meta.get("og:title", "")
+    if " · " not in title:
+        return None
+    name, address = (part.strip() for part in title.split(" · ", 1))
+    if not name or not address:
+        return None
+
+    category = None
+    description = meta.get("og:description", "")
+    if " · " in description:
+        category = description.split(" · ", 1)[1].strip() or None
+
+    phone = None
+    match = PHONE_RE.search(page)
+    if match:
+        phone = match.group(1).strip()
+
+    website = None
+    for url, label in WEBSITE_RE.findall(page):
+        if "google." not in url and label in url:
+            website = label
+            break
+
+    return {
+        "name": name,
+        "category": category,
+        "address": address,
+        "phone": phone,
+        "website": website,
+    }
+
+
+# ======================================
+# ASYNC FETCHING
+# ======================================
+class HttpClient:
+    """
+    One keep-alive session for a whole job, on an event loop in its own thread,
+    so batches can run from any worker thread while others run. With a limiter,
+    every request takes a page-load slot and reports how it went: a consent
+    page, captcha or 429 backs the limiter off like a blocked browser page.
+    """
+
+    def __init__(self, concurrency=HTTP_CONCURRENCY, timeout=HTTP_TIMEOUT, limiter=None):
+        if aiohttp is None:
+            raise RuntimeError("the http detail engine needs aiohttp (pip install aiohttp)")
+        self.limiter = limiter
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.session, self.semaphore = self._call(self._open(concurrency, timeout))
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _open(self, concurrency, timeout):
+        connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+        session = aiohttp.ClientSession(
+            connector=connector, headers=HEADERS, cookies=COOKIES,
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        )
+        return session, asyncio.Semaphore(concurrency)
+
+    async def _fetch_place(self, link):
+        async with self.semaphore:
+            if self.limiter:
+                with METRICS.timer("limiter_wait_seconds"):
+                    await asyncio.to_thread(self.limiter.acquire)
+            reason = None
+            try:
+                async with self.session.get(link) as resp:
+                    if "consent." in resp.url.host:
+                        reason = "consent"
+                    elif resp.status == 429 or resp.url.path.startswith("/sorry/"):
+                        reason = "captcha"
+                    if reason or resp.status != 200:
+                        return None
+                    page = await resp.text()
+            except asyncio.TimeoutError:
+                reason = "timeout"
+                return None
+            except aiohttp.ClientError:
+                return None
+            finally:
+                if self.limiter:
+                    self.limiter.release(reason)
+        return parse_place_html(page)
+
+    async def _fetch_all(self, links):
+        parsed = await asyncio.gather(*(self._fetch_place(link) for link in links))
+        return dict(zip(links, parsed))
+
+    def fetch_places(self, links):
+        """
+        Fetches place pages over the shared session.
+        Returns dict: link -> parsed fields, or None where the browser is needed.
+        """
+        links = list(dict.fromkeys(links))
+        if not links:
+            return {}
+        return self._call(self._fetch_all(links))
+
+    def scrape_cards(self, cards):
+        """
+        Runs feed cards through the HTTP engine.
+        Returns tuple: (result_rows, cards_left_for_selenium)
+        """
+        with METRICS.timer("http_batch_seconds"):
+            parsed = self.fetch_places([card["href"] for card in cards])
+        rows, fallback = [], []
+        for card in cards:
+            fields = parsed.get(card["href"])
+            if fields:
+                rows.append(merge_fields(card_row(card), fields))
+            else:
+                fallback.append(card)
+        METRICS.inc("pages_total", len(rows), kind="http")
+        METRICS.inc("http_fallbacks_total", len(fallback))
+        return rows, fallback
+
+    def close(self):
+        self._call(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def scrape_cards_http(cards, concurrency=HTTP_CONCURRENCY, timeout=HTTP_TIMEOUT, limiter=None):
+    """One-off HttpClient.scrape_cards on a session of its own."""
+    client = HttpClient(concurrency, timeout, limiter)
+    try:
+        return client.scrape_cards(cards)
+    finally:
+        client.close()
@@ -0,0 +1,57 @@
+import re
+from urllib.parse import unquote, urlsplit, urlunsplit
+
+
+# ======================================
+# PLACE IDENTIFIERS
+# ======================================
+# Place hrefs differ in name slug, viewport and tracking params (authuser, hl,
+# rclk, entry...), but carry a stable id somewhere:
+#   /data=...!1s0x3be7ce2f...:0x9a1b...   feature id, second half is the CID in hex
+#   ?cid=11112222333344445555             the same CID in decimal
+#   !16s%2Fg%2F11abc...                   knowledge-graph id, when nothing else is there
+FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-fA-F]+):(0x[0-9a-fA-F]+)")
+CID_PARAM_RE = re.compile(r"[?&](?:cid|ludocid)=(\d+)")
+KG_ID_RE = re.compile(r"!16s((?:%2F|/)[gm](?:%2F|/)[\w-]+)")
+
+
+def canonical_url(url):
+    """The href without tracking params or fragment; a ?cid= is the only query kept."""
+    parts = urlsplit(url)
+    match = CID_PARAM_RE.search(url)
+    query = f"cid={match.group(1)}" if match else ""
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+def place_id(url):
+    """
+    Stable key for a place URL: "cid:<decimal>" whenever the CID can be read,
+    so /data=!1s... and ?cid= links to the same place agree.
+    """
+    match = FEATURE_ID_RE.search(url)
+    if match:
+        return f"cid:{int(match.group(2), 16)}"
+    match = CID_PARAM_RE.search(url)
+    if match:
+        return f"cid:{match.group(1)}"
+    match = KG_ID_RE.search(url)
+    if match:
+        return f"kg:{unquote(match.group(1))}"
+    return canonical_url(url)
+
+
+def unique_places(cards_by_category):
+    """
+    Collapses cards from every category onto one card per place.
+    Returns dict: place id -> first card seen, with "categories" listing every
+    category it showed up under, in discovery order.
+    """
+    places = {}
+    for category, cards in cards_by_category.items():
+        for card in cards:
+            pid = place_id(card["href"])
+            if pid not in places:
+                places[pid] = dict(card, place_id=pid, categories=[])
+            if category not in places[pid]["categories"]:
+                places[pid]["categories"].append(category)
+    return places
@@ -0,0 +1,846 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+from maps_extract import extract_fields, merge_fields
+from maps_http import HttpClient
+from maps_ids import place_id
+from maps_known import load_known_places
+from maps_journal import PipelineJournal, load_journal
+from maps_limits import AdaptiveLimiter
+from maps_metrics import METRICS, configure_logging, configure_progress, log_event, log_progress
+from maps_monitor import ResourceMonitor
+from maps_pool import BrowserPool
+from maps_refresh import RefreshTracker
+from maps_retry import (NoSuchPlace, Outstanding, RetryQueue, classify_failure, place_missing, write_dead_letters,
+                        write_dead_letter_rows)
+from maps_sched import TaskScheduler
+from maps_scroll import (KNOWN_PAGES_TO_STOP, MAX_NO_CHANGE, MAX_SCROLL_ITERATIONS, SCROLL_IDLE_TIMEOUT,
+                         SCROLL_MAX_IDLE_TIMEOUT, FeedStop, card_row, scroll_feed)
+from maps_sinks import SINK_BATCH_SIZE, ResultSink
+from maps_store import ListingStore
+from maps_tiles import collect_tiled, search_url
+
+try:
+    import yaml
+except ImportError:  # YAML job files need PyYAML; JSON ones never do
+    yaml = None
+
+
+# ======================================
+# JOB DEFAULTS
+# ======================================
+ENGINES = ("selenium", "http", "cdp")  # http: parse place pages without a browser, Selenium for misses
+DEFAULT_SINKS = ["{area}_places.csv"]  # {area} becomes the area's slug; .csv, .jsonl or .parquet
+
+DEFAULT_LIMITS = {
+    "max_concurrency": 10,  # Ceiling for pages in flight; the limiter starts lower and climbs
+    "page_rate": 1.0,  # Starting page loads per second, shared by both phases
+    "max_page_rate": 5.0,
+    "collection_threads": 3,  # Categories collected at once
+    "pool_size": 7,  # Upper bound, the pool grows to it under load
+    "pool_min_size": 3,
+    "tabs_per_browser": 1,  # Above 1 the pool sizes count tabs, this many sharing each Chrome
+    "acquire_timeout": 120.0,
+    "driver_max_pages": 200,  # Recycle each Chrome after this many pages
+    "driver_max_rss_mb": 1500,  # ...or once it grows past this much memory
+    "http_concurrency": 20,
+    "cdp_tabs": 20,
+    "min_available_mb": 1024,  # System memory below which no browser is lent out
+    "scroll_idle_timeout": SCROLL_IDLE_TIMEOUT,  # First wait for new listings after a scroll
+    "scroll_max_idle_timeout": SCROLL_MAX_IDLE_TIMEOUT,
+    "max_no_change": MAX_NO_CHANGE,
+    "max_scroll_iterations": MAX_SCROLL_ITERATIONS,
+    "sink_batch_size": SINK_BATCH_SIZE,  # Rows per flush to each output file
+    "known_pages_to_stop": KNOWN_PAGES_TO_STOP,  # With known places: stop a feed after this many scrolls of only those
+    "feed_top_n": None,  # Stop every feed (or tile) after this many listings; None scrolls to the end
+}
+
+DEFAULT_OPTIONS = {
+    "collection_profile": "full",  # Browser profile per phase: "full" or "lean"
+    "detail_profile": "lean",
+    "scrape_details": True,  # False keeps feed-card fields only
+    "listing_store": "listings_cache.sqlite",  # None disables the on-disk listing cache
+    "listing_ttl_hours": 24 * 7,
+    "refresh": False,  # Reopen detail pages only for new places or changed feed cards
+    "changelog": "{area}_changelog.csv",
+    "journal": "{area}_run.journal.jsonl",  # None disables the journal (and --resume)
+    "known_places": None,  # Previous outputs ({area} allowed) whose places count as known, for quick re-sweeps
+    "known_from_store": False,  # Every place in the listing store counts as known too
+    "clean_output": None,  # e.g. "all_places.csv": every area merged, normalized and fuzzily deduplicated
+    "report_prefix": "maps_job",  # <prefix>_metrics.json and resource profiles for the whole job
+    "tile_grid": [2, 2],  # Starting grid over an area's bbox; capped tiles are split in four
+    "tile_max_depth": 3,
+    "tile_workers": 3,
+    "driver_offline": False,
+    "use_warm_pool": True,
+    "monitor_resources": True,
+    "metrics_port": 9108,  # None disables the /metrics endpoint
+    "event_log": None,
+    "progress_level": "INFO",  # Console lines per query and listing; DEBUG adds every scroll, None is quiet
+}
+
+
+def area_slug(name):
+    return re.sub(r"\W+", "_", name.lower()).strip("_")
+
+
+def normalize_areas(areas):
+    """Areas as {"name", "bbox"} dicts; a plain string is an area searched by name only."""
+    out = []
+    for area in areas:
+        if isinstance(area, str):
+            area = {"name": area}
+        unknown = set(area) - {"name", "bbox"}
+        if unknown or not area.get("name"):
+            raise ValueError(f"bad area {area!r}: needs a name, may have a bbox")
+        bbox = area.get("bbox")
+        out.append({"name": area["name"], "bbox": tuple(bbox) if bbox else None})
+    return out
+
+
+def merged(defaults, overrides, what):
+    unknown = set(overrides or {}) - set(defaults)
+    if unknown:
+        raise ValueError(f"unknown {what}: {sorted(unknown)}")
+    return dict(defaults, **(overrides or {}))
+
+
+# ======================================
+# SCROLL + GET LINKS
+# ======================================
+def get_links_for_query(query, category, browser_pool, limiter, tile=None, limits=DEFAULT_LIMITS, known_ids=None):
+    """
+    Returns tuple: (category, cards_list) - each card carries its "href"
+    """
+    stop = None
+    if known_ids is not None or limits["feed_top_n"]:
+        stop = FeedStop(known_ids, limits["known_pages_to_stop"], limits["feed_top_n"])
+    log_progress("\n🔍 Searching: %s", query)
+
+    try:
+        with limiter.slot() as page, browser_pool.driver(label=query) as driver:
+            wait = WebDriverWait(driver, 15)
+            with METRICS.timer("page_load_seconds", kind="feed"):
+                driver.get(search_url(query, tile))
+            page.check(driver)
+
+            with METRICS.timer("feed_container_wait_seconds"):
+                results_container = wait.until(
+                    EC.presence_of_element_located((By.XPATH, "//div[contains(@aria-label, 'Results for')]"))
+                )
+            log_progress("✅ Container loaded")
+
+            log_progress("📜 Scrolling to load all listings...")
+            with METRICS.timer("feed_scroll_seconds"):
+                cards, scroll_iterations = scroll_feed(
+                    driver, results_container,
+                    idle_timeout=limits["scroll_idle_timeout"],
+                    max_idle_timeout=limits["scroll_max_idle_timeout"],
+                    max_no_change=limits["max_no_change"],
+                    max_iterations=limits["max_scroll_iterations"],
+                    stop=stop
+                )
+            METRICS.inc("scroll_iterations_total", scroll_iterations)
+            if stop and stop.reason:
+                METRICS.inc("feeds_stopped_early_total")
+            if not cards and tile is None:
+                page.flag("empty")  # An empty tile can be genuine; an empty area search isn't
+
+        log_progress("✅ Found %d unique listings for '%s'", len(cards), query)
+        METRICS.inc("pages_total", kind="feed")
+        log_event("feed_collected", query=query, cards=len(cards), scroll_iterations=scroll_iterations)
+
+    except Exception as e:
+        log_progress("❌ Error: %s", e, level=logging.WARNING)
+        METRICS.inc("errors_total", stage="feed", type=type(e).__name__)
+        log_event("feed_failed", logging.WARNING, query=query, error=str(e))
+        raise  # The caller decides whether the query is worth another attempt
+
+    return (category, cards)
+
+
+def get_links_for_area(category, area, browser_pool, limiter, limits=DEFAULT_LIMITS, options=DEFAULT_OPTIONS,
+                       known_ids=None):
+    """
+    Returns tuple: (category, cards_list, failed_tiles), over the area's bbox tile by
+    tile when it has one; failed_tiles > 0 means the list is partial
+    """
+    if area["bbox"] is None:
+        cards = get_links_for_query(f"{category} in {area['name']}", category, browser_pool, limiter,
+                                    limits=limits, known_ids=known_ids)[1]
+        return (category, cards, 0)
+
+    # Each tile's viewport places the search, so the area name stays out of the query
+    cards, tile_stats = collect_tiled(
+        lambda tile: get_links_for_query(category, category, browser_pool, limiter, tile, limits, known_ids)[1],
+        area["bbox"],
+        grid_size=tuple(options["tile_grid"]), max_depth=options["tile_max_depth"],
+        workers=options["tile_workers"]
+    )
+    log_progress(f"🗺️ {category}: {len(cards)} unique listings from {tile_stats['tiles']} tiles "
+                 f"({tile_stats['split']} split at the feed cap, {tile_stats['capped_at_max_depth']} still capped, "
+                 f"{tile_stats['failed']} failed)")
+    return (category, cards, tile_stats["failed"])
+
+
+# ======================================
+# SCRAPE DETAILS FROM ONE LINK
+# ======================================
+def scrape_listing(link, category, browser_pool, limiter, stats_counter, stats_lock, card=None):
+    result = card_row(card) if card else {"listing_url": link}
+    result["search_query"] = category
+    started = time.perf_counter()
+
+    try:
+        with limiter.slot() as page, browser_pool.driver(label=link) as driver:
+            wait = WebDriverWait(driver, 10)
+            with METRICS.timer("page_load_seconds", kind="detail"):
+                driver.get(link)
+            page.check(driver)
+            with METRICS.timer("detail_h1_wait_seconds"):
+                try:
+                    wait.until(EC.presence_of_element_located((By.XPATH, "//h1[contains(@class, 'DUwDvf')]")))
+                except TimeoutException:
+                    if place_missing(driver):
+                        raise NoSuchPlace(f"no such place: {link}")
+                    raise
+
+            with METRICS.timer("detail_extract_seconds"):
+                details = extract_fields(driver)
+        merge_fields(result, details)
+        METRICS.inc("pages_total", kind="detail")
+        METRICS.observe("listing_seconds", time.perf_counter() - started)
+        log_event("listing_scraped", link=link, seconds=round(time.perf_counter() - started, 3))
+
+        # Update stats
+        with stats_lock:
+            stats_counter['completed'] += 1
+            METRICS.set("detail_queue_depth", stats_counter['total'] - stats_counter['completed'])
+            stats_counter['successful'] += 1
+            completed, total = stats_counter['completed'], stats_counter['total']
+        log_progress("✅ [%d/%d] %s", completed, total, result.get("name", "Unknown")[:40])
+
+    except Exception as e:
+        result["error"] = str(e)
+        result["error_kind"] = classify_failure(e)
+        METRICS.inc("errors_total", stage="detail", type=type(e).__name__)
+        log_event("listing_failed", logging.WARNING, link=link, kind=result["error_kind"], error=str(e))
+        # Counted as completed (or failed) once the retry queue settles it
+
+    return result
+
+
+# ======================================
+# SHARED RUNTIME
+# ======================================
+class JobRuntime:
+    """Browsers, pacing, listing cache and monitoring, started once and shared by every area of a job."""
+
+    def __init__(self, limits, options, tiled=False, engine="selenium"):
+        self.limits = limits
+        self.options = options
+        if options["event_log"]:
+            configure_logging(options["event_log"])
+        self.metrics_server = METRICS.serve(options["metrics_port"]) if options["metrics_port"] else None
+        pool_args = dict(
+            acquire_timeout=limits["acquire_timeout"],
+            max_pages=limits["driver_max_pages"],
+            max_rss_mb=limits["driver_max_rss_mb"],
+            tabs_per_browser=limits["tabs_per_browser"],
+            offline_driver=options["driver_offline"],
+            use_warm=options["use_warm_pool"],
+        )
+        self.browser_pool = BrowserPool(
+            size=limits["pool_size"], min_size=limits["pool_min_size"], profile=options["detail_profile"],
+            **pool_args
+        )
+        # Feed collection gets its own browsers only when it wants a different profile
+        self.feed_pool = self.browser_pool
+        if options["collection_profile"] != options["detail_profile"]:
+            self.feed_pool = BrowserPool(
+                size=limits["collection_threads"] * (options["tile_workers"] if tiled else 1),
+                profile=options["collection_profile"], **pool_args
+            )
+        self.monitor = None
+        if options["monitor_resources"]:
+            self.monitor = ResourceMonitor(min_available_mb=limits["min_available_mb"])
+            self.monitor.watch(self.browser_pool)
+            if self.feed_pool is not self.browser_pool:
+                self.monitor.watch(self.feed_pool)
+            self.monitor.start()
+        # One limiter paces page loads for both phases and every area
+        self.limiter = AdaptiveLimiter(rate=limits["page_rate"], max_rate=limits["max_page_rate"],
+                                       max_concurrency=limits["max_concurrency"])
+        self.listing_store = None
+        if options["listing_store"]:
+            self.listing_store = ListingStore(options["listing_store"], ttl_hours=options["listing_ttl_hours"])
+        # One keep-alive session for every HTTP batch, paced by the same limiter
+        self.http = HttpClient(limits["http_concurrency"], limiter=self.limiter) if engine == "http" else None
+
+    def close(self):
+        """Returns dict: report file name -> path."""
+        print("\n🧹 Closing browsers...")
+        self.browser_pool.close_all()
+        if self.feed_pool is not self.browser_pool:
+            self.feed_pool.close_all()
+        if self.listing_store:
+            self.listing_store.close()
+        if self.http:
+            self.http.close()
+
+        prefix = self.options["report_prefix"]
+        reports = {"metrics": prefix + "_metrics.json"}
+        METRICS.write_summary(reports["metrics"])
+        if self.monitor:
+            self.monitor.close()
+            reports["resources"], reports["leases"] = self.monitor.export(prefix)
+        if self.metrics_server:
+            METRICS.stop(self.metrics_server)
+        return reports
+
+
+# ======================================
+# ONE AREA - PROGRESSIVE SCRAPING
+# ======================================
+def area_known_places(area, options, listing_store=None):
+    """
+    Returns set or BloomFilter: the place ids the area's earlier outputs (and,
+    with known_from_store, the listing store) already hold, or None when
+    neither option is set.
+    """
+    if not (options["known_places"] or options["known_from_store"]):
+        return None
+    known_ids = load_known_places(
+        [path.format(area=area_slug(area["name"])) for path in options["known_places"] or []],
+        store=listing_store if options["known_from_store"] else None
+    )
+    print(f"🗂️ {len(known_ids)} places already known in {area['name']}")
+    return known_ids
+
+
+def run_area(runtime, area, categories, sink_paths, engine="selenium", resume=False):
+    """
+    Collects every category in one area and scrapes places as their links come
+    in, on the runtime's browsers.
+    Returns dict: the area's counts and output paths.
+    """
+    options, limits = runtime.options, runtime.limits
+    browser_pool, feed_pool, limiter = runtime.browser_pool, runtime.feed_pool, runtime.limiter
+    listing_store = runtime.listing_store
+    slug = area_slug(area["name"])
+    start_time = time.time()
+
+    refresh = None
+    if options["refresh"] and listing_store:
+        refresh = RefreshTracker(listing_store, options["changelog"].format(area=slug))
+
+    # Places from earlier runs; feeds stop once a few scrolls bring nothing else
+    known_ids = area_known_places(area, options, listing_store)
+    # Early-stopped feeds can't tell which places have gone from a query
+    full_feeds = known_ids is None and not limits["feed_top_n"]
+
+    # Stream rows to disk as they finish
+    sinks = [ResultSink(path, batch_size=limits["sink_batch_size"]) for path in sink_paths]
+    known_places = {}  # place id -> every category that found it (shared with its card)
+
+    def put(res):
+        for sink in sinks:
+            sink.put(res)
+
+    # Stats tracking
+    stats_counter = {'completed': 0, 'total': 0, 'successful': 0, 'failed': 0}
+    stats_lock = threading.Lock()
+
+    # Journal of pipeline state, replayed by resume
+    journal_path = options["journal"].format(area=slug) if options["journal"] else None
+    resume_state = load_journal(journal_path) if resume and journal_path and os.path.exists(journal_path) else None
+    journal = PipelineJournal(journal_path, resume=resume_state is not None) if journal_path else None
+
+    def claim_new_cards(category, cards):
+        """Cards for places not seen under any category yet; repeats only record the category."""
+        new_cards = []
+        for card in cards:
+            pid = place_id(card["href"])
+            if pid in known_places:
+                if category not in known_places[pid]:
+                    known_places[pid].append(category)
+                continue
+            known_places[pid] = [category]
+            new_cards.append(dict(card, place_id=pid, categories=known_places[pid]))
+        return new_cards
+
+    def emit(res):
+        # Categories found after the scrape started still make it into the row
+        res["matched_categories"] = "; ".join(known_places.get(res.get("place_id"), []))
+        put(res)
+        if journal:
+            journal.listing_done(res)
+
+    def dispatch_cards(category, new_cards):
+        """Turns freshly discovered cards into results or scraping futures."""
+        if not options["scrape_details"]:
+            for card in new_cards:
+                res = card_row(card)
+                res["search_query"] = category
+                put(res)
+            return
+
+        # Update total count
+        with stats_lock:
+            stats_counter['total'] += len(new_cards)
+
+        if refresh:
+            new_cards, unchanged = refresh.triage(new_cards)
+            for res in unchanged:
+                res["search_query"] = category
+                emit(res)
+            with stats_lock:
+                stats_counter['completed'] += len(unchanged)
+                stats_counter['successful'] += len(unchanged)
+            log_progress(f"   🔎 {len(unchanged)} unchanged since the last run, {len(new_cards)} new or changed")
+        elif listing_store:
+            cached = listing_store.fresh([card["href"] for card in new_cards])
+            for card in new_cards:
+                if card["href"] in cached:
+                    res = cached[card["href"]]
+                    res["search_query"] = category
+                    res["place_id"] = card["place_id"]
+                    emit(res)
+            with stats_lock:
+                stats_counter['completed'] += len(cached)
+                stats_counter['successful'] += len(cached)
+            new_cards = [card for card in new_cards if card["href"] not in cached]
+            log_progress(f"   💾 {len(cached)} fresh in cache, skipping their detail pages")
+
+        if engine == "http" and new_cards:
+            # A worker runs the batch, so this loop keeps dispatching other categories meanwhile
+            unsettled.add()
+            future = scheduler.submit("scrape", runtime.http.scrape_cards, new_cards)
+            future.add_done_callback(lambda f: settle_http(category, new_cards, f))
+            return
+
+        start_details(category, new_cards)
+
+    def start_details(category, cards):
+        # Immediately submit scraping tasks for new links
+        log_progress(f"   🚀 Starting scraping for {len(cards)} new links...")
+        unsettled.add(len(cards))
+        for card in cards:
+            start_detail((category, card), 1)
+
+    def settle_http(category, cards, future):
+        """Records an HTTP batch's rows and hands the cards it couldn't parse to Selenium."""
+        try:
+            try:
+                rows, fallback = future.result()
+            except Exception as e:
+                log_progress("⚠️ HTTP batch for %s failed (%s), all %d cards go to Selenium", category, e,
+                             len(cards), level=logging.WARNING)
+                rows, fallback = [], cards
+            for res in rows:
+                res["search_query"] = category
+                emit(res)
+                if listing_store:
+                    listing_store.save(res)
+                if refresh:
+                    refresh.scraped(res)
+            with stats_lock:
+                stats_counter['completed'] += len(rows)
+                stats_counter['successful'] += len(rows)
+            log_progress(f"   ⚡ {len(rows)} parsed over HTTP, {len(fallback)} left for Selenium")
+            start_details(category, fallback)
+        finally:
+            unsettled.done()  # The batch itself; its fallback cards were counted on their own
+
+    def start_detail(task, attempt):
+        category, card = task
+        future = scheduler.submit(
+            "scrape", scrape_listing, card["href"], category, browser_pool, limiter,
+            stats_counter, stats_lock, card, attempt=attempt
+        )
+        future.add_done_callback(lambda f: settle_detail(task, attempt, f))
+
+    def settle_detail(task, attempt, future):
+        """Recorded as each page finishes, so a crash keeps what was scraped; failures may go round again."""
+        category, card = task
+        retried = False
+        try:
+            try:
+                res = future.result()
+            except Exception as e:
+                # scrape_listing turns page errors into rows; anything else becomes one here
+                kind = classify_failure(e)
+                res = dict(card_row(card), error=str(e)[:300], error_kind=kind, search_query=category)
+                log_event("listing_failed", logging.WARNING, link=card["href"], kind=kind, error=str(e))
+            if res.get("error"):
+                kind = res["error_kind"]
+                if detail_retries.offer(task, kind, res["error"], attempt, "detail", card["href"]):
+                    METRICS.inc("retries_total", stage="detail", kind=kind)
+                    retried = True
+                    return
+                with stats_lock:
+                    stats_counter['completed'] += 1
+                    METRICS.set("detail_queue_depth", stats_counter['total'] - stats_counter['completed'])
+                    stats_counter['failed'] += 1
+                    completed, total = stats_counter['completed'], stats_counter['total']
+                log_progress("⚠️ [%d/%d] Gave up after %d attempts (%s)", completed, total, attempt, kind,
+                             level=logging.WARNING)
+            emit(res)
+            if listing_store:
+                listing_store.save(res)
+            if refresh:
+                refresh.scraped(res)
+        finally:
+            # A retry stays outstanding until its next attempt settles
+            if not retried:
+                unsettled.done()
+
+    categories_to_collect = categories
+    if resume_state:
+        with stats_lock:
+            stats_counter['completed'] = stats_counter['successful'] = stats_counter['total'] = len(resume_state["rows"])
+        categories_to_collect = [cat for cat in categories if cat not in resume_state["categories"]]
+        print(f"\n⏯️ Resuming: {len(resume_state['categories'])} categories collected, "
+              f"{len(resume_state['rows'])} listings scraped, {len(resume_state['failed'])} to retry")
+
+    print("\n" + "="*60)
+    print(f"🔄 {area['name']}: scraping starts as links are collected")
+    print("="*60)
+
+    unsettled = Outstanding()  # Listings dispatched to Selenium and not yet scraped or given up
+
+    # One scheduler for both phases: free workers go to feed searches or detail
+    # pages by backlog, and retries queue behind first attempts of their kind
+    scheduler = TaskScheduler(limits["max_concurrency"], max_collect=limits["collection_threads"])
+    try:
+        detail_retries = RetryQueue(start_detail)
+
+        if resume_state:
+            # Everything discovered last time but not scraped, failures included
+            pending_by_category = {}
+            for category, cards in resume_state["categories"].items():
+                pending_by_category[category] = [
+                    card for card in claim_new_cards(category, cards)
+                    if card["href"] not in resume_state["rows"]
+                ]
+            for res in resume_state["rows"].values():
+                res["matched_categories"] = "; ".join(known_places.get(res.get("place_id"), []))
+                put(res)
+            for category, pending in pending_by_category.items():
+                if pending:
+                    log_progress(f"\n⏯️ {category}: {len(pending)} pending listings")
+                    dispatch_cards(category, pending)
+
+        # Start link collection
+        collected = queue.Queue()  # (category, attempt, future) as each collection finishes
+
+        def start_collection(category, attempt):
+            future = scheduler.submit("collect", get_links_for_area, category, area, feed_pool, limiter,
+                                      limits, options, known_ids, attempt=attempt)
+            future.add_done_callback(lambda f: collected.put((category, attempt, f)))
+
+        feed_retries = RetryQueue(start_collection)
+        for cat in categories_to_collect:
+            start_collection(cat, 1)
+
+        categories_processed = len(categories) - len(categories_to_collect)
+
+        # Process link collections as they complete
+        while categories_processed < len(categories):
+            category, attempt, future = collected.get()
+            try:
+                returned_category, cards, failed_tiles = future.result()
+            except Exception as e:
+                kind = classify_failure(e)
+                if feed_retries.offer(category, kind, e, attempt, "feed", category):
+                    METRICS.inc("retries_total", stage="feed", kind=kind)
+                    log_progress(f"\n🔁 {category}: {kind}, queued for another attempt")
+                    continue
+                returned_category, cards, failed_tiles = category, None, 0
+
+            categories_processed += 1
+            METRICS.set("categories_pending", len(categories) - categories_processed)
+            if cards is None:
+                log_progress(f"\n❌ [{categories_processed}/{len(categories)}] Gave up collecting {category} "
+                             f"after {attempt} attempts", level=logging.WARNING)
+                continue
+
+            try:
+                if journal:
+                    journal.category_collected(returned_category, cards)
+                if refresh:
+                    # A partial list would mark the places of failed tiles as removed
+                    refresh.query_collected(f"{returned_category} in {area['name']}", cards,
+                                            complete=full_feeds and not failed_tiles)
+
+                # Remove duplicates globally (by place id, not raw href) before scraping
+                new_cards = claim_new_cards(returned_category, cards)
+                duplicate_count = len(cards) - len(new_cards)
+
+                log_progress(f"\n✅ [{categories_processed}/{len(categories)}] {returned_category}")
+                log_progress(f"   📍 Found: {len(cards)} links | New: {len(new_cards)} | Duplicates: {duplicate_count}")
+
+                if new_cards:
+                    dispatch_cards(returned_category, new_cards)
+
+            except Exception as e:
+                log_progress(f"\n❌ [{categories_processed}/{len(categories)}] Error dispatching {category}: {e}",
+                             level=logging.WARNING)
+        feed_retries.close()
+
+        print(f"\n{'='*60}")
+        print(f"📊 Link collection complete!")
+        print(f"   Total unique links to scrape: {stats_counter['total']}")
+        print(f"   Waiting for all scraping tasks to complete...")
+        print(f"{'='*60}\n")
+
+        # Wait for every listing to be scraped or given up, retries included
+        unsettled.wait()
+        detail_retries.close()
+    finally:
+        scheduler.close()
+    usage = scheduler.summary()
+    print(f"🧮 Workers {usage['utilization']:.0%} busy, {usage['tasks']['collect']} searches at "
+          f"{usage['cost_seconds']['collect']}s, {usage['tasks']['scrape']} pages at {usage['cost_seconds']['scrape']}s")
+
+    changes = refresh.close() if refresh else None
+    if journal:
+        journal.close()
+
+    # Flush whatever is still buffered; dedup and failed-row filtering happened on the way
+    sink_stats = [sink.close() for sink in sinks][0]
+
+    prefix = os.path.splitext(sink_paths[0])[0]
+    # Rows stream out as they finish, so a place can match more categories after
+    # its row was written; the complete mapping goes next to the output
+    categories_path = prefix + "_categories.csv"
+    with open(categories_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["place_id", "matched_categories"])
+        for pid, matched in known_places.items():
+            writer.writerow([pid, "; ".join(matched)])
+
+    # Everything given up on, with why, so it can be rerun on its own
+    dead_letters_path = prefix + "_dead_letters.csv"
+    given_up = write_dead_letters(dead_letters_path, feed_retries, detail_retries)
+
+    return {
+        "area": area["name"],
+        "received": sink_stats["received"],
+        "written": sink_stats["written"],
+        "successful": stats_counter["successful"],
+        "failed": stats_counter["failed"],
+        "given_up": given_up,
+        "changes": changes,
+        "seconds": round(time.time() - start_time, 1),
+        "outputs": list(sink_paths),
+        "dead_letters": dead_letters_path,
+    }
+
+
+# ======================================
+# JOBS
+# ======================================
+def run_job(areas, categories, engine="selenium", sinks=None, limits=None, options=None, resume=False):
+    """
+    Runs every category in every area, one area after the other, on one set of
+    browsers. areas are names or {"name", "bbox"} dicts; sinks are output path
+    templates where {area} becomes the area's slug; limits and options
+    override DEFAULT_LIMITS and DEFAULT_OPTIONS.
+    Returns list: one result dict per area.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, use one of {list(ENGINES)}")
+    areas = normalize_areas(areas)
+    limits = merged(DEFAULT_LIMITS, limits, "limits")
+    options = merged(DEFAULT_OPTIONS, options, "options")
+    configure_progress(options["progress_level"])
+    sinks = sinks or DEFAULT_SINKS
+    if not categories:
+        raise ValueError("a job needs at least one category")
+
+    start_time = time.time()
+    print(f"🚀 Job: {len(areas)} areas × {len(categories)} categories, {engine} engine")
+    print("="*60)
+
+    if engine == "cdp":
+        results = asyncio.run(run_job_cdp(areas, categories, sinks, limits, options, resume))
+    else:
+        runtime = JobRuntime(limits, options, tiled=any(area["bbox"] for area in areas), engine=engine)
+        results = []
+        try:
+            for i, area in enumerate(areas, 1):
+                print(f"\n📍 Area {i}/{len(areas)}: {area['name']}")
+                paths = [path.format(area=area_slug(area["name"])) for path in sinks]
+                results.append(run_area(runtime, area, categories, paths, engine, resume))
+        finally:
+            reports = runtime.close()
+        print(f"🚦 Pacing: {runtime.limiter.summary()}")
+        print(f"📈 Metrics: {reports['metrics']}")
+        if runtime.monitor:
+            usage = runtime.monitor.summary()
+            print(f"🧠 Browsers peaked at {usage['peak_browsers_rss_mb']} MB, system low {usage['min_available_mb']} MB free, "
+                  f"paused {usage['paused_seconds']}s (profile in {reports['resources']})")
+
+    clean_stats = None
+    if options["clean_output"]:
+        import maps_clean  # pandas/NumPy only once there is something to clean
+
+        clean_stats = maps_clean.clean_files([result["outputs"][0] for result in results], options["clean_output"])
+
+    elapsed = time.time() - start_time
+    print("\n" + "="*60)
+    print(f"✅ JOB COMPLETE in {elapsed:.1f}s ({elapsed/60:.1f} minutes)")
+    for result in results:
+        line = (f"   • {result['area']}: {result['written']} unique listings, {result['failed']} failed, "
+                f"{result['given_up']} given up → {', '.join(result['outputs'])}")
+        if result.get("changes"):
+            changes = result["changes"]
+            line += f" | {changes['added']} added, {changes['modified']} modified, {changes['removed']} removed"
+        print(line)
+    if clean_stats:
+        print(f"🧽 Cleaned: {clean_stats['rows_in']} rows → {clean_stats['rows_out']} places "
+              f"({clean_stats['merged']} merged as duplicates) → {options['clean_output']}")
+    print("="*60)
+    return results
+
+
+CDP_UNSUPPORTED_OPTIONS = ["refresh"]  # Options the cdp engine has no equivalent for
+
+
+async def run_job_cdp(areas, categories, sinks, limits, options, resume=False):
+    """
+    The cdp engine's run_job: every area on one Chrome driven over the DevTools protocol.
+    The listing cache, journal, scrape_details and both profiles carry over; resume and
+    refresh do not and raise ValueError rather than being ignored.
+    """
+    import maps_cdp
+
+    if resume:
+        raise ValueError("the cdp engine cannot resume a run, use the selenium or http engine")
+    unsupported = [key for key in CDP_UNSUPPORTED_OPTIONS if options[key]]
+    if unsupported:
+        raise ValueError(f"the cdp engine does not support options {unsupported}")
+
+    # Chrome's launch flags follow the detail profile; feeds switch request blocking per tab
+    browser = await maps_cdp.CdpBrowser(options["detail_profile"]).launch()
+    listing_store = None
+    if options["listing_store"]:
+        listing_store = ListingStore(options["listing_store"], ttl_hours=options["listing_ttl_hours"])
+    results = []
+    try:
+        for i, area in enumerate(areas, 1):
+            print(f"\n📍 Area {i}/{len(areas)}: {area['name']}")
+            if area["bbox"]:
+                print(f"⚠️ The cdp engine searches by name, {area['name']}'s bbox is ignored")
+            start_time = time.time()
+            slug = area_slug(area["name"])
+            paths = [path.format(area=slug) for path in sinks]
+            area_sinks = [ResultSink(path, batch_size=limits["sink_batch_size"]) for path in paths]
+            journal_path = options["journal"].format(area=slug) if options["journal"] else None
+            journal = PipelineJournal(journal_path) if journal_path else None
+            cached_hrefs = set()
+
+            def cached_rows(cards):
+                cached = listing_store.fresh([card["href"] for card in cards])
+                cached_hrefs.update(cached)
+                return cached
+
+            def on_collected(category, cards):
+                if journal:
+                    journal.category_collected(category, cards)
+
+            def put(row):
+                if journal:
+                    journal.listing_done(row)
+                # Cached rows are already stored (saving them again would reset their age),
+                # and feed-card rows must not pass for scraped listings on the next run
+                if listing_store and options["scrape_details"] and row["listing_url"] not in cached_hrefs:
+                    listing_store.save(row)
+                for sink in area_sinks:
+                    sink.put(row)
+
+            try:
+                _, failures = await maps_cdp.run_pipeline(
+                    categories, area["name"], put, tabs=limits["cdp_tabs"], browser=browser,
+                    profile=options["detail_profile"], collection_profile=options["collection_profile"],
+                    scrape_details=options["scrape_details"],
+                    cached_rows=cached_rows if listing_store else None, on_collected=on_collected,
+                    known_ids=area_known_places(area, options, listing_store),
+                    known_pages=limits["known_pages_to_stop"], top_n=limits["feed_top_n"]
+                )
+            finally:
+                sink_stats = [sink.close() for sink in area_sinks][0]
+                if journal:
+                    journal.close()
+
+            dead_letters_path = os.path.splitext(paths[0])[0] + "_dead_letters.csv"
+            given_up = write_dead_letter_rows(dead_letters_path, failures)
+            results.append({
+                "area": area["name"],
+                "received": sink_stats["received"],
+                "written": sink_stats["written"],
+                "successful": sink_stats["written"],
+                "failed": sum(1 for failure in failures if failure["stage"] == "detail"),
+                "given_up": given_up,
+                "changes": None,
+                "seconds": round(time.time() - start_time, 1),
+                "outputs": paths,
+                "dead_letters": dead_letters_path,
+            })
+    finally:
+        await browser.close()
+        if listing_store:
+            listing_store.close()
+    return results
+
+
+JOB_KEYS = {"areas", "categories", "engine", "sinks", "limits", "options"}
+
+
+def load_job(path):
+    """
+    Reads a job file (.json, or .yaml/.yml with PyYAML installed).
+    Returns dict: run_job keyword arguments.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuntimeError("YAML job files need PyYAML (pip install pyyaml), or use JSON")
+            job = yaml.safe_load(f)
+        else:
+            job = json.load(f)
+    if not isinstance(job, dict):
+        raise ValueError(f"{path}: a job file holds one mapping")
+    unknown = set(job) - JOB_KEYS
+    if unknown:
+        raise ValueError(f"{path}: unknown keys {sorted(unknown)}, expected some of {sorted(JOB_KEYS)}")
+    if not job.get("areas") or not job.get("categories"):
+        raise ValueError(f"{path}: a job needs areas and categories")
+    return job
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a Google Maps scraping job from a JSON or YAML file",
+        epilog='Job file keys: areas (names or {"name", "bbox": [south, west, north, east]}), categories, '
+               'engine (selenium, http, cdp), sinks (paths with {area}), limits, options.'
+    )
+    parser.add_argument("job", nargs="+", help="job files, run one after the other on the same process")
+    parser.add_argument("--resume", action="store_true", help="continue each area from its journal")
+    args = parser.parse_args()
+
+    for job_path in args.job:
+        run_job(resume=args.resume, **load_job(job_path))
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+
+
+# ======================================
+# PIPELINE JOURNAL
+# ======================================
+JOURNAL_FLUSH_EVERY = 200  # Events buffered before the writer is woken early
+JOURNAL_FLUSH_INTERVAL = 2.0  # Seconds between background flushes
+
+
+class PipelineJournal:
+    """
+    Append-only JSONL log of the progressive pipeline: categories collected
+    (with their cards) and listings scraped or failed. Callers only append to
+    an in-memory buffer; a background thread writes and fsyncs it in batches.
+    """
+
+    def __init__(self, path, resume=False, flush_every=JOURNAL_FLUSH_EVERY,
+                 flush_interval=JOURNAL_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.error = None  # First write failure, raised to the next caller
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume and self.file.tell() and not _ends_with_newline(path):
+            self.file.write("\n")  # Seal a line torn by the crash before appending
+        self.writer = threading.Thread(target=self._run, daemon=True)
+        self.writer.start()
+
+    # ---------- events ----------
+    def _append(self, event):
+        self._raise_error()
+        with self.lock:
+            self.buffer.append(event)
+            if len(self.buffer) >= self.flush_every:
+                self.wake.set()
+
+    def category_collected(self, category, cards):
+        self._append({"event": "collected", "category": category, "cards": cards})
+
+    def listing_done(self, result):
+        if result.get("error"):
+            self._append({"event": "failed", "link": result["listing_url"], "error": result["error"]})
+        else:
+            self._append({"event": "scraped", "row": result})
+
+    # ---------- writing ----------
+    def flush(self):
+        with self.lock:
+            events, self.buffer = self.buffer, []
+        if not events:
+            return
+        self.file.write("".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _run(self):
+        while not self.stopped:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.error = e  # A journal that stops recording would make --resume replay stale state
+                return
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise RuntimeError(f"journal {self.path} stopped recording: {self.error}") from self.error
+
+    def close(self):
+        self.stopped = True
+        self.wake.set()
+        self.writer.join()
+        try:
+            self._raise_error()
+            self.flush()
+        finally:
+            self.file.close()
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def load_journal(path):
+    """
+    Replays a journal into the state a resumed run needs.
+    Returns dict: categories (category -> cards), rows (link -> scraped row)
+    and failed (link -> last error). A torn last line from a crash is ignored.
+    """
+    state = {"categories": {}, "rows": {}, "failed": {}}
+    if not os.path.exists(path):
+        return state
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event["event"] == "collected":
+                state["categories"][event["category"]] = event["cards"]
+            elif event["event"] == "scraped":
+                link = event["row"]["listing_url"]
+                state["rows"][link] = event["row"]
+                state["failed"].pop(link, None)
+            elif event["event"] == "failed" and event["link"] not in state["rows"]:
+                state["failed"][event["link"]] = event["error"]
+    return state
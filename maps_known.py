@@ -0,0 +1,132 @@
+import csv
+import hashlib
+import json
+import math
+import os
+
+from maps_ids import place_id
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet outputs need pyarrow; CSV and JSONL don't
+    pq = None
+
+
+# ======================================
+# KNOWN PLACE INDEX DEFAULTS
+# ======================================
+BLOOM_ABOVE = 1_000_000  # Above this many ids a Bloom filter replaces the set
+BLOOM_ERROR_RATE = 0.001  # A false positive only counts one new place as known
+
+
+class BloomFilter:
+    """Fixed-size set of strings with no false negatives and about error_rate false positives."""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+
+# ======================================
+# LOADING
+# ======================================
+def output_place_ids(path):
+    """Place ids in a previous output (.csv, .jsonl or .parquet), from place_id or else listing_url."""
+    def row_id(row):
+        if row.get("place_id"):
+            return row["place_id"]
+        return place_id(row["listing_url"]) if row.get("listing_url") else None
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                yield row_id(row)
+    elif ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield row_id(json.loads(line))
+    elif ext == ".parquet":
+        if pq is None:
+            raise RuntimeError("reading parquet outputs needs pyarrow (pip install pyarrow)")
+        table = pq.read_table(path)
+        columns = [col for col in ("place_id", "listing_url") if col in table.column_names]
+        for row in table.select(columns).to_pylist():
+            yield row_id(row)
+    else:
+        raise ValueError(f"unsupported output format {ext!r}, use .csv, .jsonl or .parquet")
+
+
+def output_row_count(path):
+    """Rows in a previous output without parsing them; an upper bound on its place ids."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        if pq is None:
+            raise RuntimeError("reading parquet outputs needs pyarrow (pip install pyarrow)")
+        return pq.ParquetFile(path).metadata.num_rows
+    with open(path, "rb") as f:
+        lines = sum(1 for line in f if line.strip())
+    return lines - 1 if ext == ".csv" else lines  # Quoted newlines in a CSV only overcount
+
+
+def load_known_places(paths=(), store=None, bloom_above=BLOOM_ABOVE):
+    """
+    Every place id in the given previous outputs (missing files are skipped)
+    and, when passed, a ListingStore.
+    Returns set, or a BloomFilter once there are more than bloom_above ids.
+    """
+    found = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"⚠️ No previous output at {path}, nothing known from it")
+            continue
+        found.append(path)
+    paths = found
+
+    def all_ids():
+        for path in paths:
+            yield from output_place_ids(path)
+        if store is not None:
+            yield from store.place_ids()
+
+    ids = set()
+    sources = all_ids()
+    for pid in sources:
+        if pid:
+            ids.add(pid)
+        if len(ids) > bloom_above:
+            break
+    else:
+        return ids
+
+    # Past the threshold: size the filter for every row there is, then stream the rest straight into it
+    capacity = sum(output_row_count(path) for path in paths) + (store.count() if store is not None else 0)
+    bloom = BloomFilter(max(capacity, len(ids)))
+    for pid in ids:
+        bloom.add(pid)
+    ids = None
+    for pid in sources:
+        if pid and pid not in bloom:  # Keeps len() a count of distinct ids, give or take false positives
+            bloom.add(pid)
+    return bloom
@@ -0,0 +1,159 @@
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from contextlib import contextmanager
+import threading
+import time
+
+from maps_metrics import METRICS
+
+
+# ======================================
+# LIMITER DEFAULTS
+# ======================================
+PAGE_RATE = 1.0  # Page loads per second to start with, across every thread
+MIN_PAGE_RATE = 0.1
+MAX_PAGE_RATE = 5.0
+RATE_STEP = 0.05  # Added to the rate after every clean page
+BURST = 2  # Page loads allowed back to back after a quiet spell
+START_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 10
+BACKOFF_FACTOR = 0.5  # Rate and concurrency are multiplied by this on trouble
+BACKOFF_COOLDOWN = 5.0  # Trouble within this many seconds of a back-off is the same episode
+BLOCK_PAUSE = 30.0  # Nothing starts for this long after a consent page or captcha
+
+BLOCK_REASONS = {"consent", "captcha"}
+
+
+class PageBlocked(Exception):
+    pass
+
+
+# ======================================
+# PAGE OUTCOME
+# ======================================
+class PageOutcome:
+    """What one page load told the limiter; reason stays None for a clean page."""
+
+    def __init__(self):
+        self.reason = None
+
+    def flag(self, reason):
+        if self.reason is None:
+            self.reason = reason
+
+    def check(self, driver):
+        """Flags and raises PageBlocked when Google answered with a consent page or captcha."""
+        url = driver.current_url
+        if "consent.google." in url:
+            self.flag("consent")
+        elif "/sorry/" in url or driver.find_elements(By.CSS_SELECTOR, "iframe[src*='recaptcha'], #captcha-form"):
+            self.flag("captcha")
+        if self.reason in BLOCK_REASONS:
+            raise PageBlocked(f"blocked by {self.reason} page")
+
+
+# ======================================
+# ADAPTIVE LIMITER
+# ======================================
+class AdaptiveLimiter:
+    """
+    Token bucket for page loads plus a cap on pages in flight, both tuned AIMD
+    style: every clean page nudges the rate up (and concurrency up by one per
+    window of clean pages); a timeout, empty feed, consent page or captcha
+    halves both, once per cooldown. Share one instance between both phases.
+    """
+
+    def __init__(self, rate=PAGE_RATE, min_rate=MIN_PAGE_RATE, max_rate=MAX_PAGE_RATE,
+                 concurrency=START_CONCURRENCY, min_concurrency=MIN_CONCURRENCY,
+                 max_concurrency=MAX_CONCURRENCY, burst=BURST, cooldown=BACKOFF_COOLDOWN,
+                 block_pause=BLOCK_PAUSE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = min(concurrency, max_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.burst = burst
+        self.cooldown = cooldown
+        self.block_pause = block_pause
+
+        self.cond = threading.Condition()
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.clean_streak = 0
+        self.backed_off_at = float("-inf")
+        self.paused_until = 0.0
+        self.stats = {"clean": 0, "backoffs": 0}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def acquire(self):
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    timeout = self.paused_until - now
+                elif self.in_flight >= self.concurrency:
+                    timeout = None  # A release wakes us
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                else:
+                    timeout = (1 - self.tokens) / self.rate
+                self.cond.wait(timeout)
+
+    def release(self, reason=None):
+        with self.cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if reason is None:
+                self.stats["clean"] += 1
+                self.rate = min(self.max_rate, self.rate + RATE_STEP)
+                self.clean_streak += 1
+                if self.clean_streak >= self.concurrency:
+                    self.clean_streak = 0
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            else:
+                self.stats[reason] = self.stats.get(reason, 0) + 1
+                self.clean_streak = 0
+                if now - self.backed_off_at >= self.cooldown:
+                    self.backed_off_at = now
+                    self.stats["backoffs"] += 1
+                    self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+                    self.concurrency = max(self.min_concurrency, int(self.concurrency * BACKOFF_FACTOR))
+                    self.tokens = min(self.tokens, 0.0)
+                if reason in BLOCK_REASONS:
+                    self.paused_until = max(self.paused_until, now + self.block_pause)
+            self.cond.notify_all()
+            METRICS.set("limiter_rate", round(self.rate, 3))
+            METRICS.set("limiter_concurrency", self.concurrency)
+            METRICS.set("pages_in_flight", self.in_flight)
+            if reason is not None:
+                METRICS.inc("page_trouble_total", reason=reason)
+
+    @contextmanager
+    def slot(self):
+        """
+        Holds one page load's turn. Flag trouble on the yielded PageOutcome;
+        a Selenium timeout escaping the block counts as trouble too.
+        """
+        with METRICS.timer("limiter_wait_seconds"):
+            self.acquire()
+        page = PageOutcome()
+        try:
+            yield page
+        except TimeoutException:
+            page.flag("timeout")
+            raise
+        finally:
+            self.release(page.reason)
+
+    def summary(self):
+        with self.cond:
+            return dict(self.stats, rate=round(self.rate, 2), concurrency=self.concurrency)
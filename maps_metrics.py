@@ -0,0 +1,263 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager, nullcontext
+import bisect
+import json
+import logging
+import sys
+import threading
+import time
+
+
+# ======================================
+# METRICS DEFAULTS
+# ======================================
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+QUANTILES = (0.5, 0.95, 0.99)
+METRICS_PORT = 9108
+METRIC_PREFIX = "maps_"
+
+
+# ======================================
+# HISTOGRAM
+# ======================================
+class Histogram:
+    """Fixed latency buckets, Prometheus style; quantiles are interpolated within a bucket."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, low + (high - low) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+    def snapshot(self):
+        snap = {"count": self.count, "sum": round(self.sum, 4), "max": round(self.max, 4)}
+        for q in QUANTILES:
+            value = self.quantile(q)
+            snap[f"p{int(q * 100)}"] = None if value is None else round(value, 4)
+        return snap
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _series(name, labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return METRIC_PREFIX + name
+    return METRIC_PREFIX + name + "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+# ======================================
+# METRICS REGISTRY
+# ======================================
+class Metrics:
+    """
+    Counters, gauges and latency histograms keyed by name plus labels.
+    With enabled=False every call returns straight away.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.started = time.time()
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    @contextmanager
+    def _timed(self, name, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timer(self, name, **labels):
+        """`with METRICS.timer("stage_seconds"):` records how long the block took."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name, labels)
+
+    # ---------- export ----------
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            for kind, store in (("counter", self.counters), ("gauge", self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(store.items()):
+                    if name not in typed:
+                        typed.add(name)
+                        lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+                    lines.append(f"{_series(name, labels)} {value}")
+            typed = set()
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+                cumulative = 0
+                for bound, n in zip(hist.buckets + ("+Inf",), hist.counts):
+                    cumulative += n
+                    lines.append(f"{_series(name + '_bucket', labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{_series(name + '_sum', labels)} {hist.sum}")
+                lines.append(f"{_series(name + '_count', labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        with self.lock:
+            return {
+                "elapsed_seconds": round(time.time() - self.started, 2),
+                "counters": {_series(name, labels): v for (name, labels), v in sorted(self.counters.items())},
+                "gauges": {_series(name, labels): v for (name, labels), v in sorted(self.gauges.items())},
+                "histograms": {
+                    _series(name, labels): hist.snapshot() for (name, labels), hist in sorted(self.histograms.items())
+                },
+            }
+
+    def write_summary(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        """Serves /metrics (Prometheus text) and /summary (JSON) from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/summary"):
+                    body, ctype = json.dumps(registry.summary()).encode(), "application/json"
+                else:
+                    body, ctype = registry.render_prometheus().encode(), "text/plain; version=0.0.4"
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"⚠️ Metrics endpoint not started on port {port}: {e}")
+            return None
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"📈 Metrics at http://{host}:{port}/metrics")
+        return server
+
+    @staticmethod
+    def stop(server):
+        """Stops a serve() endpoint and frees its port for the next run in this process."""
+        server.shutdown()
+        server.server_close()
+
+
+METRICS = Metrics()
+
+
+# ======================================
+# STRUCTURED EVENT LOG
+# ======================================
+# JSON-lines events next to the emoji console output. Off unless
+# configure_logging() is called, and log_event() checks the level before
+# building anything, so a disabled log costs one comparison per call.
+logger = logging.getLogger("maps")
+logger.addHandler(logging.NullHandler())
+logger.setLevel(logging.CRITICAL + 1)  # Silent until configure_logging()
+logger.propagate = False
+
+
+def configure_logging(path=None, level=logging.DEBUG):
+    """Sends events to path (stderr when None) at level and above."""
+    handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+def log_event(event, level=logging.DEBUG, **fields):
+    if not logger.isEnabledFor(level):
+        return
+    record = {"ts": round(time.time(), 3), "level": logging.getLevelName(level), "event": event}
+    record.update(fields)
+    logger.log(level, json.dumps(record, ensure_ascii=False, default=str))
+
+
+# ======================================
+# CONSOLE PROGRESS
+# ======================================
+# Per-query, per-listing and per-scroll lines go through this logger rather
+# than print(), so a level turns them down on the hot path: INFO shows a line
+# per query and listing, DEBUG adds one per scroll, None turns them all off.
+# Run-level banners stay plain prints. Messages take %-style args, formatted
+# only when the line is actually shown.
+PROGRESS_LEVEL = logging.INFO
+
+progress = logging.getLogger("maps.progress")
+progress.propagate = False  # Console lines stay out of the JSON event log
+_progress_handler = logging.StreamHandler(sys.stdout)
+_progress_handler.setFormatter(logging.Formatter("%(message)s"))
+progress.addHandler(_progress_handler)
+progress.setLevel(PROGRESS_LEVEL)
+
+
+def configure_progress(level=PROGRESS_LEVEL):
+    """Shows progress lines at level and above ("INFO", logging.DEBUG, ...); None turns them off."""
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    progress.setLevel(logging.CRITICAL + 1 if level is None else level)
+
+
+def log_progress(message, *args, level=logging.INFO):
+    if progress.isEnabledFor(level):
+        progress.log(level, message, *args)
@@ -0,0 +1,201 @@
+import csv
+import logging
+import shutil
+import tempfile
+import threading
+import time
+
+from maps_metrics import METRICS, log_event
+
+try:
+    import psutil
+except ImportError:  # Without psutil there is nothing to sample; the monitor stays idle
+    psutil = None
+
+
+# ======================================
+# RESOURCE MONITOR DEFAULTS
+# ======================================
+MONITOR_INTERVAL = 2.0  # Seconds between samples
+MIN_AVAILABLE_MB = 1024  # Stop lending browsers below this much free system memory...
+RESUME_AVAILABLE_MB = 1536  # ...until it is back above this
+MIN_TMP_FREE_MB = 512  # --disable-dev-shm-usage moves Chrome's shared memory to the temp dir
+
+MB = 1024 * 1024
+
+
+class ResourceMonitor:
+    """
+    Samples RSS and CPU of every pooled browser's process tree, plus free
+    system memory and temp-dir space, from one background thread. Watched
+    pools read the latest sample instead of walking process trees on every
+    return, stop lending browsers while memory is short and shed their
+    largest idle one. Each returned lease is recorded, so a run's resource
+    profile can be exported next to its output.
+    """
+
+    def __init__(self, interval=MONITOR_INTERVAL, min_available_mb=MIN_AVAILABLE_MB,
+                 resume_available_mb=RESUME_AVAILABLE_MB, min_tmp_free_mb=MIN_TMP_FREE_MB):
+        self.interval = interval
+        self.min_available_mb = min_available_mb
+        self.resume_available_mb = max(resume_available_mb, min_available_mb)
+        self.min_tmp_free_mb = min_tmp_free_mb
+        self.pools = []
+        self.lock = threading.Lock()
+        self.samples = {}  # id(driver) -> {"rss_mb", "cpu_pct"}
+        self.procs = {}  # pid -> psutil.Process, kept so cpu_percent() has a baseline
+        self.timeline = []  # One row per sample
+        self.leases = []  # One row per returned lease
+        self.pressure = False
+        self.paused_seconds = 0.0
+        self.started = time.monotonic()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def watch(self, pool):
+        pool.monitor = self
+        self.pools.append(pool)
+        return pool
+
+    def start(self):
+        if psutil is None:
+            print("⚠️ psutil not installed, resource monitoring is off")
+            return self
+        self.thread.start()
+        return self
+
+    # ---------- sampling ----------
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:  # A sampling hiccup must never take the run down
+                log_event("monitor_failed", logging.WARNING, error=str(e))
+
+    def _tree(self, pid):
+        """Returns tuple: (rss MB, CPU %) for pid and everything under it."""
+        try:
+            root = self.procs.get(pid) or self.procs.setdefault(pid, psutil.Process(pid))
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            self.procs.pop(pid, None)
+            return None, None
+        rss = cpu = 0.0
+        for proc in procs:
+            proc = self.procs.setdefault(proc.pid, proc)
+            try:
+                rss += proc.memory_info().rss
+                cpu += proc.cpu_percent(None)  # Since this process's previous sample
+            except psutil.Error:
+                self.procs.pop(proc.pid, None)
+        return rss / MB, cpu
+
+    def sample(self):
+        trees = {}  # pid -> (rss, cpu); shared Chrome hosts are walked once
+        samples = {}
+        for pool in self.pools:
+            for key, pid, share in pool.process_roots():
+                if pid not in trees:
+                    trees[pid] = self._tree(pid)
+                rss, cpu = trees[pid]
+                if rss is not None:
+                    samples[key] = {"rss_mb": rss * share, "cpu_pct": cpu * share}
+        live = {proc.pid for proc in self.procs.values() if proc.is_running()}
+        self.procs = {pid: proc for pid, proc in self.procs.items() if pid in live}
+
+        available = psutil.virtual_memory().available / MB
+        try:
+            tmp_free = shutil.disk_usage(tempfile.gettempdir()).free / MB
+        except OSError:
+            tmp_free = None
+        short = available < self.min_available_mb or (tmp_free is not None and tmp_free < self.min_tmp_free_mb)
+        recovered = available >= self.resume_available_mb and (tmp_free is None or tmp_free >= self.min_tmp_free_mb)
+
+        total_rss = sum(s["rss_mb"] for s in samples.values())
+        total_cpu = sum(s["cpu_pct"] for s in samples.values())
+        with self.lock:
+            self.samples = samples
+            if self.pressure:
+                self.paused_seconds += self.interval
+            self.timeline.append({
+                "elapsed": round(time.monotonic() - self.started, 1),
+                "available_mb": round(available),
+                "tmp_free_mb": round(tmp_free) if tmp_free is not None else None,
+                "drivers": len(samples),
+                "drivers_rss_mb": round(total_rss),
+                "drivers_cpu_pct": round(total_cpu, 1),
+                "paused": int(self.pressure),
+            })
+        METRICS.set("system_available_mb", round(available))
+        METRICS.set("browsers_rss_mb", round(total_rss))
+        METRICS.set("browsers_cpu_percent", round(total_cpu, 1))
+
+        if short and not self.pressure:
+            self._set_pressure(True, f"{available:.0f} MB free, temp dir {tmp_free or 0:.0f} MB free")
+        elif recovered and self.pressure:
+            self._set_pressure(False, f"{available:.0f} MB free")
+        if self.pressure:
+            for pool in self.pools:
+                pool.shed_largest_idle()
+
+    def _set_pressure(self, on, reason):
+        self.pressure = on
+        METRICS.set("resource_pressure", int(on))
+        if on:
+            print(f"🧯 Memory is short ({reason}), pausing browser leases")
+            log_event("memory_pressure", logging.WARNING, reason=reason)
+        else:
+            print(f"✅ Memory recovered ({reason}), resuming browser leases")
+            log_event("memory_recovered", reason=reason)
+        for pool in self.pools:
+            pool.set_paused(on)
+
+    # ---------- readings ----------
+    def rss_mb(self, driver):
+        sample = self.samples.get(id(driver))
+        return sample["rss_mb"] if sample else None
+
+    def lease_done(self, driver, label, seconds, profile):
+        sample = self.samples.get(id(driver)) or {}
+        row = {
+            "label": label,
+            "profile": profile,
+            "seconds": round(seconds, 3),
+            "rss_mb": round(sample["rss_mb"]) if sample else None,
+            "cpu_pct": round(sample["cpu_pct"], 1) if sample else None,
+        }
+        with self.lock:
+            self.leases.append(row)
+        log_event("lease_resources", **row)
+
+    def summary(self):
+        with self.lock:
+            timeline = list(self.timeline)
+        return {
+            "peak_browsers_rss_mb": max((row["drivers_rss_mb"] for row in timeline), default=None),
+            "min_available_mb": min((row["available_mb"] for row in timeline), default=None),
+            "paused_seconds": round(self.paused_seconds, 1),
+        }
+
+    def export(self, prefix):
+        """Writes <prefix>_resources.csv (timeline) and <prefix>_leases.csv. Returns both paths."""
+        paths = (prefix + "_resources.csv", prefix + "_leases.csv")
+        with self.lock:
+            tables = (self.timeline, self.leases)
+        for path, rows, fields in zip(paths, tables, (
+            ["elapsed", "available_mb", "tmp_free_mb", "drivers", "drivers_rss_mb", "drivers_cpu_pct", "paused"],
+            ["label", "profile", "seconds", "rss_mb", "cpu_pct"],
+        )):
+            with open(path, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+        return paths
+
+    def close(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        if self.pressure:
+            for pool in self.pools:
+                pool.set_paused(False)
@@ -0,0 +1,687 @@
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from collections import deque
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from maps_metrics import METRICS
+
+try:
+    import psutil
+except ImportError:  # RSS-based recycling is skipped without psutil
+    psutil = None
+
+
+# ======================================
+# POOL DEFAULTS
+# ======================================
+ACQUIRE_TIMEOUT = 120.0  # Give up waiting for a driver after this many seconds
+GROW_AFTER = 2.0  # Launch another browser when a borrower waited this long
+IDLE_TIMEOUT = 60.0  # Quit browsers above min_size that sat idle this long
+MAX_PAGES_PER_DRIVER = 200  # Recycle Chrome after this many leases
+MAX_DRIVER_RSS_MB = 1500  # Recycle Chrome once its process tree passes this
+TABS_PER_BROWSER = 1  # Above 1, pool entries are tabs sharing a Chrome instead of whole browsers
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+DRIVER_OFFLINE = os.environ.get("MAPS_DRIVER_OFFLINE") == "1"  # Never ask webdriver-manager to check versions
+DRIVER_PATH_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "maps_scraper", "chromedriver_path")
+WARM_POOL_STATE = os.path.join(os.path.expanduser("~"), ".cache", "maps_scraper", "warm_pool.json")
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# ======================================
+# CHROME OPTIONS
+# ======================================
+def get_options():
+    opts = Options()
+    opts.add_argument("--headless=new")
+    opts.add_argument("--disable-blink-features=AutomationControlled")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--disable-extensions")
+    opts.add_argument("--disable-logging")
+    opts.add_argument("--log-level=3")
+    opts.add_argument("--silent")
+    opts.add_experimental_option("excludeSwitches", ["enable-logging"])
+    return opts
+
+
+# ======================================
+# LEAN PROFILE
+# ======================================
+# Everything a text-only scrape never reads. Chrome matches these globs against
+# the full URL (query string included) before the request leaves the browser.
+LEAN_BLOCKED_URLS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*",
+    "*.mp4*", "*.webm*", "*.mp3*",
+    "*googleusercontent.com/*",  # Place photos
+    "*gstatic.com/images*",
+    "*fonts.googleapis.com/*", "*fonts.gstatic.com/*",
+    "*/maps/vt*", "*/kh/v=*", "*khms*.google.com/*",  # Map and satellite tiles
+    "*streetviewpixels*", "*/maps/preview/log*",
+]
+
+
+def get_lean_options():
+    opts = get_options()
+    opts.page_load_strategy = "eager"  # DOM is enough, don't wait for subresources
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_argument("--disable-webgl")
+    opts.add_argument("--disable-3d-apis")  # No WebGL means no vector map canvas
+    opts.add_argument("--disable-accelerated-2d-canvas")
+    opts.add_argument("--mute-audio")
+    opts.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.media_stream": 2,
+    })
+    return opts
+
+
+def block_heavy_requests(driver):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+
+
+# profile name -> (options factory, setup run on every freshly launched driver)
+PROFILES = {
+    "full": (get_options, None),
+    "lean": (get_lean_options, block_heavy_requests),
+}
+
+
+def driver_rss_mb(driver):
+    """RSS of chromedriver plus every Chrome process under it, or None if unknown."""
+    try:
+        return tree_rss_mb(driver.service.process.pid)
+    except AttributeError:
+        return None
+
+
+def tree_rss_mb(pid):
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(pid)
+        procs = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+def is_alive(driver):
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+
+def reset_page(driver):
+    """Stops whatever a failed lease left loading; False when the browser doesn't answer."""
+    try:
+        driver.execute_script("window.stop(); return 1")
+        return True
+    except Exception:
+        return False
+
+
+# ======================================
+# CHROMEDRIVER RESOLUTION
+# ======================================
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def resolve_driver_path(offline=None):
+    """
+    chromedriver path, looked up once per process. A CHROMEDRIVER environment
+    variable wins; offline mode reuses the path the last online lookup cached
+    (or a chromedriver on PATH) and never touches the network.
+    """
+    global _driver_path
+    offline = DRIVER_OFFLINE if offline is None else offline
+    with _driver_path_lock:
+        if _driver_path:
+            return _driver_path
+        path = os.environ.get("CHROMEDRIVER")
+        if not path and offline:
+            path = cached_driver_path() or shutil.which("chromedriver")
+            if not path:
+                raise RuntimeError("offline mode: no cached chromedriver path and none on PATH; run once online first")
+        if not path:
+            path = ChromeDriverManager().install()
+            try:
+                os.makedirs(os.path.dirname(DRIVER_PATH_CACHE), exist_ok=True)
+                with open(DRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+                    f.write(path)
+            except OSError:
+                pass
+        _driver_path = path
+        return path
+
+
+def cached_driver_path():
+    try:
+        with open(DRIVER_PATH_CACHE, encoding="utf-8") as f:
+            path = f.read().strip()
+    except OSError:
+        return None
+    return path if path and os.path.exists(path) else None
+
+
+# ======================================
+# SHARED CHROME HOSTS
+# ======================================
+# With tabs_per_browser above 1 the pool starts Chrome itself and attaches one
+# chromedriver session per tab through debuggerAddress. Every session still
+# runs its own commands, so threads don't queue behind each other, but the
+# tabs share one browser and GPU process instead of each paying for a Chrome.
+def find_chrome(binary=None):
+    for candidate in ((binary,) if binary else CHROME_BINARIES):
+        path = shutil.which(candidate) or (candidate if candidate and os.path.exists(candidate) else None)
+        if path:
+            return path
+    raise RuntimeError("no Chrome/Chromium binary found; pass binary= or put one on PATH")
+
+
+class ChromeHost:
+    """One Chrome process with remote debugging on, hosting pool tabs."""
+
+    def __init__(self, options, binary=None, start_timeout=30.0):
+        self.user_data_dir = tempfile.mkdtemp(prefix="maps-tabs-")
+        self.proc = subprocess.Popen(
+            [find_chrome(binary), *options.arguments, "--remote-debugging-port=0",
+             f"--user-data-dir={self.user_data_dir}", "--no-first-run", "--no-default-browser-check",
+             "about:blank"],  # This first tab keeps the browser up while pool tabs come and go
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.pid = self.proc.pid
+        self.tabs = 0
+        self.owned = True
+        self.address = self._wait_for_port(start_timeout)
+
+    def _wait_for_port(self, timeout):
+        # Chrome writes the port it picked to DevToolsActivePort once DevTools is up
+        port_file = os.path.join(self.user_data_dir, "DevToolsActivePort")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError("Chrome exited before DevTools came up")
+            try:
+                with open(port_file, encoding="utf-8") as f:
+                    port = f.readline().strip()
+                if port:
+                    return f"127.0.0.1:{port}"
+            except OSError:
+                pass
+            time.sleep(0.05)
+        self.close()
+        raise RuntimeError(f"Chrome did not open DevTools within {timeout:.0f}s")
+
+    def rss_mb(self):
+        return tree_rss_mb(self.pid)
+
+    def close(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class WarmHost(ChromeHost):
+    """A Chrome kept up by the maps_warm daemon; the pool attaches tabs but never closes it."""
+
+    def __init__(self, address, pid):
+        self.address = address
+        self.pid = pid
+        self.tabs = 0
+        self.owned = False
+
+    def close(self):
+        pass
+
+
+def pid_alive(pid):
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def warm_hosts(profile, path=WARM_POOL_STATE):
+    """Browsers a running maps_warm daemon keeps for this profile, or [] when there is none."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if state.get("profile") != profile or not pid_alive(state.get("pid", -1)):
+        return []
+    return [WarmHost(host["address"], host["pid"]) for host in state.get("hosts", [])]
+
+
+def open_isolated_tab(driver):
+    """
+    Moves the session onto a fresh tab in a browser context of its own, so
+    cookies and storage aren't shared with the other tabs. Falls back to a
+    plain new tab when Chrome won't create contexts from a page session.
+    Returns the context id, or None for a plain tab.
+    """
+    try:
+        context = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+        target = driver.execute_cdp_cmd("Target.createTarget", {
+            "url": "about:blank", "browserContextId": context,
+        })["targetId"]
+        handle = next((h for h in driver.window_handles if h.endswith(target)), None)
+        if handle is not None:
+            driver.switch_to.window(handle)
+            return context
+        driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context})
+    except (WebDriverException, KeyError):
+        pass
+    driver.switch_to.new_window("tab")
+    return None
+
+
+# ======================================
+# BROWSER POOL
+# ======================================
+class BrowserPool:
+    """
+    Elastic pool of Chrome drivers between min_size and max_size.
+    Borrow with `with pool.driver() as driver:`; get()/put() remain for callers
+    that manage the lease themselves.
+    With tabs_per_browser > 1 each driver is a tab, and sizes count tabs.
+    Browsers start in the background: get() hands out the first one that is
+    up instead of waiting for all of them. use_warm attaches to the browsers
+    of a running maps_warm daemon before launching any.
+    """
+
+    def __init__(self, size=5, min_size=None, profile="full",
+                 acquire_timeout=ACQUIRE_TIMEOUT, grow_after=GROW_AFTER,
+                 idle_timeout=IDLE_TIMEOUT, max_pages=MAX_PAGES_PER_DRIVER,
+                 max_rss_mb=MAX_DRIVER_RSS_MB, tabs_per_browser=TABS_PER_BROWSER,
+                 offline_driver=None, use_warm=False):
+        self.max_size = size
+        self.min_size = size if min_size is None else min(min_size, size)
+        self.profile = profile
+        self.options_factory, self.setup = PROFILES[profile]
+        self.acquire_timeout = acquire_timeout
+        self.grow_after = grow_after
+        self.idle_timeout = idle_timeout
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.tabs_per_browser = max(1, tabs_per_browser)
+
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.idle = deque()  # (driver, idle_since)
+        self.pages = {}  # id(driver) -> leases served
+        self.total = 0  # live drivers, idle + lent + launching
+        self.closed = False
+        self.hosts = warm_hosts(profile) if use_warm else []  # Chrome hosts in tab or warm mode
+        self.attach = self.tabs_per_browser > 1 or bool(self.hosts)
+        self.host_lock = threading.Lock()
+        self.tab_of = {}  # id(driver) -> (host, browser context id or None)
+        self.live = {}  # id(driver) -> driver, lent or idle
+        self.lent_at = {}  # id(driver) -> when the current lease started
+        self.monitor = None  # Set by ResourceMonitor.watch()
+        self.paused = False  # Set while the monitor sees memory pressure
+        self.ready = 0
+        self.starting = self.min_size  # Initial launches not finished yet
+        self.started = time.monotonic()
+
+        self.driver_path = resolve_driver_path(offline_driver)
+
+        if self.hosts:
+            print(f"🔥 Attaching to {len(self.hosts)} warm browsers")
+        unit = "browsers" if self.tabs_per_browser == 1 else f"tabs ({self.tabs_per_browser} per browser)"
+        print(f"🌐 Initializing {self.min_size} {profile} {unit} (up to {self.max_size})...")
+        self.total = self.min_size  # Counted as launching until they are up
+        launcher = ThreadPoolExecutor(max_workers=max(self.min_size, 1))
+        for _ in range(self.min_size):
+            launcher.submit(self._warm_up)
+        launcher.shutdown(wait=False)  # Queued launches still run; nobody waits for them here
+
+    # ---------- lifecycle ----------
+    def _warm_up(self):
+        try:
+            driver = self._launch()
+        except Exception as e:
+            print(f"❌ Browser failed to start: {e}")
+            with self.available:
+                self.total -= 1
+                self.starting -= 1
+                self.available.notify_all()
+            return
+        with self.available:
+            self.ready += 1
+            self.starting -= 1
+            ready = self.ready
+        self._release(driver)
+        if ready == 1:
+            elapsed = time.monotonic() - self.started
+            METRICS.observe("pool_first_ready_seconds", elapsed, profile=self.profile)
+            print(f"  ✓ Browser 1/{self.min_size} ready after {elapsed:.1f}s, work can start")
+        else:
+            print(f"  ✓ Browser {ready}/{self.min_size} ready")
+
+    def wait_ready(self, timeout=None):
+        """Blocks until every starting browser is up or has failed; for callers that time the pool itself."""
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        with self.available:
+            while self.starting > 0 and time.monotonic() < deadline:
+                self.available.wait(deadline - time.monotonic())
+
+    def _launch(self):
+        if self.attach:
+            with METRICS.timer("tab_open_seconds", profile=self.profile):
+                driver = self._open_tab()
+        else:
+            with METRICS.timer("browser_launch_seconds", profile=self.profile):
+                driver = webdriver.Chrome(service=Service(self.driver_path), options=self.options_factory())
+        if self.setup:
+            self.setup(driver)
+        with self.lock:
+            self.pages[id(driver)] = 0
+            self.live[id(driver)] = driver
+        return driver
+
+    def _open_tab(self):
+        options = self.options_factory()
+        while True:
+            with self.host_lock:
+                host = next((h for h in self.hosts if h.tabs < self.tabs_per_browser), None)
+                if host is None:
+                    with METRICS.timer("browser_launch_seconds", profile=self.profile):
+                        host = ChromeHost(options)
+                    self.hosts.append(host)
+                    METRICS.set("pool_browsers", len(self.hosts), profile=self.profile)
+                host.tabs += 1
+            try:
+                return self._attach(host, options)
+            except Exception:
+                if host.owned:
+                    raise
+            with self.host_lock:
+                # The daemon lost this browser; stop offering it and try the next
+                host.tabs -= 1
+                if host in self.hosts:
+                    self.hosts.remove(host)
+            print(f"⚠️ Warm browser at {host.address} is gone, skipping it")
+
+    def _attach(self, host, options):
+        try:
+            attach = Options()
+            attach.debugger_address = host.address
+            attach.page_load_strategy = options.page_load_strategy
+            driver = webdriver.Chrome(service=Service(self.driver_path), options=attach)
+            try:
+                context = open_isolated_tab(driver)
+            except Exception:
+                driver.quit()
+                raise
+        except Exception:
+            if host.owned:
+                self._close_tab_slot(host, keep_host=False)
+            raise
+        with self.lock:
+            self.tab_of[id(driver)] = (host, context)
+        return driver
+
+    def _close_tab_slot(self, host, keep_host):
+        """Gives back a host's tab slot; a host left without tabs is shut down unless a new tab is coming."""
+        with self.host_lock:
+            host.tabs -= 1
+            if host.tabs > 0 or keep_host or not host.owned:
+                return
+            self.hosts.remove(host)
+            METRICS.set("pool_browsers", len(self.hosts), profile=self.profile)
+        host.close()
+
+    def _quit(self, driver, keep_host=False):
+        with self.lock:
+            self.pages.pop(id(driver), None)
+            self.live.pop(id(driver), None)
+            self.lent_at.pop(id(driver), None)
+            tab = self.tab_of.pop(id(driver), None)
+        if tab is None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+        # Closing the tab is what hands its renderer's memory back
+        host, context = tab
+        try:
+            if context:
+                driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context})
+            else:
+                driver.close()
+        except Exception:
+            pass
+        try:
+            driver.quit()  # Ends the attached session; the shared Chrome stays up
+        except Exception:
+            pass
+        self._close_tab_slot(host, keep_host and not self.closed)
+
+    def lease_rss_mb(self, driver):
+        """Memory attributed to one pool entry: its own Chrome, or a tab's share of the host."""
+        if self.monitor is not None:
+            return self.monitor.rss_mb(driver)  # Sampled in the background, no tree walk here
+        tab = self.tab_of.get(id(driver))
+        if tab is None:
+            return driver_rss_mb(driver)
+        rss = tab[0].rss_mb()
+        return None if rss is None else rss / max(tab[0].tabs, 1)
+
+    def _replace(self, driver, reason, kind):
+        print(f"♻️ Recycling {'tab' if id(driver) in self.tab_of else 'browser'} ({reason})")
+        METRICS.inc("drivers_recycled_total", profile=self.profile, reason=kind)
+        self._quit(driver, keep_host=True)
+        try:
+            fresh = self._launch()
+        except Exception as e:
+            print(f"❌ Could not relaunch browser: {e}")
+            with self.available:
+                self.total -= 1
+                self.available.notify()
+            return
+        self._release(fresh)
+
+    def _release(self, driver):
+        with self.available:
+            if not self.closed:
+                self.idle.append((driver, time.monotonic()))
+                self.available.notify_all()  # Borrowers and wait_ready() share the condition
+                self._gauges()
+                return
+            self.total -= 1  # Finished launching after close_all()
+        self._quit(driver)
+
+    def _gauges(self):
+        METRICS.set("pool_idle", len(self.idle), profile=self.profile)
+        METRICS.set("pool_size", self.total, profile=self.profile)
+
+    # ---------- resource monitor hooks ----------
+    def process_roots(self):
+        """(id(driver), root pid, share of that tree) for every live driver."""
+        with self.lock:
+            drivers = list(self.live.items())
+            tabs = dict(self.tab_of)
+        roots = []
+        for key, driver in drivers:
+            tab = tabs.get(key)
+            if tab is not None:
+                roots.append((key, tab[0].pid, 1 / max(tab[0].tabs, 1)))
+                continue
+            try:
+                roots.append((key, driver.service.process.pid, 1.0))
+            except AttributeError:
+                pass
+        return roots
+
+    def set_paused(self, paused):
+        with self.available:
+            self.paused = paused
+            self.available.notify_all()
+
+    def shed_largest_idle(self):
+        """Quits the idle browser using the most memory, leaving at least one; False when there was none to shed."""
+        with self.available:
+            if self.total <= 1 or not self.idle or self.monitor is None:
+                return False
+            entry = max(self.idle, key=lambda e: self.monitor.rss_mb(e[0]) or 0)
+            self.idle.remove(entry)
+            self.total -= 1
+            self._gauges()
+        rss = self.monitor.rss_mb(entry[0])
+        print(f"🧯 Quitting an idle browser to free memory ({rss or 0:.0f} MB)")
+        METRICS.inc("drivers_recycled_total", profile=self.profile, reason="memory")
+        self._quit(entry[0])
+        return True
+
+    def _reap_idle(self):
+        """Quit browsers above min_size that nobody needed for idle_timeout (lock held)."""
+        now = time.monotonic()
+        reaped = []
+        while self.total > self.min_size and self.idle and now - self.idle[0][1] > self.idle_timeout:
+            reaped.append(self.idle.popleft()[0])
+            self.total -= 1
+        return reaped
+
+    # ---------- lending ----------
+    def get(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        grow_at = start + self.grow_after
+        driver = None
+        reaped = []
+
+        with self.available:
+            while True:
+                if self.closed:
+                    raise PoolTimeout("browser pool is closed")
+                if self.paused:
+                    # Memory is short: nothing is lent or launched until the monitor says so
+                    now = time.monotonic()
+                    if now >= deadline:
+                        raise PoolTimeout(f"browser leases paused for memory for {timeout:.0f}s")
+                    self.available.wait(deadline - now)
+                    continue
+                if self.idle:
+                    # Most recently used first, so surplus browsers age out at the front
+                    driver = self.idle.pop()[0]
+                    self.pages[id(driver)] = self.pages.get(id(driver), 0) + 1
+                    reaped = self._reap_idle()
+                    self._gauges()
+                    break
+                now = time.monotonic()
+                can_grow = self.total < self.max_size
+                if can_grow and now >= grow_at:
+                    self.total += 1  # Reserve the slot, launch outside the lock
+                    break
+                if now >= deadline:
+                    raise PoolTimeout(f"no browser free after {timeout:.0f}s")
+                self.available.wait((min(grow_at, deadline) if can_grow else deadline) - now)
+
+        for old in reaped:
+            self._quit(old)
+        if driver is not None:
+            METRICS.observe("pool_acquire_seconds", time.monotonic() - start, profile=self.profile)
+            self.lent_at[id(driver)] = time.monotonic()
+            return driver
+
+        print(f"📈 Growing browser pool to {self.total}")
+        try:
+            driver = self._launch()
+        except Exception:
+            with self.available:
+                self.total -= 1
+                self.available.notify()
+            raise
+        with self.lock:
+            self.pages[id(driver)] = 1
+        METRICS.observe("pool_acquire_seconds", time.monotonic() - start, profile=self.profile)
+        self.lent_at[id(driver)] = time.monotonic()
+        return driver
+
+    def put(self, driver, suspect=False, label=None):
+        """
+        suspect: the lease ended in an exception, so the page is reset too.
+        label: what the lease was for (a listing URL, a query), kept in the resource log.
+        """
+        lent_at = self.lent_at.pop(id(driver), None)
+        if self.monitor is not None and lent_at is not None:
+            self.monitor.lease_done(driver, label, time.monotonic() - lent_at, self.profile)
+        if self.closed:
+            self._quit(driver)
+            return
+        if not (reset_page(driver) if suspect else is_alive(driver)):
+            self._replace(driver, "health check failed", "unhealthy")
+            return
+        pages = self.pages.get(id(driver), 0)
+        if pages >= self.max_pages:
+            self._replace(driver, f"{pages} pages served", "pages")
+            return
+        if self.max_rss_mb:
+            rss = self.lease_rss_mb(driver)
+            if rss is not None and rss > self.max_rss_mb:
+                self._replace(driver, f"RSS {rss:.0f} MB", "rss")
+                return
+        self._release(driver)
+
+    @contextmanager
+    def driver(self, timeout=None, label=None):
+        driver = self.get(timeout)
+        try:
+            yield driver
+        except BaseException:
+            # A crashed or wedged browser is replaced here, so a retry gets a working one
+            self.put(driver, suspect=True, label=label)
+            raise
+        self.put(driver, label=label)
+
+    def close_all(self):
+        with self.available:
+            self.closed = True
+            drivers = [entry[0] for entry in self.idle]
+            self.idle.clear()
+            self.total -= len(drivers)
+            self.available.notify_all()
+        for driver in drivers:
+            self._quit(driver)
+        with self.host_lock:
+            # Hosts whose tabs are all back; lent tabs close theirs on return
+            empty = [host for host in self.hosts if host.tabs <= 0 and host.owned]
+            for host in empty:
+                self.hosts.remove(host)
+        for host in empty:
+            host.close()
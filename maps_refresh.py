@@ -0,0 +1,154 @@
+import csv
+import json
+import threading
+import time
+
+from maps_ids import place_id
+from maps_sinks import OUTPUT_COLUMNS
+
+
+# ======================================
+# CARD FINGERPRINTS
+# ======================================
+# What a feed card shows is enough to tell whether a known place changed: a
+# place whose name, rating, review count and open status match the stored
+# record keeps its stored row and its detail page is never opened.
+FINGERPRINT_FIELDS = ("name", "rating", "reviews", "business_status")
+# Fields compared for the changelog once a changed place has been scraped again
+CHANGELOG_FIELDS = [col for col in OUTPUT_COLUMNS
+                    if col not in ("search_query", "matched_categories", "place_id", "listing_url")]
+CHANGELOG_FIELDS.append("business_status")
+
+
+def normalize(field, value):
+    if value is None or value == "":
+        return None
+    if field == "rating":
+        try:
+            return round(float(value), 1)
+        except (TypeError, ValueError):
+            return None
+    if field == "reviews":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return " ".join(str(value).split()).lower()
+
+
+def fingerprint_changes(card, stored):
+    """
+    Fingerprint fields whose card value differs from the stored row. A field
+    the stored row never had (older runs) or the card didn't show is not a change.
+    Returns dict: field -> (stored value, card value)
+    """
+    changes = {}
+    for field in FINGERPRINT_FIELDS:
+        old, new = normalize(field, stored.get(field)), normalize(field, card.get(field))
+        if old is not None and new is not None and old != new:
+            changes[field] = (stored.get(field), card.get(field))
+    return changes
+
+
+def row_changes(old_row, new_row):
+    changes = {}
+    for field in CHANGELOG_FIELDS:
+        old, new = normalize(field, old_row.get(field)), normalize(field, new_row.get(field))
+        if old != new and new is not None:  # A field missing from this scrape isn't a removal
+            changes[field] = (old_row.get(field), new_row.get(field))
+    return changes
+
+
+# ======================================
+# REFRESH TRACKER
+# ======================================
+class RefreshTracker:
+    """
+    Refresh mode on top of a ListingStore: triage() splits cards into places
+    that need their detail page (new, or fingerprint changed) and stored rows
+    that are still good; scraped() and close() write the changelog.
+    Safe to call from any thread.
+    """
+
+    def __init__(self, store, changelog_path):
+        self.store = store
+        self.lock = threading.Lock()
+        self.previous = {}  # place id -> stored row, for places sent to scraping
+        self.seen = set()  # every place id any search returned this run
+        self.gone = set()  # place ids some search stopped returning
+        self.counts = {"added": 0, "modified": 0, "removed": 0, "unchanged": 0}
+        self.file = open(changelog_path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.DictWriter(self.file, fieldnames=[
+            "change", "place_id", "name", "listing_url", "changes", "detected_at",
+        ])
+        self.writer.writeheader()
+
+    def _write(self, change, pid, row, changes=None):
+        self.counts[change] += 1
+        self.writer.writerow({
+            "change": change,
+            "place_id": pid,
+            "name": row.get("name"),
+            "listing_url": row.get("listing_url"),
+            "changes": json.dumps({k: list(v) for k, v in (changes or {}).items()}, ensure_ascii=False),
+            "detected_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        self.file.flush()
+
+    def query_collected(self, query, cards, complete=True):
+        """
+        Records what a search returned; call only for searches that finished
+        cleanly. A feed that stopped scrolling early (complete=False) can't
+        tell a removed place from one it never got to, so it only adds to seen.
+        """
+        ids = {place_id(card["href"]) for card in cards}
+        gone = self.store.swap_query_places(query, ids) if complete else set()
+        with self.lock:
+            self.seen |= ids
+            self.gone |= gone
+
+    def triage(self, cards):
+        """
+        Returns tuple: (cards to scrape, stored rows for unchanged places)
+        """
+        stored = self.store.records([card["href"] for card in cards])
+        to_scrape, unchanged = [], []
+        with self.lock:
+            for card in cards:
+                pid = card.get("place_id") or place_id(card["href"])
+                old = stored.get(card["href"])
+                if old is None or fingerprint_changes(card, old):
+                    self.previous[pid] = old
+                    to_scrape.append(card)
+                    continue
+                self.counts["unchanged"] += 1
+                unchanged.append(dict(old, place_id=pid))
+        return to_scrape, unchanged
+
+    def scraped(self, row):
+        """Logs a triaged place once its detail page is back; failed scrapes log nothing."""
+        if row.get("error") or not row.get("name"):
+            return
+        pid = row.get("place_id") or place_id(row["listing_url"])
+        with self.lock:
+            if pid not in self.previous:
+                return
+            old = self.previous.pop(pid)
+            if old is None:
+                self._write("added", pid, row)
+                return
+            changes = row_changes(old, row)
+            if changes:
+                self._write("modified", pid, row, changes)
+            else:
+                self.counts["unchanged"] += 1
+
+    def close(self):
+        """Logs places that dropped out of a search and turned up in no other. Returns the counts."""
+        with self.lock:
+            removed = self.gone - self.seen
+        for pid, row in self.store.rows_by_id(sorted(removed)).items():
+            with self.lock:
+                self._write("removed", pid, row)
+        self.file.close()
+        return self.counts
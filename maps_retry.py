@@ -0,0 +1,164 @@
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchWindowException, StaleElementReferenceException,
+    TimeoutException, WebDriverException,
+)
+from selenium.webdriver.common.by import By
+import csv
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from maps_limits import PageBlocked
+from maps_pool import PoolTimeout
+
+
+# ======================================
+# RETRY DEFAULTS
+# ======================================
+MAX_ATTEMPTS = 3  # First try included
+RETRY_BASE_DELAY = 2.0  # Seconds before the first retry, doubled on every further one
+RETRY_MAX_DELAY = 60.0
+BLOCKED_DELAY_FACTOR = 4  # A blocked page waits this much longer than other failures
+
+RETRYABLE = {"timeout", "stale_element", "driver_crash", "blocked"}
+KIND_PRIORITY = {"stale_element": 0, "timeout": 1, "driver_crash": 1, "blocked": 2}  # Lower runs first
+
+CRASH_MARKERS = ("invalid session id", "chrome not reachable", "disconnected", "session deleted",
+                 "no such window", "target window already closed", "crashed")
+MISSING_MARKERS = ("can't find", "couldn't find", "isn't available")
+
+
+class NoSuchPlace(Exception):
+    pass
+
+
+# ======================================
+# FAILURE CLASSIFICATION
+# ======================================
+def classify_failure(exc):
+    """One of timeout, stale_element, driver_crash, blocked, no_such_place or other."""
+    if isinstance(exc, NoSuchPlace):
+        return "no_such_place"
+    if isinstance(exc, PageBlocked):
+        return "blocked"
+    if isinstance(exc, StaleElementReferenceException):
+        return "stale_element"
+    if isinstance(exc, (TimeoutException, PoolTimeout)):
+        return "timeout"
+    if isinstance(exc, (InvalidSessionIdException, NoSuchWindowException)):
+        return "driver_crash"
+    if isinstance(exc, WebDriverException) and any(m in str(exc).lower() for m in CRASH_MARKERS):
+        return "driver_crash"
+    return "other"
+
+
+def place_missing(driver):
+    """True when the page is Google's "can't find this place" panel rather than a slow one."""
+    try:
+        text = driver.find_element(By.TAG_NAME, "body").text.lower()
+    except WebDriverException:
+        return False
+    return any(marker in text for marker in MISSING_MARKERS)
+
+
+# ======================================
+# RETRY QUEUE
+# ======================================
+class RetryQueue:
+    """
+    Delayed priority queue of failed tasks. offer() either schedules another
+    attempt after an exponential, jittered delay or records a dead letter;
+    a background thread hands due tasks to submit(task, attempt), so retries
+    never hold up first attempts.
+    """
+
+    def __init__(self, submit, max_attempts=MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY,
+                 max_delay=RETRY_MAX_DELAY):
+        self.submit = submit
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.heap = []  # (ready_at, priority, seq, task, attempt)
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dead_letters = []
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def offer(self, task, kind, error, attempt, stage, label):
+        """Returns True when another attempt was scheduled, False when the task was given up."""
+        if kind not in RETRYABLE or attempt >= self.max_attempts:
+            with self.cond:
+                self.dead_letters.append({
+                    "stage": stage, "item": label, "kind": kind, "attempts": attempt, "error": str(error)[:300],
+                })
+            return False
+
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if kind == "blocked":
+            delay = min(self.max_delay, delay * BLOCKED_DELAY_FACTOR)
+        delay *= random.uniform(0.5, 1.0)  # Jitter, so a burst of failures doesn't come back as a burst
+        with self.cond:
+            heapq.heappush(self.heap, (time.monotonic() + delay, KIND_PRIORITY.get(kind, 1),
+                                       next(self.seq), task, attempt + 1))
+            self.cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.closed and (not self.heap or self.heap[0][0] > time.monotonic()):
+                    self.cond.wait(self.heap[0][0] - time.monotonic() if self.heap else None)
+                if self.closed:
+                    return
+                _, _, _, task, attempt = heapq.heappop(self.heap)
+            self.submit(task, attempt)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.thread.join()
+
+
+def write_dead_letters(path, *retry_queues):
+    """Every task the queues gave up on, one CSV row each."""
+    return write_dead_letter_rows(path, [row for retry_queue in retry_queues for row in retry_queue.dead_letters])
+
+
+def write_dead_letter_rows(path, rows):
+    """Dead-letter dicts (stage, item, error; kind and attempts when known) as CSV. Returns int: rows written."""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=["stage", "item", "kind", "attempts", "error"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+# ======================================
+# OUTSTANDING WORK
+# ======================================
+class Outstanding:
+    """Count of tasks not settled yet (retries included); wait() returns once it hits zero."""
+
+    def __init__(self):
+        self.count = 0
+        self.cond = threading.Condition()
+
+    def add(self, n=1):
+        with self.cond:
+            self.count += n
+
+    def done(self):
+        with self.cond:
+            self.count -= 1
+            if self.count <= 0:
+                self.cond.notify_all()
+
+    def wait(self):
+        with self.cond:
+            while self.count > 0:
+                self.cond.wait()
@@ -0,0 +1,122 @@
+from concurrent.futures import Future
+import heapq
+import itertools
+import threading
+import time
+
+from maps_metrics import METRICS
+
+
+# ======================================
+# SCHEDULER DEFAULTS
+# ======================================
+KINDS = ("collect", "scrape")  # Feed searches produce scrape tasks; retries rejoin their own kind
+COLLECT_COST = 20.0  # Seconds a feed search is guessed to take until one has been timed
+SCRAPE_COST = 3.0  # Same for a detail page
+COST_SMOOTHING = 0.2  # Weight of the newest timing in each kind's moving average
+
+
+class TaskScheduler:
+    """
+    One set of worker threads for both phases, fed from a priority queue per
+    task kind. Every free worker takes the next task at once (there is no
+    polling), choosing by backlog: a feed search goes first while the queued
+    detail pages would run dry before a search could deliver more, or when
+    no search is running at all; otherwise detail pages go first, and a
+    worker only idles when nothing is queued. Within a kind, first attempts
+    run before retries. submit() returns a Future like an executor's.
+    """
+
+    def __init__(self, workers, max_collect=None, costs=None):
+        self.workers = workers
+        self.max_collect = max_collect or workers  # Feed searches in flight at most
+        self.cost = dict({"collect": COLLECT_COST, "scrape": SCRAPE_COST}, **(costs or {}))
+        self.timed = {kind: 0 for kind in KINDS}
+        self.queues = {kind: [] for kind in KINDS}  # kind -> heap of (attempt, seq, future, fn, args)
+        self.running = {kind: 0 for kind in KINDS}
+        self.busy_seconds = 0.0
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.started = time.monotonic()
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, kind, fn, *args, attempt=1):
+        future = Future()
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("scheduler is closed")
+            heapq.heappush(self.queues[kind], (attempt, next(self.seq), future, fn, args))
+            METRICS.set("scheduler_queued", len(self.queues[kind]), kind=kind)
+            self.cond.notify()
+        return future
+
+    # ---------- dispatch ----------
+    def _collect_first(self):
+        """True when a feed search should take the next free worker ahead of queued detail pages."""
+        if self.running["collect"] == 0:
+            return True  # Keep at least one search feeding the detail queue
+        # Seconds the queued detail pages keep every worker busy, against one search's cost
+        drain_seconds = len(self.queues["scrape"]) * self.cost["scrape"] / self.workers
+        return drain_seconds < self.cost["collect"]
+
+    def _pick(self):
+        can_collect = self.queues["collect"] and self.running["collect"] < self.max_collect
+        if can_collect and (not self.queues["scrape"] or self._collect_first()):
+            return "collect"
+        if self.queues["scrape"]:
+            return "scrape"
+        return None
+
+    def _run(self):
+        while True:
+            with self.cond:
+                kind = self._pick()
+                while kind is None and not self.closed:
+                    self.cond.wait()
+                    kind = self._pick()
+                if kind is None:
+                    return
+                _, _, future, fn, args = heapq.heappop(self.queues[kind])
+                self.running[kind] += 1
+                METRICS.set("scheduler_queued", len(self.queues[kind]), kind=kind)
+                METRICS.set("scheduler_running", self.running[kind], kind=kind)
+
+            started = time.monotonic()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+            seconds = time.monotonic() - started
+
+            with self.cond:
+                self.running[kind] -= 1
+                self.busy_seconds += seconds
+                # The first timing replaces the guess, later ones are smoothed in
+                weight = 1.0 if self.timed[kind] == 0 else COST_SMOOTHING
+                self.cost[kind] += weight * (seconds - self.cost[kind])
+                self.timed[kind] += 1
+                METRICS.set("scheduler_running", self.running[kind], kind=kind)
+                METRICS.observe("scheduler_task_seconds", seconds, kind=kind)
+                self.cond.notify_all()  # A finished search can free a slot under max_collect
+
+    # ---------- lifecycle ----------
+    def summary(self):
+        with self.cond:
+            elapsed = time.monotonic() - self.started
+            return {
+                "tasks": dict(self.timed),
+                "cost_seconds": {kind: round(cost, 2) for kind, cost in self.cost.items()},
+                "utilization": round(self.busy_seconds / (self.workers * elapsed), 3) if elapsed else None,
+            }
+
+    def close(self):
+        """Runs whatever is still queued, then stops the workers."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        for thread in self.threads:
+            thread.join()
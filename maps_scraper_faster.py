@@ -1,21 +1,14 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from webdriver_manager.chrome import ChromeDriverManager
-import pandas as pd
-import time
-import random
-from queue import Queue
-import threading
+import argparse
+import os
+
+from maps_job import DEFAULT_LIMITS, load_job, run_job
 
 
 # ======================================
 # CONFIGURATION
 # ======================================
+# The single-area run of this script; maps_job.py runs the same pipeline from
+# JSON/YAML job files covering many areas (or pass one with --job)
 CATEGORIES = [
     "gold jewelry shop",
     "diamond jewelry shop",
@@ -46,321 +39,44 @@ CATEGORIES = [
 
 
 AREA = "zaveri bazaar mumbai"
-
-
-MAX_THREADS = 10
-MAX_LINK_COLLECTION_THREADS = 3
-SCROLL_PAUSE_TIME = 2.0
-MAX_NO_CHANGE = 3
-MIN_SCROLL_ITERATIONS = 15
-BROWSER_POOL_SIZE = 7
-
-
-# ======================================
-# CHROME OPTIONS
-# ======================================
-def get_options():
-    opts = Options()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--disable-extensions")
-    opts.add_argument("--disable-logging")
-    opts.add_argument("--log-level=3")
-    opts.add_argument("--silent")
-    opts.add_experimental_option("excludeSwitches", ["enable-logging"])
-    return opts
-
-
-# ======================================
-# BROWSER POOL
-# ======================================
-class BrowserPool:
-    def __init__(self, size=5):
-        self.pool = Queue(maxsize=size)
-        self.lock = threading.Lock()
-        print(f"🌐 Initializing {size} browsers...")
-        for i in range(size):
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=get_options()
-            )
-            self.pool.put(driver)
-            print(f"  ✓ Browser {i+1}/{size} ready")
-
-    def get(self):
-        return self.pool.get()
-
-    def put(self, driver):
-        self.pool.put(driver)
-
-    def close_all(self):
-        while not self.pool.empty():
-            driver = self.pool.get()
-            driver.quit()
-
-
-# ======================================
-# SCROLL + GET LINKS
-# ======================================
-def get_links_for_query(query, category, browser_pool):
-    """
-    Returns tuple: (category, links_list)
-    """
-    driver = browser_pool.get()
-    wait = WebDriverWait(driver, 15)
-
-    print(f"\n🔍 Searching: {query}")
-    search_url = f"https://www.google.com/maps/search/{query.replace(' ', '+')}/"
-
-    try:
-        driver.get(search_url)
-        time.sleep(5)
-
-        results_container = wait.until(
-            EC.presence_of_element_located((By.XPATH, "//div[contains(@aria-label, 'Results for')]"))
-        )
-        print("✅ Container loaded")
-
-        scroll_box = results_container
-        previous_count = 0
-        no_change_counter = 0
-        scroll_iteration = 0
-
-        print("📜 Scrolling to load all listings...")
-
-        while True:
-            driver.execute_script(
-                "arguments[0].scrollTop = arguments[0].scrollHeight;", 
-                scroll_box
-            )
-            time.sleep(SCROLL_PAUSE_TIME)
-            scroll_iteration += 1
-
-            listings = driver.find_elements(By.XPATH, "//a[contains(@href, '/maps/place/')]")
-            current_count = len(listings)
-
-            try:
-                end_message = driver.find_element(By.XPATH, 
-                    "//span[contains(text(), \"You've reached the end\") or contains(text(), 'reached the end')]")
-                if end_message:
-                    print("🏁 Reached end of results")
-                    break
-            except:
-                pass
-
-            if current_count == previous_count:
-                no_change_counter += 1
-                print(f"⏳ No new results... ({no_change_counter}/{MAX_NO_CHANGE}) [Iteration {scroll_iteration}]")
-
-                if no_change_counter >= MAX_NO_CHANGE and scroll_iteration >= MIN_SCROLL_ITERATIONS:
-                    print(f"✋ Stopping after {scroll_iteration} scrolls")
-                    break
-            else:
-                print(f"📍 {current_count} listings... [Iteration {scroll_iteration}]")
-                no_change_counter = 0
-                previous_count = current_count
-
-            if scroll_iteration > 100:
-                print("⚠️ Max iterations reached")
-                break
-
-        # Collect unique links
-        links = []
-        seen = set()
-        listings = driver.find_elements(By.XPATH, "//a[contains(@href, '/maps/place/')]")
-
-        for l in listings:
-            href = l.get_attribute("href")
-            if href and href not in seen:
-                links.append(href)
-                seen.add(href)
-
-        print(f"✅ Found {len(links)} unique listings for '{query}'")
-
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        links = []
-    finally:
-        browser_pool.put(driver)
-
-    return (category, links)
-
-
-# ======================================
-# SCRAPE DETAILS FROM ONE LINK
-# ======================================
-def scrape_listing(link, category, browser_pool, stats_counter, stats_lock):
-    driver = browser_pool.get()
-    wait = WebDriverWait(driver, 10)
-    result = {"listing_url": link}
-
-    try:
-        driver.get(link)
-        time.sleep(1)
-        wait.until(EC.presence_of_element_located((By.XPATH, "//h1[contains(@class, 'DUwDvf')]")))
-
-        def safe(xpath):
-            try:
-                return driver.find_element(By.XPATH, xpath).text
-            except:
-                return None
-
-        result.update({
-            "name": safe("//h1[contains(@class, 'DUwDvf')]"),
-            "category": safe("//button[contains(@aria-label,'category')]/div/div[2]"),
-            "address": safe("//button[contains(@data-item-id,'address')]/div/div[2]"),
-            "phone": safe("//button[contains(@data-item-id,'phone:tel')]/div/div[2]"),
-            "website": safe("//a[contains(@data-item-id,'authority')]/div/div[2]"),
-            "search_query": category
-        })
-
-        # Update stats
-        with stats_lock:
-            stats_counter['completed'] += 1
-            stats_counter['successful'] += 1
-            name = result.get("name", "Unknown")[:40]
-            print(f"✅ [{stats_counter['completed']}/{stats_counter['total']}] {name}")
-
-    except Exception as e:
-        result["error"] = str(e)
-        result["search_query"] = category
-
-        with stats_lock:
-            stats_counter['completed'] += 1
-            stats_counter['failed'] += 1
-            print(f"⚠️ [{stats_counter['completed']}/{stats_counter['total']}] Error")
-    finally:
-        browser_pool.put(driver)
-
-    return result
+AREA_BBOX = None  # (south, west, north, east) searches the area tile by tile, past the feed cap
+DETAIL_ENGINE = "selenium"  # "http" parses pages without a browser, Selenium only for misses; "cdp" skips Selenium
+OUTPUT_PATH = "zaveri_bazaar_places_complete.csv"  # .csv, .jsonl or .parquet
+
+LIMITS = dict(DEFAULT_LIMITS)  # Pacing, pool sizes and browser recycling; see maps_job.DEFAULT_LIMITS
+
+OPTIONS = {
+    "collection_profile": "full",  # Browser profile per phase: "full" or "lean"
+    "detail_profile": "lean",  # Blocks images, fonts, media and map tiles
+    "scrape_details": True,  # False keeps feed-card fields only and skips detail pages
+    "listing_store": "listings_cache.sqlite",  # None disables the on-disk listing cache
+    "listing_ttl_hours": 24 * 7,  # Cached listings younger than this are not scraped again
+    "refresh": False,  # Reopen detail pages only for new places or ones whose feed card changed (needs the store)
+    "changelog": "zaveri_bazaar_changelog.csv",  # Added / modified / removed places, refresh mode only
+    "journal": "zaveri_bazaar_run.journal.jsonl",  # Pipeline state for --resume
+    "report_prefix": os.path.splitext(OUTPUT_PATH)[0],  # Metrics and resource profile next to the output
+    "driver_offline": False,  # Reuse the cached chromedriver path, no version check over the network
+    "use_warm_pool": True,  # Attach to browsers kept up by `python maps_warm.py` when it is running
+    "monitor_resources": True,  # Sample browser RSS/CPU in the background, pause leases when memory runs short
+    "metrics_port": 9108,  # Prometheus-style /metrics on localhost while running; None disables
+    "event_log": None,  # JSON-lines event log; None keeps logging off the hot path
+    "progress_level": "INFO",  # Console lines per query and listing; "DEBUG" adds every scroll, None is quiet
+}
 
 
 # ======================================
 # MAIN SCRIPT - PROGRESSIVE SCRAPING
 # ======================================
 if __name__ == "__main__":
-    start_time = time.time()
-
-    print("🚀 Starting Google Maps Scraper (Progressive Mode)")
-    print("="*60)
-    browser_pool = BrowserPool(size=BROWSER_POOL_SIZE)
-
-    all_results = []
-    all_links_global = set()  # Global set to track all unique links
-    results_lock = threading.Lock()
-
-    # Stats tracking
-    stats_counter = {'completed': 0, 'total': 0, 'successful': 0, 'failed': 0}
-    stats_lock = threading.Lock()
-
-    print("\n" + "="*60)
-    print("🔄 PROGRESSIVE MODE: Scraping starts as links are collected")
-    print("="*60)
-
-    # Single executor for all tasks
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as scraping_executor:
-        # Track all scraping futures
-        scraping_futures = {}
-
-        # Start link collection in parallel
-        with ThreadPoolExecutor(max_workers=MAX_LINK_COLLECTION_THREADS) as collection_executor:
-            collection_futures = {
-                collection_executor.submit(get_links_for_query, f"{cat} in {AREA}", cat, browser_pool): cat 
-                for cat in CATEGORIES
-            }
-
-            categories_processed = 0
-
-            # Process link collections as they complete
-            for future in as_completed(collection_futures):
-                category = collection_futures[future]
-                categories_processed += 1
-
-                try:
-                    returned_category, links = future.result()
-
-                    # Remove duplicates globally before scraping
-                    new_links = []
-                    duplicate_count = 0
-
-                    for link in links:
-                        if link not in all_links_global:
-                            all_links_global.add(link)
-                            new_links.append(link)
-                        else:
-                            duplicate_count += 1
-
-                    print(f"\n✅ [{categories_processed}/{len(CATEGORIES)}] {returned_category}")
-                    print(f"   📍 Found: {len(links)} links | New: {len(new_links)} | Duplicates: {duplicate_count}")
-
-                    if new_links:
-                        # Update total count
-                        with stats_lock:
-                            stats_counter['total'] += len(new_links)
-
-                        # Immediately submit scraping tasks for new links
-                        print(f"   🚀 Starting scraping for {len(new_links)} new links...")
-
-                        for link in new_links:
-                            future = scraping_executor.submit(
-                                scrape_listing, link, returned_category, browser_pool, 
-                                stats_counter, stats_lock
-                            )
-                            scraping_futures[future] = (returned_category, link)
-
-                except Exception as e:
-                    print(f"\n❌ [{categories_processed}/{len(CATEGORIES)}] Error collecting {category}: {e}")
-
-                # Small delay between category completions
-                time.sleep(random.uniform(2, 4))
-
-        print(f"\n{'='*60}")
-        print(f"📊 Link collection complete!")
-        print(f"   Total unique links to scrape: {stats_counter['total']}")
-        print(f"   Waiting for all scraping tasks to complete...")
-        print(f"{'='*60}\n")
-
-        # Wait for all scraping tasks to complete
-        for future in as_completed(scraping_futures):
-            category, link = scraping_futures[future]
-            try:
-                result = future.result()
-                with results_lock:
-                    all_results.append(result)
-            except Exception as e:
-                print(f"⚠️ Exception during scraping: {e}")
-
-    # Cleanup
-    print("\n🧹 Closing browsers...")
-    browser_pool.close_all()
-
-    # ======================================
-    # REMOVE DUPLICATES & SAVE
-    # ======================================
-    df = pd.DataFrame(all_results)
-    initial_count = len(df)
-
-    # Remove duplicates by name and address
-    df.drop_duplicates(subset=["name", "address"], inplace=True, ignore_index=True)
-
-    # Remove entries with no name (failed scrapes)
-    df = df[df['name'].notna()]
-
-    df.to_csv("lamington_it_places_complete.csv", index=False, encoding="utf-8-sig")
-
-    elapsed = time.time() - start_time
-    print("\n" + "="*60)
-    print(f"✅ SCRAPING COMPLETE!")
-    print(f"📊 Results:")
-    print(f"   • Total scraped: {initial_count}")
-    print(f"   • After deduplication: {len(df)}")
-    print(f"   • Successful: {stats_counter['successful']}")
-    print(f"   • Failed: {stats_counter['failed']}")
-    print(f"⏱️ Time: {elapsed:.1f}s ({elapsed/60:.1f} minutes)")
-    print(f"💾 Saved to: lamington_it_places_complete.csv")
-    print("="*60)
-
-
+    parser = argparse.ArgumentParser(description="Progressive Google Maps scraper")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue the run recorded in {OPTIONS['journal']}, retrying failed listings")
+    parser.add_argument("--job", help="run a JSON/YAML job file instead of the configuration above")
+    args = parser.parse_args()
+
+    if args.job:
+        run_job(resume=args.resume, **load_job(args.job))
+    else:
+        area = {"name": AREA, "bbox": AREA_BBOX}
+        run_job([area], CATEGORIES, engine=DETAIL_ENGINE, sinks=[OUTPUT_PATH], limits=LIMITS, options=OPTIONS,
+                resume=args.resume)
@@ -0,0 +1,228 @@
+import json
+import logging
+
+from maps_ids import place_id
+from maps_metrics import log_progress
+
+
+# ======================================
+# FEED SCROLLING DEFAULTS
+# ======================================
+SCROLL_IDLE_TIMEOUT = 1.0  # First wait for the feed to react to a scroll
+SCROLL_MAX_IDLE_TIMEOUT = 4.0  # Back-off ceiling while nothing is happening
+MAX_NO_CHANGE = 3
+MAX_SCROLL_ITERATIONS = 100
+KNOWN_PAGES_TO_STOP = 3  # With a known-place index: stop after this many scrolls that turned up nothing new
+
+PLACE_LINK_XPATH = "//a[contains(@href, '/maps/place/')]"
+END_OF_LIST_XPATH = "//span[contains(text(), \"You've reached the end\") or contains(text(), 'reached the end')]"
+
+
+# ======================================
+# IN-PAGE CARD HARVESTER
+# ======================================
+# Collects every place anchor not returned before on this page, together with
+# the card fields the feed has already rendered. The seen-set lives on window,
+# so it resets with each driver.get().
+HARVEST_CARDS_FN = """
+function harvestCards() {
+    var seen = window.__mapsHarvested || (window.__mapsHarvested = {});
+    var cards = [];
+    var anchors = document.querySelectorAll("a[href*='/maps/place/']");
+    for (var i = 0; i < anchors.length; i++) {
+        var a = anchors[i];
+        var href = a.href;
+        if (!href || seen[href]) continue;
+        seen[href] = true;
+
+        var card = a.closest("div.Nv2PK") || a.parentElement;
+        var nameEl = card.querySelector(".qBF1Pd");
+        var ratingEl = card.querySelector(".MW4etd");
+        var reviewsEl = card.querySelector(".UY7F9");
+        var category = null;
+        var lines = card.querySelectorAll(".W4Efsd");
+        for (var j = 0; j < lines.length && category === null; j++) {
+            if (lines[j].querySelector(".W4Efsd")) continue;
+            var parts = lines[j].textContent.split("\u00b7");
+            var first = parts[0].trim();
+            if (first && !/^[\d.,()\s]+$/.test(first)) category = first;
+        }
+        // Only the closures that persist; "Open"/"Closes 9 pm" changes with the clock
+        var status = "operational";
+        var spans = card.querySelectorAll(".W4Efsd span");
+        for (var k = 0; k < spans.length; k++) {
+            var text = spans[k].textContent.trim().toLowerCase();
+            if (text.indexOf("permanently closed") === 0) { status = "permanently_closed"; break; }
+            if (text.indexOf("temporarily closed") === 0) { status = "temporarily_closed"; break; }
+        }
+
+        cards.push({
+            href: href,
+            name: (nameEl && nameEl.textContent.trim()) || a.getAttribute("aria-label"),
+            rating: ratingEl ? parseFloat(ratingEl.textContent.replace(",", ".")) || null : null,
+            reviews: reviewsEl ? parseInt(reviewsEl.textContent.replace(/\D/g, ""), 10) || null : null,
+            category: category,
+            business_status: status
+        });
+    }
+    return cards;
+}
+"""
+
+HARVEST_CARDS_JS = HARVEST_CARDS_FN + "return harvestCards();"
+
+
+# ======================================
+# IN-PAGE WAIT SCRIPT
+# ======================================
+# Scrolls the feed once, then resolves as soon as the page reacts: more place
+# anchors, a taller feed or the end-of-list marker. Only if nothing happens
+# within the timeout does it resolve with changed=false. Every resolution
+# carries the cards that are new since the previous call.
+WAIT_FOR_FEED_CHANGE_JS = HARVEST_CARDS_FN + """
+var feed = arguments[0], timeoutMs = arguments[1];
+var lastCount = arguments[2], lastHeight = arguments[3];
+var done = arguments[arguments.length - 1];
+
+function snapshot() {
+    var count = document.querySelectorAll("a[href*='/maps/place/']").length;
+    var height = feed.scrollHeight;
+    var end = document.evaluate(
+        "boolean(" + %(end_xpath)s + ")", document, null, XPathResult.BOOLEAN_TYPE, null
+    ).booleanValue;
+    return {count: count, height: height, end: end,
+            changed: end || count !== lastCount || height !== lastHeight};
+}
+
+feed.scrollTop = feed.scrollHeight;
+
+var first = snapshot();
+if (first.changed) { first.cards = harvestCards(); done(first); return; }
+
+var finished = false;
+var observer = new MutationObserver(function () {
+    if (finished) return;
+    var snap = snapshot();
+    if (snap.changed) { finish(snap); }
+});
+var timer = setTimeout(function () { finish(snapshot()); }, timeoutMs);
+
+function finish(snap) {
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    snap.cards = harvestCards();
+    done(snap);
+}
+
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+""" % {"end_xpath": json.dumps(END_OF_LIST_XPATH)}
+
+
+def card_row(card):
+    """Result row pre-filled with the fields read off a feed card."""
+    return {
+        "listing_url": card["href"],
+        "place_id": card.get("place_id") or place_id(card["href"]),
+        "name": card.get("name"),
+        "category": card.get("category"),
+        "rating": card.get("rating"),
+        "reviews": card.get("reviews"),
+        "business_status": card.get("business_status"),
+        "matched_categories": "; ".join(card.get("categories", [])),
+    }
+
+
+# ======================================
+# EARLY STOP
+# ======================================
+class FeedStop:
+    """
+    Optional stop rule for one feed: after known_pages scrolls in a row whose
+    new cards are all in `known` (a set or BloomFilter of place ids), or once
+    top_n cards are in. Scrolls that rendered no new cards don't count.
+    """
+
+    def __init__(self, known=None, known_pages=KNOWN_PAGES_TO_STOP, top_n=None):
+        self.known = known
+        self.known_pages = known_pages
+        self.top_n = top_n
+        self.known_streak = 0
+        self.reason = None
+
+    def update(self, batch, total):
+        """Returns the reason to stop after this batch of new cards, or None."""
+        if self.top_n and total >= self.top_n:
+            self.reason = f"top {self.top_n} reached"
+        elif self.known is not None and batch:
+            if all(place_id(card["href"]) in self.known for card in batch):
+                self.known_streak += 1
+            else:
+                self.known_streak = 0
+            if self.known_pages and self.known_streak >= self.known_pages:
+                self.reason = f"{self.known_streak} scrolls of known places only"
+        return self.reason
+
+    def truncate(self, cards):
+        return cards[:self.top_n] if self.top_n else cards
+
+
+# ======================================
+# ADAPTIVE SCROLL LOOP
+# ======================================
+def scroll_feed(driver, scroll_box, idle_timeout=SCROLL_IDLE_TIMEOUT,
+                max_idle_timeout=SCROLL_MAX_IDLE_TIMEOUT, max_no_change=MAX_NO_CHANGE,
+                max_iterations=MAX_SCROLL_ITERATIONS, stop=None):
+    """
+    Scrolls the results feed until it stops growing, or until stop (a
+    FeedStop) says so, harvesting cards as it goes.
+    Returns tuple: (cards, scroll_iterations)
+    """
+    # Leave headroom over the longest in-page wait before WebDriver gives up
+    driver.set_script_timeout(max_idle_timeout + 10)
+
+    cards = []
+    count = 0
+    height = 0
+    timeout = idle_timeout
+    no_change_counter = 0
+    scroll_iteration = 0
+
+    while scroll_iteration < max_iterations:
+        scroll_iteration += 1
+        snap = driver.execute_async_script(
+            WAIT_FOR_FEED_CHANGE_JS, scroll_box, int(timeout * 1000), count, height
+        )
+        cards.extend(snap["cards"])
+
+        if snap["end"]:
+            log_progress("🏁 Reached end of results")
+            break
+
+        if stop and stop.update(snap["cards"], len(cards)):
+            log_progress("⏩ Stopping early: %s [Iteration %d]", stop.reason, scroll_iteration)
+            break
+
+        if snap["changed"]:
+            if snap["count"] != count:
+                log_progress("📍 %d listings... [Iteration %d]", len(cards), scroll_iteration, level=logging.DEBUG)
+            count = snap["count"]
+            height = snap["height"]
+            no_change_counter = 0
+            timeout = idle_timeout
+            continue
+
+        # Nothing happened within the timeout: wait longer next time
+        no_change_counter += 1
+        log_progress("⏳ No new results... (%d/%d) [Iteration %d]", no_change_counter, max_no_change, scroll_iteration,
+                     level=logging.DEBUG)
+        if no_change_counter >= max_no_change:
+            log_progress("✋ Stopping after %d scrolls", scroll_iteration)
+            break
+        timeout = min(timeout * 2, max_idle_timeout)
+    else:
+        log_progress("⚠️ Max iterations reached", level=logging.WARNING)
+
+    if stop:
+        cards = stop.truncate(cards)
+    return cards, scroll_iteration
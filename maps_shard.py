@@ -0,0 +1,334 @@
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from maps_ids import place_id
+from maps_job import (DEFAULT_LIMITS, DEFAULT_OPTIONS, get_links_for_area, load_job, merged, normalize_areas,
+                      scrape_listing)
+from maps_limits import AdaptiveLimiter
+from maps_metrics import log_progress
+from maps_pool import BrowserPool, resolve_driver_path
+from maps_sinks import ResultSink
+
+
+# ======================================
+# SHARDED RUNNER
+# ======================================
+# A job file's categories x areas become (category, area) units in a SQLite queue. Worker
+# processes, each with its own browser pool, claim units until it's drained;
+# other machines join the same queue file with --join. Every worker streams to
+# its own shard, and the coordinator merges the shards by place id at the end.
+# Shards live in <output>_shards/<run id>/, one directory per queue, so a new
+# queue never merges shards left over from an earlier one.
+#
+#   python maps_shard.py job.yaml --workers 4
+#
+# Feed searches and detail pages are maps_job's stages, run with the job's
+# limits and options (tile grid, profiles, scroll settings); engine and sinks
+# don't apply, every worker scrapes with Selenium into its JSONL shard.
+#
+# --join nodes only drain the queue and write their own shards; they don't
+# merge. Copy their run directory's shard-*.jsonl files into the seeding
+# node's run directory, then merge everything there with --merge-only.
+BROWSERS_PER_WORKER = 2
+THREADS_PER_WORKER = 3
+LEASE_TIMEOUT = 30 * 60  # A unit claimed this long ago by a silent worker is handed out again
+MAX_ATTEMPTS = 3  # A unit that fails this often is marked failed
+
+
+# ======================================
+# WORK QUEUE
+# ======================================
+class WorkQueue:
+    """
+    SQLite-backed queue of (category, area) units shared by every worker process,
+    plus a table of claimed places so no two workers open the same detail page.
+    """
+
+    def __init__(self, path, lease_timeout=LEASE_TIMEOUT):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS units ("
+            " id INTEGER PRIMARY KEY,"
+            " category TEXT NOT NULL,"
+            " area TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " worker TEXT,"
+            " claimed_at REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " UNIQUE (category, area))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS places ("
+            " place_id TEXT NOT NULL,"
+            " category TEXT NOT NULL,"
+            " area TEXT NOT NULL,"
+            " owner TEXT,"
+            " PRIMARY KEY (place_id, category, area))"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        # Set by whichever process creates the queue; names this queue's shard directory
+        self.conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('run_id', ?)",
+            (f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}",)
+        )
+        self.run_id = self.conn.execute("SELECT value FROM meta WHERE key = 'run_id'").fetchone()[0]
+
+    def add_units(self, units):
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO units (category, area) VALUES (?, ?)", units)
+
+    def claim(self, worker):
+        """Next pending unit as (id, category, area), or None when the queue is drained."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Units leased by a worker that died are pending again, unless out of attempts
+            self.conn.execute(
+                "UPDATE units SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END "
+                "WHERE status = 'running' AND claimed_at < ?",
+                (MAX_ATTEMPTS, now - self.lease_timeout)
+            )
+            row = self.conn.execute(
+                "SELECT id, category, area FROM units WHERE status = 'pending' AND attempts < ? "
+                "ORDER BY attempts, id LIMIT 1",
+                (MAX_ATTEMPTS,)
+            ).fetchone()
+            if row:
+                self.conn.execute(
+                    "UPDATE units SET status = 'running', worker = ?, claimed_at = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (worker, now, row[0])
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def finish(self, unit_id, ok=True):
+        """Marks a unit done, or hands it out again; one out of attempts is marked failed."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE units SET status = CASE WHEN ? THEN 'done' WHEN attempts < ? THEN 'pending' "
+                "ELSE 'failed' END WHERE id = ?",
+                (ok, MAX_ATTEMPTS, unit_id)
+            )
+
+    def claim_places(self, worker, category, area, place_ids):
+        """
+        Records that this unit found these places.
+        Returns the ids this worker now owns; places another unit owns already are skipped.
+        """
+        owned = []
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for pid in place_ids:
+                taken = self.conn.execute(
+                    "SELECT 1 FROM places WHERE place_id = ? AND owner IS NOT NULL "
+                    "AND NOT (category = ? AND area = ?) LIMIT 1",
+                    (pid, category, area)  # A retried unit keeps the places it owned before
+                ).fetchone()
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO places (place_id, category, area, owner) VALUES (?, ?, ?, ?)",
+                    (pid, category, area, None if taken else worker)
+                )
+                if not taken:
+                    owned.append(pid)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return owned
+
+    def place_categories(self):
+        """Returns dict: place id -> every category it was found under."""
+        found = {}
+        for pid, category in self.conn.execute("SELECT place_id, category FROM places ORDER BY rowid"):
+            found.setdefault(pid, [])
+            if category not in found[pid]:
+                found[pid].append(category)
+        return found
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall())
+
+    def close(self):
+        self.conn.close()
+
+
+# ======================================
+# WORKER PROCESS
+# ======================================
+def run_worker(queue_path, shard_dir, worker, areas, limits, options, browsers=BROWSERS_PER_WORKER,
+               threads=THREADS_PER_WORKER):
+    work_queue = WorkQueue(queue_path)
+    browser_pool = BrowserPool(size=browsers, min_size=1, profile=options["detail_profile"],
+                               offline_driver=options["driver_offline"])
+    limiter = AdaptiveLimiter(rate=limits["page_rate"], max_rate=limits["max_page_rate"],
+                              max_concurrency=threads)  # Paces this worker's own page loads
+    sink = ResultSink(os.path.join(shard_dir, f"shard-{worker}.jsonl"), batch_size=limits["sink_batch_size"])
+    areas_by_name = {area["name"]: area for area in areas}
+    stats_counter = {'completed': 0, 'total': 0, 'successful': 0, 'failed': 0}
+    stats_lock = threading.Lock()
+    units_done = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            while True:
+                unit = work_queue.claim(worker)
+                if unit is None:
+                    break
+                unit_id, category, area = unit
+                log_progress("🧩 [%s] %s in %s", worker, category, area)
+                try:
+                    # A --join node may not know the area; then it is searched by name
+                    _, cards, failed_tiles = get_links_for_area(
+                        category, areas_by_name.get(area, {"name": area, "bbox": None}), browser_pool, limiter,
+                        limits, options
+                    )
+                    by_id = {place_id(card["href"]): card for card in cards}
+                    owned = work_queue.claim_places(worker, category, area, list(by_id))
+
+                    with stats_lock:
+                        stats_counter['total'] += len(owned)
+                    futures = []
+                    for pid in owned:
+                        card = dict(by_id[pid], place_id=pid, categories=[category])
+                        futures.append(executor.submit(scrape_listing, card["href"], category, browser_pool,
+                                                       limiter, stats_counter, stats_lock, card))
+                    for future in futures:
+                        sink.put(future.result())
+
+                    # An empty feed is a valid answer; a tiled search with failed tiles goes round again
+                    work_queue.finish(unit_id, ok=not failed_tiles)
+                    units_done += 1
+                    log_progress("   ✅ [%s] %d found, %d new places scraped", worker, len(cards), len(owned))
+                except Exception as e:
+                    log_progress("   ❌ [%s] %s in %s: %s", worker, category, area, e, level=logging.WARNING)
+                    work_queue.finish(unit_id, ok=False)
+    finally:
+        sink.close()
+        browser_pool.close_all()
+        work_queue.close()
+    print(f"🏁 [{worker}] drained the queue after {units_done} units")
+
+
+# ======================================
+# COORDINATOR
+# ======================================
+def merge_shards(shard_dir, output_path, place_categories):
+    """Folds every worker's shard into one output, deduplicated by place id and then name/address."""
+    sink = ResultSink(output_path)
+    seen = set()
+    for path in sorted(glob.glob(os.path.join(shard_dir, "shard-*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                if row["place_id"] in seen:
+                    continue
+                seen.add(row["place_id"])
+                row["matched_categories"] = "; ".join(place_categories.get(row["place_id"], []))
+                sink.put(row)
+    return sink.close()
+
+
+def shard_dir_for(output_path, run_id):
+    return os.path.join(os.path.splitext(output_path)[0] + "_shards", run_id)
+
+
+def run_sharded(areas, categories, workers, queue_path, output_path, limits=None, options=None,
+                browsers=BROWSERS_PER_WORKER, threads=THREADS_PER_WORKER, seed=True):
+    """
+    Drains the queue with local worker processes. The seeding node then merges
+    its shards into output_path; a --join node (seed=False) leaves its shards
+    for the seeding node and returns None.
+    """
+    areas = normalize_areas(areas)
+    limits = merged(DEFAULT_LIMITS, limits, "limits")
+    options = merged(DEFAULT_OPTIONS, options, "options")
+    units = [(category, area["name"]) for area in areas for category in categories]
+    work_queue = WorkQueue(queue_path)
+    shard_dir = shard_dir_for(output_path, work_queue.run_id)
+    os.makedirs(shard_dir, exist_ok=True)
+    if seed:
+        work_queue.add_units(units)
+    print(f"📦 Queue {queue_path}: {work_queue.counts()} (shards in {shard_dir})")
+
+    # Resolved here once; spawned workers inherit it instead of each asking webdriver-manager
+    os.environ.setdefault("CHROMEDRIVER", resolve_driver_path())
+    # Spawned, not forked: every worker starts clean and builds its own Chrome pool
+    ctx = multiprocessing.get_context("spawn")
+    host = socket.gethostname()
+    procs = [
+        ctx.Process(target=run_worker, args=(queue_path, shard_dir, f"{host}-{os.getpid()}-{i}", areas, limits,
+                                             options, browsers, threads))
+        for i in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    print(f"📦 Queue {queue_path}: {work_queue.counts()}")
+    if not seed:
+        work_queue.close()
+        print(f"🧩 Shards left in {shard_dir} for the seeding node to merge")
+        return None
+    stats = merge_shards(shard_dir, output_path, work_queue.place_categories())
+    work_queue.close()
+    return stats
+
+
+def merge_run(queue_path, output_path):
+    """Merges whatever shards are in the queue's run directory, e.g. after copying in --join nodes' shards."""
+    work_queue = WorkQueue(queue_path)
+    try:
+        shard_dir = shard_dir_for(output_path, work_queue.run_id)
+        print(f"📦 Merging {shard_dir}: {work_queue.counts()}")
+        return merge_shards(shard_dir, output_path, work_queue.place_categories())
+    finally:
+        work_queue.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded Google Maps scraper")
+    parser.add_argument("job", nargs="?", help="JSON/YAML job file (see maps_job.py) with the areas and categories")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--browsers-per-worker", type=int, default=BROWSERS_PER_WORKER)
+    parser.add_argument("--threads-per-worker", type=int, default=THREADS_PER_WORKER)
+    parser.add_argument("--queue", default="maps_work_queue.sqlite")
+    parser.add_argument("--output", default="sharded_places.csv")
+    parser.add_argument("--join", action="store_true",
+                        help="only drain an existing queue (e.g. from another machine), don't seed or merge it")
+    parser.add_argument("--merge-only", action="store_true",
+                        help="only merge the shards already in this queue's run directory into --output")
+    args = parser.parse_args()
+    if not args.job and not args.merge_only:
+        parser.error("a job file is needed unless --merge-only")
+
+    start_time = time.time()
+    if args.merge_only:
+        stats = merge_run(args.queue, args.output)
+    else:
+        job = load_job(args.job)
+        stats = run_sharded(
+            job["areas"], job["categories"], args.workers, args.queue, args.output,
+            limits=job.get("limits"), options=job.get("options"),
+            browsers=args.browsers_per_worker, threads=args.threads_per_worker, seed=not args.join
+        )
+    elapsed = time.time() - start_time
+    if stats is None:
+        raise SystemExit(0)
+    print(f"✅ {stats['written']} unique listings in {elapsed:.1f}s → {args.output}")
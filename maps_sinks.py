@@ -0,0 +1,203 @@
+import csv
+import json
+import os
+import queue
+import re
+import threading
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output needs pyarrow; CSV and JSONL don't
+    pa = pq = None
+
+
+# ======================================
+# OUTPUT SCHEMA
+# ======================================
+OUTPUT_COLUMNS = [
+    "name", "category", "rating", "reviews", "address", "phone", "website",
+    "plus_code", "hours", "latitude", "longitude", "search_query", "matched_categories",
+    "place_id", "listing_url",
+]
+FLOAT_COLUMNS = {"rating", "latitude", "longitude"}
+INT_COLUMNS = {"reviews"}
+
+SINK_BATCH_SIZE = 100
+SINK_FLUSH_INTERVAL = 2.0
+
+
+def dedup_key(row):
+    """
+    The row's place id; rows without one fall back to normalized (name, address),
+    where case, punctuation and spacing don't make a new place.
+    """
+    if row.get("place_id"):
+        return ("place_id", row["place_id"])
+    def norm(value):
+        return " ".join(re.sub(r"[^\w\s]", " ", str(value or "")).lower().split())
+    return ("name_address", norm(row.get("name")), norm(row.get("address")))
+
+
+# ======================================
+# FILE WRITERS
+# ======================================
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_COLUMNS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write_batch(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write_batch(self, rows):
+        self.file.write("".join(
+            json.dumps({col: row.get(col) for col in OUTPUT_COLUMNS}, ensure_ascii=False) + "\n"
+            for row in rows
+        ))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """One row group per batch, so readers see data before the run ends."""
+
+    def __init__(self, path):
+        if pq is None:
+            raise RuntimeError("parquet output needs pyarrow (pip install pyarrow)")
+        self.schema = pa.schema([
+            (col, pa.float64() if col in FLOAT_COLUMNS else pa.int64() if col in INT_COLUMNS else pa.string())
+            for col in OUTPUT_COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write_batch(self, rows):
+        columns = {col: [_coerce(row.get(col), col) for row in rows] for col in OUTPUT_COLUMNS}
+        self.writer.write_table(pa.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _coerce(value, col):
+    """A value in its column's Parquet type; one that doesn't fit becomes null rather than failing the batch."""
+    if value is None or value == "":
+        return None
+    try:
+        if col in FLOAT_COLUMNS:
+            return float(str(value).replace(",", "."))
+        if col in INT_COLUMNS:
+            return int(float(str(value).replace(",", "")))
+    except ValueError:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+WRITERS = {".csv": CsvWriter, ".jsonl": JsonlWriter, ".parquet": ParquetWriter}
+
+
+# ======================================
+# STREAMING SINK
+# ======================================
+_CLOSE = object()
+
+
+class ResultSink:
+    """
+    Takes result rows from any thread and streams them to disk from one writer
+    thread: failed scrapes (rows with an error, or no name) are dropped,
+    duplicates (same place id, else same name and address) skipped on the fly,
+    and the rest flushed every batch_size rows or flush_interval seconds.
+    The format follows the file extension (.csv, .jsonl or .parquet).
+    """
+
+    def __init__(self, path, batch_size=SINK_BATCH_SIZE, flush_interval=SINK_FLUSH_INTERVAL):
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in WRITERS:
+            raise ValueError(f"unsupported output format {ext!r}, use one of {sorted(WRITERS)}")
+        self.path = path
+        self.writer = WRITERS[ext](path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.seen = set()
+        self.stats = {"received": 0, "written": 0, "duplicates": 0, "dropped": 0}
+        self.error = None  # Set when the writer fails; put() and close() raise it
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, row):
+        self._raise_error()
+        self.queue.put(row)
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise RuntimeError(f"writing {self.path} failed: {self.error}") from self.error
+
+    def _accept(self, row):
+        self.stats["received"] += 1
+        if row.get("error") or not row.get("name"):
+            self.stats["dropped"] += 1  # Failed scrape; the card prefills a name, so check the error first
+            return False
+        key = dedup_key(row)
+        if key in self.seen:
+            self.stats["duplicates"] += 1
+            return False
+        self.seen.add(key)
+        return True
+
+    def _flush(self, batch):
+        if batch:
+            self.writer.write_batch(batch)
+            self.stats["written"] += len(batch)
+
+    def _run(self):
+        try:
+            self._write_loop()
+        except Exception as e:
+            self.error = e  # Keep it for the caller instead of dying unnoticed
+
+    def _write_loop(self):
+        batch = []
+        batch_started = 0.0
+        while True:
+            timeout = self.flush_interval
+            if batch:
+                timeout = max(0.0, batch_started + self.flush_interval - time.monotonic())
+            try:
+                row = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                row = None
+
+            if row is _CLOSE:
+                self._flush(batch)
+                return
+            if row is not None and self._accept(row):
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(row)
+            if batch and (len(batch) >= self.batch_size
+                          or time.monotonic() - batch_started >= self.flush_interval):
+                self._flush(batch)
+                batch = []
+
+    def close(self):
+        self.queue.put(_CLOSE)
+        self.thread.join()
+        self.writer.close()
+        self._raise_error()
+        return self.stats
+
@@ -0,0 +1,118 @@
+import json
+import sqlite3
+import threading
+import time
+
+from maps_ids import place_id
+
+
+# ======================================
+# LISTING STORE
+# ======================================
+LISTING_TTL_HOURS = 24 * 7
+
+
+class ListingStore:
+    """
+    SQLite cache of scraped listings keyed by place id. Rows younger than the
+    TTL are served from disk instead of being scraped again.
+    """
+
+    def __init__(self, path, ttl_hours=LISTING_TTL_HOURS):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            " place_id TEXT PRIMARY KEY,"
+            " listing_url TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        # Which places each search returned last time, for spotting removals
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_places ("
+            " query TEXT NOT NULL,"
+            " place_id TEXT NOT NULL,"
+            " PRIMARY KEY (query, place_id))"
+        )
+        self.conn.commit()
+
+    def fresh(self, links):
+        """
+        Returns dict: link -> cached row, for every link scraped within the TTL.
+        """
+        return self.records(links, time.time() - self.ttl)
+
+    def records(self, links, cutoff=0):
+        """
+        Returns dict: link -> stored row, for every link stored since cutoff (any age by default).
+        """
+        keys = {place_id(link): link for link in links}
+        found = {}
+        for pid, row in self.rows_by_id(list(keys), cutoff).items():
+            row["listing_url"] = keys[pid]  # Report it under the href seen this run
+            found[keys[pid]] = row
+        return found
+
+    def rows_by_id(self, ids, cutoff=0):
+        found = {}
+        with self.lock:
+            for i in range(0, len(ids), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = ids[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT place_id, data FROM listings WHERE fetched_at >= ? "
+                    f"AND place_id IN ({','.join('?' * len(chunk))})",
+                    [cutoff, *chunk]
+                ).fetchall()
+                for pid, data in rows:
+                    found[pid] = json.loads(data)
+        return found
+
+    def count(self):
+        """Returns int: stored listings, whatever their age."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    def place_ids(self):
+        """Returns list: every stored place id, whatever its age."""
+        with self.lock:
+            return [pid for (pid,) in self.conn.execute("SELECT place_id FROM listings")]
+
+    def swap_query_places(self, query, place_ids):
+        """
+        Replaces the places recorded for a search.
+        Returns set: place ids the previous run of this search had and this one doesn't.
+        """
+        with self.lock:
+            before = {pid for (pid,) in self.conn.execute(
+                "SELECT place_id FROM query_places WHERE query = ?", (query,)
+            )}
+            self.conn.execute("DELETE FROM query_places WHERE query = ?", (query,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO query_places (query, place_id) VALUES (?, ?)",
+                [(query, pid) for pid in place_ids]
+            )
+            self.conn.commit()
+        return before - set(place_ids)
+
+    def save(self, row):
+        """Stores a scraped row straight away; failed scrapes are left for the next run."""
+        if row.get("error") or not row.get("name"):
+            return False
+        # Which searches found the place belongs to the run, not to the place
+        data = {k: v for k, v in row.items() if k not in ("search_query", "matched_categories")}
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO listings (place_id, listing_url, data, fetched_at) VALUES (?, ?, ?, ?)",
+                (place_id(row["listing_url"]), row["listing_url"], json.dumps(data), time.time())
+            )
+            self.conn.commit()
+        return True
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
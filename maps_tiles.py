@@ -0,0 +1,102 @@
+import math
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from maps_ids import place_id
+
+
+MAPS_BASE_URL = "https://www.google.com"  # Benchmarks point this at a local fake
+
+
+# ======================================
+# AREA TILING
+# ======================================
+# A search feed stops at roughly 120 results, so one query for a dense area
+# comes back truncated. Tiling runs the query once per viewport of a grid over
+# the area's bounding box (south, west, north, east); a tile whose feed came
+# back at the cap is split into four and searched again.
+FEED_RESULT_CAP = 120
+TILE_CAP_MARGIN = 10  # A feed this close to the cap counts as capped
+TILE_GRID = (2, 2)  # Rows x columns of the starting grid
+TILE_MAX_DEPTH = 3  # Splits allowed below the starting grid
+TILE_WORKERS = 3
+VIEWPORT_PX = 800  # Smaller side of the browser's map viewport
+MIN_ZOOM, MAX_ZOOM = 3, 21
+
+
+def grid(bbox, rows, cols):
+    south, west, north, east = bbox
+    lat_step = (north - south) / rows
+    lng_step = (east - west) / cols
+    return [
+        (south + r * lat_step, west + c * lng_step, south + (r + 1) * lat_step, west + (c + 1) * lng_step)
+        for r in range(rows) for c in range(cols)
+    ]
+
+
+def split_tile(tile):
+    return grid(tile, 2, 2)
+
+
+def tile_viewport(tile):
+    """
+    Returns tuple: (lat, lng, zoom) - the tile's center and the deepest zoom
+    whose viewport still covers the whole tile.
+    """
+    south, west, north, east = tile
+    lat = (south + north) / 2
+    lng = (west + east) / 2
+    # Web Mercator: 256px spans 360/2^z degrees of longitude, latitude shrinks by cos(lat)
+    span = max(east - west, (north - south) / math.cos(math.radians(lat)), 1e-6)
+    zoom = math.floor(math.log2(360 * VIEWPORT_PX / 256 / span))
+    return lat, lng, min(MAX_ZOOM, max(MIN_ZOOM, zoom))
+
+
+def search_url(query, tile=None):
+    url = f"{MAPS_BASE_URL}/maps/search/{query.replace(' ', '+')}/"
+    if tile is not None:
+        lat, lng, zoom = tile_viewport(tile)
+        url += f"@{lat:.6f},{lng:.6f},{zoom}z"
+    return url
+
+
+def collect_tiled(collect, bbox, grid_size=TILE_GRID, max_depth=TILE_MAX_DEPTH,
+                  cap=FEED_RESULT_CAP - TILE_CAP_MARGIN, workers=TILE_WORKERS):
+    """
+    Runs collect(tile) -> cards over a grid of the bounding box, splitting capped
+    tiles until max_depth, with up to `workers` tiles in flight.
+    A tile that raised is counted and skipped; if every tile raised, the last
+    error is raised so the caller can retry the whole area.
+    Returns tuple: (cards deduplicated by place id, stats)
+    """
+    cards_by_id = {}
+    stats = {"tiles": 0, "failed": 0, "split": 0, "capped_at_max_depth": 0, "found": 0}
+    last_error = None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(collect, tile): (tile, 0) for tile in grid(bbox, *grid_size)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                tile, depth = pending.pop(future)
+                try:
+                    cards = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    last_error = e
+                    continue
+                stats["tiles"] += 1
+                stats["found"] += len(cards)
+                for card in cards:
+                    cards_by_id.setdefault(place_id(card["href"]), card)
+
+                if len(cards) >= cap:
+                    if depth < max_depth:
+                        stats["split"] += 1
+                        for child in split_tile(tile):
+                            pending[executor.submit(collect, child)] = (child, depth + 1)
+                    else:
+                        stats["capped_at_max_depth"] += 1
+
+    if last_error is not None and not stats["tiles"]:
+        raise last_error
+    return list(cards_by_id.values()), stats
@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from maps_pool import ChromeHost, PROFILES, WARM_POOL_STATE, pid_alive
+
+
+# ======================================
+# WARM POOL DAEMON
+# ======================================
+# Keeps Chrome running between scraper runs so short jobs skip cold start.
+# The state file lists each browser's DevTools address; a BrowserPool with
+# use_warm=True attaches a tab in its own browser context to them instead of
+# launching Chrome, and disposes the context again when it is done.
+WARM_BROWSERS = 4
+WARM_CHECK_INTERVAL = 5.0  # Seconds between checks for browsers that died
+
+
+def write_state(path, profile, hosts):
+    state = {
+        "pid": os.getpid(),
+        "profile": profile,
+        "hosts": [{"address": host.address, "pid": host.pid} for host in hosts],
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)  # Readers never see a half-written file
+
+
+def serve_warm_pool(browsers=WARM_BROWSERS, profile="lean", path=WARM_POOL_STATE):
+    """Runs until SIGTERM or Ctrl+C, relaunching any browser that died."""
+    options_factory = PROFILES[profile][0]
+    with ThreadPoolExecutor(max_workers=browsers) as launcher:
+        hosts = list(launcher.map(lambda _: ChromeHost(options_factory()), range(browsers)))
+    write_state(path, profile, hosts)
+    print(f"🔥 {browsers} warm {profile} browsers up, state in {path}")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    try:
+        while not stop.wait(WARM_CHECK_INTERVAL):
+            dead = [i for i, host in enumerate(hosts) if host.proc.poll() is not None]
+            for i in dead:
+                print(f"♻️ Warm browser {hosts[i].address} died, relaunching")
+                hosts[i].close()
+                hosts[i] = ChromeHost(options_factory())
+            if dead:
+                write_state(path, profile, hosts)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        for host in hosts:
+            host.close()
+        print("🛑 Warm pool stopped")
+
+
+def read_state(path=WARM_POOL_STATE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if pid_alive(state.get("pid", -1)) else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep Chrome warm between scraper runs")
+    parser.add_argument("--browsers", type=int, default=WARM_BROWSERS)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="lean")
+    parser.add_argument("--state", default=WARM_POOL_STATE)
+    parser.add_argument("--status", action="store_true", help="show the running warm pool and exit")
+    parser.add_argument("--stop", action="store_true", help="stop the running warm pool and exit")
+    args = parser.parse_args()
+
+    state = read_state(args.state)
+    if args.status or args.stop:
+        if state is None:
+            print("💤 No warm pool running")
+        elif args.stop:
+            os.kill(state["pid"], signal.SIGTERM)
+            print(f"🛑 Stopping warm pool (pid {state['pid']})")
+        else:
+            print(f"🔥 Warm pool pid {state['pid']}: {len(state['hosts'])} {state['profile']} browsers")
+            for host in state["hosts"]:
+                print(f"   {host['address']} (pid {host['pid']})")
+    elif state is not None:
+        print(f"⚠️ A warm pool is already running (pid {state['pid']})")
+    else:
+        serve_warm_pool(args.browsers, args.profile, args.state)